@@ -0,0 +1,273 @@
+"""
+Admission control for AI provider calls
+Caps concurrent calls per provider and queues the rest by priority, so a traffic spike
+waits here instead of turning into upstream 429s and fallback retries. Requests whose
+expected queue wait would pass their deadline are shed straight away with a clear error
+"""
+
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, List, Optional
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+
+from config import settings
+from metrics import WAIT_BUCKETS, metrics
+
+logger = logging.getLogger(__name__)
+
+# Lower value is served first
+PRIORITY_AUTHENTICATED = 0
+PRIORITY_ANONYMOUS = 1
+PRIORITY_BACKGROUND = 2
+PRIORITY_NAMES = ("authenticated", "anonymous", "background")
+
+# Smoothing factor for the per-provider call duration estimate
+SERVICE_TIME_ALPHA = 0.2
+WAIT_WINDOW = 1000
+
+
+admission_wait = metrics.histogram(
+    "mentorship_admission_wait_seconds", "Time provider calls waited for an admission slot", ("provider", "priority"),
+    buckets=WAIT_BUCKETS
+)
+admission_shed = metrics.counter(
+    "mentorship_admission_shed_total", "Provider calls shed by admission control", ("provider", "reason")
+)
+
+
+def priority_for(user_id: Optional[str]) -> int:
+    """Requests that identify a user are served ahead of anonymous ones"""
+    return PRIORITY_AUTHENTICATED if user_id else PRIORITY_ANONYMOUS
+
+
+class AdmissionRejected(Exception):
+    """A provider call was shed instead of queued; ``retry_after`` is a wait hint in seconds"""
+
+    def __init__(self, provider: str, reason: str, retry_after: float, message: str):
+        super().__init__(message)
+        self.provider = provider
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class ProviderGate:
+    """Concurrency slots and the priority wait queue for one provider.
+
+    Waiters sit in a heap ordered by (priority, arrival). A released slot is
+    handed straight to the first live waiter, so queued calls are never
+    overtaken by new arrivals. Timed-out or evicted waiters are left in the
+    heap and skipped when they surface.
+    """
+
+    def __init__(self, name: str, limit: int, max_queue: int, service_seconds: float):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.service_seconds = service_seconds
+        self.admitted = 0
+        self.queued = 0
+        self.peak_queue_depth = 0
+        self.shed: Dict[str, int] = {"deadline": 0, "queue_full": 0}
+        self.waits: Deque[float] = deque(maxlen=WAIT_WINDOW)
+        self._heap: List[list] = []  # [priority, arrival, future]
+        self._waiting = [0] * len(PRIORITY_NAMES)
+        self._arrivals = itertools.count()
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(self._waiting)
+
+    def estimated_wait(self, priority: int) -> float:
+        """Seconds until a new waiter at ``priority`` would get a slot (waiters at or above it go first)"""
+        ahead = sum(self._waiting[:priority + 1])
+        return (ahead + 1) / self.limit * self.service_seconds
+
+    def record_service(self, seconds: float):
+        self.service_seconds += SERVICE_TIME_ALPHA * (seconds - self.service_seconds)
+
+    def count_shed(self, reason: str):
+        self.shed[reason] += 1
+        admission_shed.inc(self.name, reason)
+
+    def _unlink(self, entry: list):
+        self._waiting[entry[0]] -= 1
+
+    def _enqueue(self, priority: int) -> list:
+        entry = [priority, next(self._arrivals), asyncio.get_running_loop().create_future()]
+        heapq.heappush(self._heap, entry)
+        self._waiting[priority] += 1
+        self.queued += 1
+        self.peak_queue_depth = max(self.peak_queue_depth, self.queue_depth)
+        return entry
+
+    def _evict_for(self, priority: int) -> bool:
+        """Make room in a full queue by shedding the newest waiter of a lower priority"""
+        live = [entry for entry in self._heap if not entry[2].done()]
+        victim = max(live, key=lambda entry: (entry[0], entry[1]), default=None)
+        if victim is None or victim[0] <= priority:
+            return False
+        self._unlink(victim)
+        self.count_shed("queue_full")
+        victim[2].set_exception(AdmissionRejected(
+            self.name, "queue_full", self.service_seconds,
+            f"{self.name} is at capacity and the request was displaced by higher-priority traffic"
+        ))
+        return True
+
+    def release(self):
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            if entry[2].done():
+                continue
+            # The slot passes to the waiter; in_flight is unchanged
+            self._unlink(entry)
+            entry[2].set_result(None)
+            return
+        self.in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        waits = sorted(self.waits)
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "queue_depth_by_priority": dict(zip(PRIORITY_NAMES, self._waiting)),
+            "peak_queue_depth": self.peak_queue_depth,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "shed": dict(self.shed),
+            "wait_p50_ms": round(waits[len(waits) // 2] * 1000, 1) if waits else 0.0,
+            "wait_p95_ms": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 1) if waits else 0.0,
+            "service_seconds": round(self.service_seconds, 3)
+        }
+
+
+class AdmissionController:
+    """Per-provider gates in front of every model call.
+
+    ``slot(provider, priority, deadline)`` admits the call at once when a
+    slot is free. Otherwise the call queues, unless its estimated wait (its
+    place in the queue times the provider's smoothed call duration) already
+    exceeds the deadline, or the queue is full of equal or higher priority
+    waiters; then it raises :class:`AdmissionRejected`. A queued call that
+    reaches its deadline is shed the same way.
+    """
+
+    def __init__(self, limits: Dict[str, int], default_limit: int, max_queue: int,
+                 max_wait_seconds: float, service_seconds: float, enabled: bool = True):
+        self.limits = limits
+        self.default_limit = default_limit
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self.service_seconds = service_seconds
+        self.enabled = enabled
+        self.gates: Dict[str, ProviderGate] = {}
+
+    def gate(self, provider: str) -> ProviderGate:
+        gate = self.gates.get(provider)
+        if gate is None:
+            gate = self.gates[provider] = ProviderGate(
+                provider, self.limits.get(provider, self.default_limit), self.max_queue, self.service_seconds
+            )
+        return gate
+
+    @asynccontextmanager
+    async def slot(self, provider: str, priority: int = PRIORITY_ANONYMOUS, deadline: Optional[float] = None):
+        """Hold one of the provider's concurrency slots for the body of the ``async with``"""
+        if not self.enabled:
+            yield
+            return
+        gate = self.gate(provider)
+        await self._acquire(gate, priority, deadline)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            gate.record_service(time.monotonic() - started)
+            gate.release()
+
+    async def _acquire(self, gate: ProviderGate, priority: int, deadline: Optional[float]):
+        now = time.monotonic()
+        if gate.in_flight < gate.limit and not gate.queue_depth:
+            gate.in_flight += 1
+            gate.admitted += 1
+            gate.waits.append(0.0)
+            admission_wait.observe(0.0, gate.name, PRIORITY_NAMES[priority])
+            return
+
+        remaining = (deadline if deadline is not None else now + self.max_wait_seconds) - now
+        estimate = gate.estimated_wait(priority)
+        if estimate > remaining:
+            gate.count_shed("deadline")
+            raise AdmissionRejected(
+                gate.name, "deadline", estimate,
+                f"{gate.name} is at capacity: estimated queue wait {estimate:.1f}s exceeds the "
+                f"{max(remaining, 0):.1f}s deadline ({gate.queue_depth} requests queued)"
+            )
+        if gate.queue_depth >= gate.max_queue and not gate._evict_for(priority):
+            gate.count_shed("queue_full")
+            raise AdmissionRejected(
+                gate.name, "queue_full", estimate,
+                f"{gate.name} is at capacity and its queue is full ({gate.max_queue} requests)"
+            )
+
+        entry = gate._enqueue(priority)
+        future = entry[2]
+        try:
+            await asyncio.wait((future,), timeout=remaining)
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                gate.release()  # handed a slot just as the caller went away
+            elif not future.done():
+                gate._unlink(entry)
+                future.cancel()
+            raise
+
+        if not future.done():
+            gate._unlink(entry)
+            future.cancel()
+            gate.count_shed("deadline")
+            raise AdmissionRejected(
+                gate.name, "deadline", gate.estimated_wait(priority),
+                f"{gate.name} is at capacity: no slot freed within the {remaining:.1f}s deadline"
+            )
+        error = future.exception()
+        if error is not None:
+            raise error
+        gate.admitted += 1
+        waited = time.monotonic() - now
+        gate.waits.append(waited)
+        admission_wait.observe(waited, gate.name, PRIORITY_NAMES[priority])
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "providers": {name: gate.stats() for name, gate in self.gates.items()}}
+
+
+def retry_after_header(error: AdmissionRejected) -> str:
+    return str(max(1, math.ceil(error.retry_after)))
+
+
+# Global admission controller instance
+admission_controller = AdmissionController(
+    limits={"gemini": settings.ADMISSION_GEMINI_CONCURRENCY, "openai": settings.ADMISSION_OPENAI_CONCURRENCY},
+    default_limit=settings.ADMISSION_DEFAULT_CONCURRENCY,
+    max_queue=settings.ADMISSION_MAX_QUEUE,
+    max_wait_seconds=settings.ADMISSION_MAX_WAIT_SECONDS,
+    service_seconds=settings.ADMISSION_DEFAULT_SERVICE_SECONDS,
+    enabled=settings.ADMISSION_ENABLED
+)
+
+metrics.callback_gauge(
+    "mentorship_admission_queue_depth", "Provider calls waiting for an admission slot", ("provider",),
+    lambda: {(name,): gate.queue_depth for name, gate in admission_controller.gates.items()}
+)
+metrics.callback_gauge(
+    "mentorship_admission_in_flight", "Provider calls holding an admission slot", ("provider",),
+    lambda: {(name,): gate.in_flight for name, gate in admission_controller.gates.items()}
+)
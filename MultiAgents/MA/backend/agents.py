@@ -4,11 +4,16 @@ This maintains backward compatibility while adding LangChain capabilities
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, AsyncIterator, List, Optional
 from database import db
-from langchain_agents import run_agent_workflow, get_agent_name
+from config import settings
+from semantic_cache import semantic_cache
+from metrics import cache_lookups
+from langchain_agents import run_agent_workflow, stream_agent_workflow, get_agent_name, extract_entities
+import asyncio
 import logging
 import traceback
+import uuid
 
 logger = logging.getLogger(__name__)
 
@@ -41,26 +46,99 @@ class BaseAgent(ABC):
             logger.error(f"Error in process_query for {self.agent_type}: {e}", exc_info=True)
             raise
 
-    async def generate_response(self, query: str, user_id: Optional[str] = None, preferred_provider: Optional[str] = None, session_id: Optional[str] = None) -> Dict[str, Any]:
+    def _prepare_session(self, query: str, user_id: Optional[str], session_id: Optional[str]):
+        """Ensure a conversation session exists, return it with its prior history, and record the query"""
+        from conversation_manager import conversation_manager
+        
+        # Get or create session (an unknown or expired session_id is recreated under the same id)
+        if not session_id or not conversation_manager.has_session(session_id):
+            session_id = conversation_manager.create_session(user_id, self.agent_type, session_id=session_id)
+        
+        # Get conversation history (the context builder trims it to the prompt token budget)
+        conversation_history = conversation_manager.get_history_with_ids(session_id, limit=settings.CONVERSATION_MAX_MESSAGES // 2)
+        
+        # Add user message to history
+        conversation_manager.add_message(session_id, "user", query)
+        return session_id, conversation_history
+
+    async def _finalize_result(self, result: Dict[str, Any], query: str, user_id: Optional[str], session_id: str, agent_routing: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Record the assistant reply in history and persist the session (database errors are non-fatal)"""
+        from conversation_manager import conversation_manager
+        
+        # How an agent_type="auto" request was routed (stored too, so router training can skip these)
+        if agent_routing:
+            result["metadata"] = {**(result.get("metadata") or {}), "agent_routing": agent_routing}
+
+        # Add assistant response to history
+        if result.get("response"):
+            await conversation_manager.run_blocking(
+                conversation_manager.add_message,
+                session_id,
+                "assistant",
+                result.get("response", ""),
+                metadata={"agent_type": self.agent_type, "ai_provider": result.get("ai_provider")}
+            )
+
+        # Save to database (optional)
+        try:
+            db_session_id = await db.create_session(
+                user_id=user_id,
+                agent_type=self.agent_type,
+                query=query,
+                response=result.get("response", ""),
+                ai_provider=result.get("ai_provider", "unknown"),
+                metadata=result.get("metadata", {})
+            )
+            # Use conversation session_id
+            result["session_id"] = session_id
+        except Exception as db_error:
+            logger.warning(f"Database error (non-fatal): {db_error}")
+            result["session_id"] = session_id  # Use conversation session_id anyway
+
+        # Update user history
+        if user_id:
+            try:
+                await db.update_user_history(user_id, self.agent_type)
+            except Exception as history_error:
+                logger.warning(f"History update error (non-fatal): {history_error}")
+
+        return result
+
+    def _cached_result(self, query: str, conversation_history: List[Dict]) -> Optional[Dict[str, Any]]:
+        """Stored answer to a near-identical question; only used when there is no prior history"""
+        if not settings.SEMANTIC_CACHE_ENABLED or conversation_history:
+            return None
+        cached = semantic_cache.lookup(self.agent_type, query)
+        cache_lookups.inc(self.agent_type, "hit" if cached else "miss")
+        return cached
+
+    def _cache_result(self, query: str, conversation_history: List[Dict], result: Dict[str, Any]):
+        if settings.SEMANTIC_CACHE_ENABLED and not conversation_history and result.get("success") and result.get("response"):
+            semantic_cache.store(self.agent_type, query, result)
+
+    def _error_result(self, error: Exception) -> Dict[str, Any]:
+        error_msg = str(error)
+        logger.error(f"Error in generate_response for {self.agent_type}: {error_msg}\n{traceback.format_exc()}")
+        return {
+            "success": False,
+            "error": error_msg,
+            "agent_type": self.agent_type,
+            "agent_name": self.name,
+            "response": f"I apologize, but I encountered an error: {error_msg}. Please try again."
+        }
+
+    async def generate_response(self, query: str, user_id: Optional[str] = None, preferred_provider: Optional[str] = None, session_id: Optional[str] = None, agent_routing: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Generate response with conversation history and database logging"""
+        from conversation_manager import conversation_manager
+
         try:
-            from conversation_manager import conversation_manager
-            
-            # Get or create session
-            if not session_id:
-                session_id = conversation_manager.create_session(user_id, self.agent_type)
-            else:
-                # Ensure session exists
-                if session_id not in conversation_manager.conversations:
-                    conversation_manager.create_session(user_id, self.agent_type)
-                    # Use existing session_id but reset if needed
-            
-            # Get conversation history
-            conversation_history = conversation_manager.get_history_for_llm(session_id, limit=10)
-            
-            # Add user message to history
-            conversation_manager.add_message(session_id, "user", query)
+            session_id, conversation_history = await conversation_manager.run_blocking(self._prepare_session, query, user_id, session_id)
             
+            # A fresh conversation can be answered from the semantic cache
+            cached = self._cached_result(query, conversation_history)
+            if cached:
+                return await self._finalize_result(cached, query, user_id, session_id, agent_routing)
+
             # Get response from LangChain workflow with history
             result = await self.process_query(
                 query=query,
@@ -73,50 +151,42 @@ class BaseAgent(ABC):
             if not result.get("success", False):
                 return result
 
-            # Add assistant response to history
-            if result.get("response"):
-                conversation_manager.add_message(
-                    session_id,
-                    "assistant",
-                    result.get("response", ""),
-                    metadata={"agent_type": self.agent_type, "ai_provider": result.get("ai_provider")}
-                )
+            self._cache_result(query, conversation_history, result)
 
-            # Save to database (optional)
-            try:
-                db_session_id = await db.create_session(
-                    user_id=user_id,
-                    agent_type=self.agent_type,
-                    query=query,
-                    response=result.get("response", ""),
-                    ai_provider=result.get("ai_provider", "unknown"),
-                    metadata=result.get("metadata", {})
-                )
-                # Use conversation session_id
-                result["session_id"] = session_id
-            except Exception as db_error:
-                logger.warning(f"Database error (non-fatal): {db_error}")
-                result["session_id"] = session_id  # Use conversation session_id anyway
-
-            # Update user history
-            if user_id:
-                try:
-                    await db.update_user_history(user_id, self.agent_type)
-                except Exception as history_error:
-                    logger.warning(f"History update error (non-fatal): {history_error}")
+            return await self._finalize_result(result, query, user_id, session_id, agent_routing)
 
-            return result
+        except Exception as e:
+            return self._error_result(e)
+
+    async def stream_response(self, query: str, user_id: Optional[str] = None, preferred_provider: Optional[str] = None, session_id: Optional[str] = None, agent_routing: Optional[Dict[str, Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Stream response tokens; history and database logging happen once the stream completes"""
+        from conversation_manager import conversation_manager
+
+        try:
+            session_id, conversation_history = await conversation_manager.run_blocking(self._prepare_session, query, user_id, session_id)
+            yield {"type": "session", "session_id": session_id}
+
+            cached = self._cached_result(query, conversation_history)
+            if cached:
+                yield {"type": "token", "text": cached["response"]}
+                yield {"type": "done", "result": await self._finalize_result(cached, query, user_id, session_id, agent_routing)}
+                return
+            
+            async for event in stream_agent_workflow(
+                agent_type=self.agent_type,
+                query=query,
+                user_id=user_id,
+                preferred_provider=preferred_provider,
+                session_id=session_id,
+                conversation_history=conversation_history
+            ):
+                if event["type"] == "done":
+                    self._cache_result(query, conversation_history, event["result"])
+                    event["result"] = await self._finalize_result(event["result"], query, user_id, session_id, agent_routing)
+                yield event
 
         except Exception as e:
-            error_msg = str(e)
-            logger.error(f"Error in generate_response for {self.agent_type}: {error_msg}\n{traceback.format_exc()}")
-            return {
-                "success": False,
-                "error": error_msg,
-                "agent_type": self.agent_type,
-                "agent_name": self.name,
-                "response": f"I apologize, but I encountered an error: {error_msg}. Please try again."
-            }
+            yield {"type": "error", "result": self._error_result(e)}
 
 
 class SkillCoachAgent(BaseAgent):
@@ -310,3 +380,101 @@ class AgentFactory:
             }
             for agent_type, agent in cls._agents.items()
         }
+
+
+# Merged panel entity lists and the field that identifies an entity within each
+PANEL_ENTITY_KEYS = {"resources": "provider", "opportunities": "program", "events": "type"}
+
+
+def merge_panel_entities(sections: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Entities from every answered section, one entry each, listing the agents that mentioned it.
+
+    Offsets are left out of the merged lists (they are relative to one
+    section's text and stay on the sections themselves).
+    """
+    merged: Dict[str, Dict[str, Dict[str, Any]]] = {kind: {} for kind in PANEL_ENTITY_KEYS}
+    for section in sections:
+        if not section.get("success") or not section.get("response"):
+            continue
+        for kind, entities in extract_entities(section["response"]).items():
+            key_field = PANEL_ENTITY_KEYS[kind]
+            for entity in entities:
+                existing = merged[kind].get(entity[key_field])
+                if existing is None:
+                    item = {k: v for k, v in entity.items() if k not in ("start", "end", "offsets")}
+                    item["agents"] = [section["agent_type"]]
+                    merged[kind][entity[key_field]] = item
+                    continue
+                existing["agents"].append(section["agent_type"])
+                existing["mentions"] += entity["mentions"]
+                existing["url"] = existing["url"] or entity["url"]
+                existing["deadline"] = existing["deadline"] or entity["deadline"]
+    return {kind: list(items.values()) for kind, items in merged.items()}
+
+
+async def run_panel(
+    query: str,
+    agent_types: List[str],
+    user_id: Optional[str] = None,
+    preferred_provider: Optional[str] = None,
+    session_ids: Optional[Dict[str, str]] = None,
+    timeout: float = settings.PANEL_TIMEOUT_SECONDS
+) -> Dict[str, Any]:
+    """Ask several agents the same question concurrently under one shared deadline.
+
+    Each agent runs its normal ``generate_response`` (history, cache and
+    persistence included) with whatever time is left until the deadline. An
+    agent that misses it is cancelled and listed in ``timed_out``; the other
+    answers are still returned. Session ids are assigned up front so every
+    agent's conversation can be continued, including one that timed out.
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    deadline = started + timeout
+    session_ids = {agent_type: (session_ids or {}).get(agent_type) or str(uuid.uuid4()) for agent_type in agent_types}
+    timed_out: List[str] = []
+
+    async def ask(agent_type: str) -> Dict[str, Any]:
+        agent = AgentFactory.get_agent(agent_type)
+        try:
+            result = await asyncio.wait_for(
+                agent.generate_response(
+                    query=query,
+                    user_id=user_id,
+                    preferred_provider=preferred_provider,
+                    session_id=session_ids[agent_type]
+                ),
+                timeout=max(0.0, deadline - loop.time())
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Panel agent {agent_type} missed the {timeout:.1f}s deadline")
+            timed_out.append(agent_type)
+            result = {
+                "success": False,
+                "agent_type": agent_type,
+                "agent_name": agent.name,
+                "response": "",
+                "error": f"Timed out after {timeout:.1f}s"
+            }
+        result["session_id"] = session_ids[agent_type]
+        result["metadata"] = {**(result.get("metadata") or {}), "panel_time_ms": round((loop.time() - started) * 1000, 1)}
+        return result
+
+    sections = list(await asyncio.gather(*(ask(agent_type) for agent_type in agent_types)))
+    answered = [s for s in sections if s.get("success") and s.get("response")]
+
+    return {
+        "success": bool(answered),
+        "query": query,
+        "response": "\n\n".join(f"## {s['agent_name']}\n\n{s['response']}" for s in answered),
+        "sections": sections,
+        "session_ids": session_ids,
+        "timed_out": timed_out,
+        **merge_panel_entities(answered),
+        "metadata": {
+            "agents": agent_types,
+            "total_time_ms": round((loop.time() - started) * 1000, 1),
+            "deadline_seconds": timeout
+        }
+    }
+
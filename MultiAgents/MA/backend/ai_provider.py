@@ -1,8 +1,30 @@
 from abc import ABC, abstractmethod
-from typing import Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import time
 import openai
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
 from config import settings
+from admission import PRIORITY_ANONYMOUS, admission_controller
+from metrics import fallback_hops
+from model_probe_cache import model_probe_cache
+
+GEMINI_SDK_MODELS = ['models/gemini-1.5-flash-latest', 'models/gemini-1.5-pro-latest', 'models/gemini-1.5-flash', 'models/gemini-1.5-pro']
+
+# SDK errors that mean the model itself is unusable for this key (retired or not enabled), not a passing failure
+GEMINI_MODEL_UNAVAILABLE_ERRORS = (google_exceptions.NotFound, google_exceptions.PermissionDenied)
+
+# The google-generativeai client is synchronous; its calls run here so they never block the event loop
+_sdk_executor = ThreadPoolExecutor(max_workers=settings.PROVIDER_MAX_WORKERS, thread_name_prefix="provider-sdk")
+
+
+def probe_gemini_model(model_name: str):
+    """Raise if the model cannot serve a trivial request (used by the probe cache)."""
+    genai.GenerativeModel(model_name).generate_content("test")
+
 
 class AIProvider(ABC):
     @abstractmethod
@@ -37,20 +59,15 @@ class GeminiProvider(AIProvider):
         if not settings.GEMINI_API_KEY:
             raise ValueError("Gemini API key not configured")
         genai.configure(api_key=settings.GEMINI_API_KEY)
-        # Try models that work with current API version
-        models_to_try = ['models/gemini-1.5-flash-latest', 'models/gemini-1.5-pro-latest', 'models/gemini-1.5-flash', 'models/gemini-1.5-pro']
-        self.model = None
-        for model_name in models_to_try:
-            try:
-                self.model = genai.GenerativeModel(model_name)
-                # Test if it works
-                test_resp = self.model.generate_content("test")
-                break
-            except:
-                continue
-        if not self.model:
-            # Final fallback
-            self.model = genai.GenerativeModel('models/gemini-1.5-flash')
+        # Working model comes from the persisted probe cache; probing happens off the startup path
+        self.model_name = model_probe_cache.choose_model(
+            settings.GEMINI_API_KEY, GEMINI_SDK_MODELS, probe_gemini_model, on_change=self._use_model
+        )
+        self.model = genai.GenerativeModel(self.model_name)
+
+    def _use_model(self, model_name: str):
+        self.model_name = model_name
+        self.model = genai.GenerativeModel(model_name)
 
     async def generate_response(self, prompt: str, system_prompt: Optional[str] = None) -> str:
         try:
@@ -58,19 +75,176 @@ class GeminiProvider(AIProvider):
             if system_prompt:
                 full_prompt = f"{system_prompt}\n\n{prompt}"
 
-            response = self.model.generate_content(full_prompt)
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(_sdk_executor, self.model.generate_content, full_prompt)
             return response.text
+        except GEMINI_MODEL_UNAVAILABLE_ERRORS as e:
+            # Model retired or not enabled since it was probed; re-probe in the background.
+            # Rate limits and network errors keep the model, so they spend no probe calls.
+            model_probe_cache.mark_failed(settings.GEMINI_API_KEY, self.model_name)
+            model_probe_cache.revalidate_in_background(
+                settings.GEMINI_API_KEY, GEMINI_SDK_MODELS, probe_gemini_model, on_change=self._use_model
+            )
+            raise Exception(f"Gemini API error: {str(e)}")
         except Exception as e:
             raise Exception(f"Gemini API error: {str(e)}")
 
+class HedgePolicy:
+    """Decides when to send a hedge request and keeps hedging within budget.
+
+    Candidates are provider names, or Gemini model names on the REST path.
+    The hedge delay is a latency percentile of the running candidate's recent
+    successful calls. Every request earns ``HEDGE_MAX_RATIO`` of a hedge token
+    (capped at ``HEDGE_BURST``) and each hedge spends one, so hedges can never
+    exceed that fraction of traffic.
+    """
+
+    def __init__(self):
+        self._latencies: Dict[str, deque] = {}
+        self._budget = float(settings.HEDGE_BURST)
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def record_latency(self, provider_name: str, seconds: float):
+        self._latencies.setdefault(provider_name, deque(maxlen=settings.HEDGE_LATENCY_WINDOW)).append(seconds)
+
+    def delay_for(self, provider_name: str) -> float:
+        samples = self._latencies.get(provider_name)
+        if not samples or len(samples) < settings.HEDGE_MIN_SAMPLES:
+            return settings.HEDGE_DEFAULT_DELAY_SECONDS
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(len(ordered) * settings.HEDGE_LATENCY_PERCENTILE / 100))
+        return ordered[index]
+
+    def start_request(self):
+        self.requests += 1
+        self._budget = min(float(settings.HEDGE_BURST), self._budget + settings.HEDGE_MAX_RATIO)
+
+    async def race(
+        self,
+        candidates: List[str],
+        start: Callable[[str, Callable[[], None]], Optional[Awaitable]],
+        on_error: Callable[[str, Exception], None]
+    ) -> Tuple[Any, str]:
+        """Try ``candidates`` in order, hedging a slow call with the next one.
+
+        ``start(candidate, admitted)`` returns the call to run, or None to skip
+        the candidate; the call invokes ``admitted()`` once it holds its
+        admission slot. If the running call takes longer than its usual
+        latency percentile, counted from admission so queue wait is not
+        mistaken for a slow provider, the next candidate starts as well (in
+        its own slot), at most once per request and only if the budget allows. A token is spent only when a
+        hedge call actually starts. The first success wins and the other calls
+        are cancelled. Failures go to ``on_error`` and the next candidate takes
+        over. Raises the last error when every candidate fails.
+        """
+        self.start_request()
+        loop = asyncio.get_running_loop()
+        remaining = list(candidates)
+        pending: Dict[asyncio.Task, str] = {}
+        # Resolves with the loop time the call was admitted
+        admissions: Dict[asyncio.Task, asyncio.Future] = {}
+        hedge_task: Optional[asyncio.Task] = None
+        hedged = False
+        last_error: Optional[Exception] = None
+
+        def launch_next() -> Optional[asyncio.Task]:
+            nonlocal last_error
+            while remaining:
+                candidate = remaining.pop(0)
+                admission = loop.create_future()
+
+                def admitted(admission=admission):
+                    if not admission.done():
+                        admission.set_result(loop.time())
+                try:
+                    call = start(candidate, admitted)
+                except Exception as e:
+                    last_error = e
+                    on_error(candidate, e)
+                    continue
+                if call is None:
+                    continue
+                task = asyncio.ensure_future(call)
+                pending[task] = candidate
+                admissions[task] = admission
+                return task
+            return None
+
+        launch_next()
+        try:
+            while pending:
+                waiting = set(pending)
+                timeout = None
+                if not hedged and remaining:
+                    # Hedge against the call that has been running longest, once it is past admission
+                    oldest = next(iter(pending))
+                    admission = admissions[oldest]
+                    if admission.done():
+                        timeout = max(0.0, admission.result() + self.delay_for(pending[oldest]) - loop.time())
+                    else:
+                        waiting.add(admission)
+                done, _ = await asyncio.wait(waiting, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # Slower than usual: hedge if the budget allows, otherwise keep waiting
+                    hedged = True
+                    if self._budget >= 1:
+                        hedge_task = launch_next()
+                        if hedge_task is not None:
+                            self._budget -= 1
+                            self.hedged += 1
+                    continue
+
+                for task in done:
+                    if task not in pending:
+                        continue  # an admission: recompute the hedge deadline
+                    candidate = pending.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        last_error = e
+                        on_error(candidate, e)
+                        continue
+                    if task is hedge_task:
+                        self.hedge_wins += 1
+                    return result, candidate
+
+                if not pending:
+                    launch_next()
+        finally:
+            for task in pending:
+                task.cancel()
+            for admission in admissions.values():
+                admission.cancel()
+
+        raise last_error or Exception("No candidate could be started")
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "hedge_rate": round(self.hedged / self.requests, 4) if self.requests else 0.0,
+            "hedge_win_rate": round(self.hedge_wins / self.hedged, 4) if self.hedged else 0.0,
+            "hedge_delay_seconds": {name: round(self.delay_for(name), 3) for name in self._latencies}
+        }
+
+
 class AIProviderFactory:
     _providers = {}
+    hedge_policy = HedgePolicy()
 
     @classmethod
     def get_provider(cls, provider_name: str = None) -> AIProvider:
         if provider_name is None:
             provider_name = settings.AI_PROVIDER
 
+        if provider_name not in cls._providers and settings.FAKE_PROVIDER_ENABLED:
+            from fake_provider import FakeProvider
+            cls.register_provider(provider_name, FakeProvider(name=provider_name))
+
         if provider_name not in cls._providers:
             if provider_name.lower() == "openai":
                 try:
@@ -89,7 +263,12 @@ class AIProviderFactory:
         return cls._providers[provider_name]
 
     @classmethod
-    async def generate_with_fallback(cls, prompt: str, system_prompt: Optional[str] = None, preferred_provider: str = None) -> tuple[str, str]:
+    def register_provider(cls, provider_name: str, provider: AIProvider):
+        """Use ``provider`` for ``provider_name`` (a fake for load tests, or an additional provider)"""
+        cls._providers[provider_name] = provider
+
+    @classmethod
+    async def generate_with_fallback(cls, prompt: str, system_prompt: Optional[str] = None, preferred_provider: str = None, hedge: Optional[bool] = None, priority: int = PRIORITY_ANONYMOUS) -> tuple[str, str]:
         providers_to_try = []
 
         if preferred_provider:
@@ -103,15 +282,53 @@ class AIProviderFactory:
             if provider not in providers_to_try:
                 providers_to_try.append(provider)
 
+        if hedge if hedge is not None else settings.HEDGE_ENABLED:
+            return await cls._generate_hedged(providers_to_try, prompt, system_prompt, priority)
+
         last_error = None
         for provider_name in providers_to_try:
             try:
                 provider = cls.get_provider(provider_name)
-                response = await provider.generate_response(prompt, system_prompt)
+                response = await cls._timed_call(provider_name, provider, prompt, system_prompt, priority)
                 return response, provider_name
             except Exception as e:
                 last_error = e
                 print(f"Provider {provider_name} failed: {e}")
+                fallback_hops.inc("provider", provider_name)
                 continue
 
         raise Exception(f"All AI providers failed. Last error: {last_error}")
+
+    @classmethod
+    async def _timed_call(cls, provider_name: str, provider: AIProvider, prompt: str, system_prompt: Optional[str], priority: int = PRIORITY_ANONYMOUS, admitted: Optional[Callable[[], None]] = None) -> str:
+        # A shed call raises AdmissionRejected, which the fallback chain treats like any provider failure
+        async with admission_controller.slot(provider_name, priority):
+            if admitted:
+                admitted()
+            started = time.monotonic()
+            response = await provider.generate_response(prompt, system_prompt)
+        cls.hedge_policy.record_latency(provider_name, time.monotonic() - started)
+        return response
+
+    @classmethod
+    async def _generate_hedged(cls, providers_to_try: List[str], prompt: str, system_prompt: Optional[str], priority: int = PRIORITY_ANONYMOUS) -> tuple[str, str]:
+        """Fallback chain with hedging: if the running call is slower than its usual
+        latency percentile, also start the next provider; first success wins, the rest are cancelled."""
+        launched: List[AIProvider] = []
+
+        def start(provider_name: str, admitted: Callable[[], None]):
+            provider = cls.get_provider(provider_name)
+            if any(provider is p for p in launched):
+                # get_provider already fell back to a provider that is running
+                return None
+            launched.append(provider)
+            return cls._timed_call(provider_name, provider, prompt, system_prompt, priority, admitted)
+
+        def on_error(provider_name: str, error: Exception):
+            print(f"Provider {provider_name} failed: {error}")
+            fallback_hops.inc("provider", provider_name)
+
+        try:
+            return await cls.hedge_policy.race(providers_to_try, start, on_error)
+        except Exception as e:
+            raise Exception(f"All AI providers failed. Last error: {e}")
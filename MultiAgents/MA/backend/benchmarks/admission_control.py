@@ -0,0 +1,141 @@
+"""
+Admission control benchmark
+Sends a traffic spike (Poisson arrivals, half from identified users) at a simulated
+Gemini upstream that answers 429 once more calls are open than its quota allows. Each
+request walks the model fallback list like run_agent_workflow. Compares calling upstream
+straight away with going through the AdmissionController: upstream calls and 429s,
+requests served, shed and failed, latency of served requests per priority, queue wait
+and peak queue depth.
+
+Usage (from the backend directory):
+    python benchmarks/admission_control.py --requests 300 --rate 150 --upstream-capacity 8 --latency-ms 500
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from admission import AdmissionController, AdmissionRejected, priority_for  # noqa: E402
+
+MODELS = ["gemini-2.5-flash", "gemini-2.0-flash", "gemini-1.5-flash", "gemini-1.5-pro"]
+
+
+class Upstream:
+    """Provider with a concurrency quota; calls over it fail fast with 429"""
+
+    def __init__(self, capacity: int, latency_s: float, rtt_s: float, rng: random.Random):
+        self.capacity = capacity
+        self.latency_s = latency_s
+        self.rtt_s = rtt_s
+        self.rng = rng
+        self.active = 0
+        self.calls = 0
+        self.rejected = 0
+
+    async def call(self) -> int:
+        self.calls += 1
+        if self.active >= self.capacity:
+            self.rejected += 1
+            await asyncio.sleep(self.rtt_s)
+            return 429
+        self.active += 1
+        try:
+            await asyncio.sleep(self.latency_s * self.rng.lognormvariate(0, 0.3))
+        finally:
+            self.active -= 1
+        return 200
+
+
+async def generate(upstream: Upstream) -> bool:
+    """The model loop of run_agent_workflow: next model on every failure"""
+    for _ in MODELS:
+        if await upstream.call() == 200:
+            return True
+    return False
+
+
+async def run(mode: str, args) -> dict:
+    rng = random.Random(args.seed)
+    upstream = Upstream(args.upstream_capacity, args.latency_ms / 1000, args.rtt_ms / 1000, rng)
+    controller = AdmissionController(
+        limits={"gemini": args.upstream_capacity}, default_limit=args.upstream_capacity,
+        max_queue=args.max_queue, max_wait_seconds=args.max_wait_s, service_seconds=args.latency_ms / 1000
+    )
+    outcomes = {"served": 0, "shed": 0, "failed": 0}
+    latencies = {"authenticated": [], "anonymous": []}
+
+    async def one(i: int, delay: float):
+        await asyncio.sleep(delay)
+        user_id = f"user-{i}" if i % 2 == 0 else None
+        started = time.perf_counter()
+        try:
+            if mode == "admission":
+                async with controller.slot("gemini", priority_for(user_id)):
+                    ok = await generate(upstream)
+            else:
+                ok = await generate(upstream)
+        except AdmissionRejected:
+            outcomes["shed"] += 1
+            return
+        if not ok:
+            outcomes["failed"] += 1
+            return
+        outcomes["served"] += 1
+        latencies["authenticated" if user_id else "anonymous"].append((time.perf_counter() - started) * 1000)
+
+    arrivals, t = [], 0.0
+    for _ in range(args.requests):
+        t += rng.expovariate(args.rate)
+        arrivals.append(t)
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i, delay) for i, delay in enumerate(arrivals)))
+    elapsed = time.perf_counter() - started
+
+    def summary(values):
+        values = sorted(values)
+        if not values:
+            return None
+        return {"n": len(values), "p50_ms": round(statistics.median(values), 1),
+                "p95_ms": round(values[min(len(values) - 1, int(len(values) * 0.95))], 1)}
+
+    result = {
+        "mode": mode,
+        "upstream_calls": upstream.calls,
+        "upstream_429s": upstream.rejected,
+        **outcomes,
+        "elapsed_s": round(elapsed, 2),
+        "latency_authenticated": summary(latencies["authenticated"]),
+        "latency_anonymous": summary(latencies["anonymous"]),
+    }
+    if mode == "admission":
+        gate = controller.stats()["providers"]["gemini"]
+        result.update({key: gate[key] for key in ("wait_p50_ms", "wait_p95_ms", "peak_queue_depth")})
+        result["shed_by_reason"] = gate["shed"]
+    return result
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--rate", type=float, default=150.0, help="arrivals per second during the spike")
+    parser.add_argument("--upstream-capacity", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=500.0)
+    parser.add_argument("--rtt-ms", type=float, default=30.0, help="time for upstream to answer 429")
+    parser.add_argument("--max-queue", type=int, default=100)
+    parser.add_argument("--max-wait-s", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    results = [await run(mode, args) for mode in ("direct", "admission")]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
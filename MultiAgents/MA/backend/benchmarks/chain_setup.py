@@ -0,0 +1,78 @@
+"""
+Agent chain setup benchmark
+Measures the per-request CPU spent obtaining the LangChain runnable for an OpenAI
+request: rebuilding tool lists, prompt templates and the executor on every call (the
+previous behaviour) vs the per-(agent, provider) chain cache. No model is called;
+a placeholder OpenAI key is used so the chains can be constructed.
+
+Usage (from the backend directory):
+    python benchmarks/chain_setup.py --requests 2000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark-placeholder")
+
+import logging  # noqa: E402
+
+from langchain_agents import (  # noqa: E402
+    AGENT_TOOLS, SYSTEM_PROMPTS, agent_manager, chain_cache, create_agent_chain, create_chat_chain
+)
+
+AGENT_TYPES = list(SYSTEM_PROMPTS)
+
+
+def legacy_setup(agent_type: str, streaming: bool):
+    """Per-request work before the cache: prompt dict, all tool lists, a fresh chain or executor"""
+    prompt = dict(SYSTEM_PROMPTS).get(agent_type)
+    if streaming:
+        return prompt, create_chat_chain(agent_type, agent_manager.get_llm("openai"))
+    [factory() for factory in AGENT_TOOLS.values()]
+    return prompt, create_agent_chain(agent_type, "openai")
+
+
+def cached_setup(agent_type: str, streaming: bool):
+    return chain_cache.get(agent_type, "openai", kind="chat" if streaming else "agent")
+
+
+def measure(setup, requests: int) -> dict:
+    started_cpu, started = time.process_time(), time.perf_counter()
+    for i in range(requests):
+        setup(AGENT_TYPES[i % len(AGENT_TYPES)], i % 4 == 0)
+    cpu = time.process_time() - started_cpu
+    return {
+        "cpu_us_per_request": round(cpu / requests * 1e6, 1),
+        "wall_us_per_request": round((time.perf_counter() - started) / requests * 1e6, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    warm_started = time.perf_counter()
+    chain_cache.warm()
+    warm_ms = (time.perf_counter() - warm_started) * 1000
+
+    legacy = measure(legacy_setup, args.requests)
+    cached = measure(cached_setup, args.requests)
+    print(json.dumps({
+        "requests": args.requests,
+        "chain_type": type(cached_setup(AGENT_TYPES[0], False)).__name__,
+        "startup_warm_ms": round(warm_ms, 1),
+        "rebuild_per_request": legacy,
+        "cached": cached,
+        "cpu_reduction": f"{legacy['cpu_us_per_request'] / max(cached['cpu_us_per_request'], 0.01):.0f}x",
+        "cache": chain_cache.stats()
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Prompt context benchmark
+Builds Gemini prompts for long simulated sessions with the old fixed window (last 6
+messages) and the token-budgeted context builder, and reports prompt tokens and
+build latency. Sessions mix short questions, long answers and occasional pasted
+documents (CVs, abstracts), which is where a message-count window goes wrong.
+
+Usage (from the backend directory):
+    python benchmarks/context_budget.py --sessions 500 --messages 40
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from context_builder import ContextBuilder, estimate_tokens  # noqa: E402
+from langchain_agents import build_gemini_prompt, get_system_prompt  # noqa: E402
+
+
+def legacy_prompt(agent_type, query, conversation_history):
+    """build_gemini_prompt before the context builder: the last six messages, whatever their size"""
+    system_prompt = get_system_prompt(agent_type)
+    history_text = "\n\nPrevious conversation:\n"
+    for msg in conversation_history[-6:]:
+        history_text += f"{'User' if msg['role'] == 'user' else 'Assistant'}: {msg['content']}\n"
+    return f"{system_prompt}{history_text}\n\nCurrent question: {query}\n\nPlease provide a helpful response based on the conversation context."
+
+
+def make_session(rng: random.Random, messages: int):
+    history = []
+    for i in range(messages // 2):
+        if rng.random() < 0.1:
+            question = "Please review my CV: " + "Led a research project on graph neural networks. " * rng.randint(40, 120)
+        else:
+            question = f"Follow-up question {i} about scholarships and ML courses?"
+        history.append({"role": "user", "content": question})
+        history.append({"role": "assistant", "content": "Here are some options. " + "A detailed recommendation sentence. " * rng.randint(20, 80)})
+    return history
+
+
+def summarize(label, tokens, latencies_us):
+    tokens = sorted(tokens)
+    return {
+        "mode": label,
+        "prompt_tokens_p50": int(statistics.median(tokens)),
+        "prompt_tokens_p95": tokens[int(len(tokens) * 0.95) - 1],
+        "prompt_tokens_max": tokens[-1],
+        "build_latency_p50_us": round(statistics.median(latencies_us), 1),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--messages", type=int, default=40)
+    parser.add_argument("--budget", type=int, default=1500)
+    parser.add_argument("--summary-tokens", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    sessions = [make_session(rng, args.messages) for _ in range(args.sessions)]
+    builder = ContextBuilder(args.budget, args.summary_tokens, max_sessions=args.sessions)
+    query = "Given all that, what should I do first?"
+
+    legacy_tokens, legacy_lat = [], []
+    for history in sessions:
+        started = time.perf_counter()
+        prompt = legacy_prompt("career_guide", query, history)
+        legacy_lat.append((time.perf_counter() - started) * 1e6)
+        legacy_tokens.append(estimate_tokens(prompt))
+
+    # First pass schedules the background summaries; the measured pass uses them
+    for i, history in enumerate(sessions):
+        builder.build(f"s{i}", history)
+    await asyncio.sleep(0.1)
+
+    budget_tokens, budget_lat, summarized = [], [], 0
+    for i, history in enumerate(sessions):
+        started = time.perf_counter()
+        context = builder.build(f"s{i}", history)
+        prompt = build_gemini_prompt("career_guide", query, context)
+        budget_lat.append((time.perf_counter() - started) * 1e6)
+        budget_tokens.append(estimate_tokens(prompt))
+        summarized += context.summary is not None
+
+    results = [summarize("last_6_messages", legacy_tokens, legacy_lat), summarize("token_budget", budget_tokens, budget_lat)]
+    results[1]["sessions_with_summary"] = summarized
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,109 @@
+"""
+Conversation manager soak test
+Drives a large number of simulated sessions through ConversationManager (create,
+add_message, get_history_for_llm, with some users returning to older sessions)
+and reports peak RSS, per-operation latency and how the limits held.
+
+Usage (from the backend directory):
+    python benchmarks/conversation_soak.py --sessions 1000000 --max-mb 64
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conversation_manager import ConversationManager  # noqa: E402
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def percentiles(samples_ns) -> dict:
+    samples = sorted(samples_ns)
+    if not samples:
+        return {}
+
+    def at(q):
+        return round(samples[min(len(samples) - 1, int(len(samples) * q))] / 1000, 2)
+
+    return {"p50_us": at(0.50), "p99_us": at(0.99), "p999_us": at(0.999), "max_us": round(samples[-1] / 1000, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=1_000_000)
+    parser.add_argument("--turns", type=int, default=2, help="User/assistant exchanges per session visit")
+    parser.add_argument("--revisit", type=float, default=0.3, help="Probability a visit resumes an earlier session")
+    parser.add_argument("--max-sessions", type=int, default=10_000)
+    parser.add_argument("--max-messages", type=int, default=100)
+    parser.add_argument("--max-mb", type=int, default=64, help="Global byte budget in MiB")
+    parser.add_argument("--sample-every", type=int, default=10, help="Time one operation in every N")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    manager = ConversationManager(
+        max_sessions=args.max_sessions,
+        max_messages_per_session=args.max_messages,
+        idle_ttl_seconds=3600,
+        max_bytes=args.max_mb * 1024 * 1024
+    )
+    timings = {"create_session": [], "add_message": [], "get_history_for_llm": []}
+    recent: list = []
+    reply = "Here is a structured plan with resources and next steps. " * 20
+    peak_bytes = 0
+    op = 0
+    started = time.perf_counter()
+
+    def timed(name, fn, *fn_args, **fn_kwargs):
+        nonlocal op
+        op += 1
+        if op % args.sample_every:
+            return fn(*fn_args, **fn_kwargs)
+        t0 = time.perf_counter_ns()
+        value = fn(*fn_args, **fn_kwargs)
+        timings[name].append(time.perf_counter_ns() - t0)
+        return value
+
+    for _ in range(args.sessions):
+        if recent and rng.random() < args.revisit:
+            # May have been evicted already; add_message then recreates it
+            session_id = rng.choice(recent)
+        else:
+            session_id = timed("create_session", manager.create_session, "user", "skill_coach")
+            recent.append(session_id)
+            if len(recent) > 2 * args.max_sessions:
+                del recent[:args.max_sessions]
+        for turn in range(args.turns):
+            timed("get_history_for_llm", manager.get_history_for_llm, session_id, 10)
+            timed("add_message", manager.add_message, session_id, "user", f"question {turn} about machine learning")
+            timed("add_message", manager.add_message, session_id, "assistant", reply, {"agent_type": "skill_coach"})
+        peak_bytes = max(peak_bytes, manager.bytes_used)
+
+    elapsed = time.perf_counter() - started
+    print(json.dumps({
+        "sessions_driven": args.sessions,
+        "operations": op,
+        "elapsed_s": round(elapsed, 1),
+        "ops_per_s": round(op / elapsed),
+        "peak_rss_mb": peak_rss_mb(),
+        "budget_mb": args.max_mb,
+        "peak_tracked_mb": round(peak_bytes / (1024 * 1024), 1),
+        "live_sessions": len(manager.conversations),
+        "evictions": manager.evictions,
+        "expirations": manager.expirations,
+        "latency": {name: percentiles(samples) for name, samples in timings.items()}
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
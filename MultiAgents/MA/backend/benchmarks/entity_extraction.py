@@ -0,0 +1,150 @@
+"""
+Entity extraction benchmark
+Runs response post-processing (resources, opportunities, events) over archived agent
+responses with the previous per-keyword lower()/substring checks and with the
+single-pass extractor. Reports time per response, entities found, duplicates removed,
+links found (URLs, deadlines) and where the two disagree (substring false positives
+such as "Gates" in "delegates").
+
+Archived responses are read from a JSONL export of mentorship_sessions (one object
+with "agent_type" and "response" per line); without --input a synthetic archive is
+generated.
+
+Usage (from the backend directory):
+    python benchmarks/entity_extraction.py --responses 10000
+    python benchmarks/entity_extraction.py --input sessions.jsonl
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from entity_extractor import VOCABULARY, EntityExtractor  # noqa: E402
+
+AGENT_KINDS = {"skill_coach": "resource", "career_guide": "opportunity", "networking_agent": "event"}
+
+
+def legacy_extract(agent_type: str, response: str):
+    """extract_resources / extract_opportunities / extract_events before the single-pass extractor"""
+    found = []
+    if agent_type == "skill_coach":
+        for platform in ["Coursera", "Udemy", "edX", "YouTube", "Khan Academy", "Pluralsight",
+                         "LinkedIn Learning", "Skillshare", "FreeCodeCamp", "Codecademy",
+                         "MIT OpenCourseWare", "Stanford Online", "FutureLearn"]:
+            if platform.lower() in response.lower():
+                found.append({"type": "course", "provider": platform, "mentioned": True})
+    elif agent_type == "career_guide":
+        keywords = {
+            "scholarship": ["Fulbright", "Chevening", "DAAD", "Commonwealth", "Erasmus", "Rhodes", "Gates", "Schwarzman"],
+            "fellowship": ["Rhodes", "Gates", "Schwarzman", "Fulbright", "Humboldt"],
+            "grant": ["NSF", "NIH", "research grant", "Marie Curie"]
+        }
+        for opp_type, programs in keywords.items():
+            for program in programs:
+                if program.lower() in response.lower():
+                    found.append({"type": opp_type, "program": program, "mentioned": True})
+    elif agent_type == "networking_agent":
+        for event_type in ["conference", "workshop", "seminar", "webinar", "symposium", "summit"]:
+            if event_type in response.lower():
+                found.append({"type": event_type, "mentioned": True})
+    return found
+
+
+FILLER = [
+    "Start by reviewing the fundamentals and set aside time every week.",
+    "Many delegates from industry attend, which makes it a good place to meet mentors.",
+    "Strong applications show leadership, a clear research plan and community impact.",
+    "Reach out to alumni on LinkedIn and ask about their experience.",
+    "Build a small portfolio project so you can apply what you learn.",
+    "Funding covers tuition, a living stipend and travel in most cases.",
+    "Keep your statement focused on one or two concrete achievements.",
+]
+
+
+def synthetic_response(rng: random.Random, agent_type: str) -> str:
+    kind = AGENT_KINDS.get(agent_type, "resource")
+    names = list(VOCABULARY[kind])
+    paragraphs = []
+    for name in rng.sample(names, min(len(names), rng.randint(3, 6))):
+        lines = [f"**{name if kind != 'event' else name.title() + 's'}**: {rng.choice(FILLER)}"]
+        if rng.random() < 0.5:
+            lines.append(f"More details: https://www.{name.lower().replace(' ', '')}.org/apply")
+        if rng.random() < 0.4:
+            lines.append(f"Deadline: {rng.choice(['October', 'March', 'Jan.'])} {rng.randint(1, 28)}, {rng.randint(2025, 2027)}.")
+        lines.extend(rng.choice(FILLER) for _ in range(rng.randint(2, 6)))
+        paragraphs.append(" ".join(lines))
+    return "\n\n".join(paragraphs)
+
+
+def load_archive(args):
+    if args.input:
+        with open(args.input) as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+        return [(row.get("agent_type", "career_guide"), row["response"]) for row in rows][:args.responses]
+    rng = random.Random(11)
+    agent_types = list(AGENT_KINDS)
+    return [(agent_type, synthetic_response(rng, agent_type))
+            for agent_type in (rng.choice(agent_types) for _ in range(args.responses))]
+
+
+def key_of(entity):
+    return (entity.get("provider") or entity.get("program") or entity["type"]).lower()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--responses", type=int, default=10000)
+    parser.add_argument("--input", help="JSONL export with agent_type and response fields")
+    args = parser.parse_args()
+
+    archive = load_archive(args)
+    extractor = EntityExtractor()
+
+    started = time.perf_counter()
+    legacy = [legacy_extract(agent_type, text) for agent_type, text in archive]
+    legacy_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    extracted = [extractor.extract(text) for _, text in archive]
+    single_pass_s = time.perf_counter() - started
+
+    legacy_entities = duplicates = 0
+    only_legacy, only_new = Counter(), Counter()
+    new_entities = deadlines = linked_urls = 0
+    for (agent_type, _), old, new in zip(archive, legacy, extracted):
+        entities = new.get(AGENT_KINDS.get(agent_type), [])
+        legacy_entities += len(old)
+        new_entities += len(entities)
+        deadlines += sum(1 for e in entities if e["deadline"])
+        linked_urls += sum(1 for e in entities if e["url"])
+        old_keys = Counter(key_of(e) for e in old)
+        duplicates += sum(count - 1 for count in old_keys.values())
+        new_keys = {e["name"].lower() for e in entities}
+        only_legacy.update(set(old_keys) - new_keys)
+        only_new.update(new_keys - set(old_keys))
+
+    n = len(archive)
+    print(json.dumps({
+        "responses": n,
+        "avg_chars": round(sum(len(text) for _, text in archive) / n),
+        "legacy_us_per_response": round(legacy_s / n * 1e6, 1),
+        "single_pass_us_per_response": round(single_pass_s / n * 1e6, 1),
+        "single_pass_cost_vs_legacy": f"{single_pass_s / legacy_s:.1f}x",
+        "legacy_entities": legacy_entities,
+        "legacy_duplicates": duplicates,
+        "single_pass_entities": new_entities,
+        "with_deadline": deadlines,
+        "with_url": linked_urls,
+        "found_only_by_legacy": dict(only_legacy.most_common(5)),
+        "found_only_by_single_pass": dict(only_new.most_common(5))
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Conversation history backend benchmark
+Simulates several uvicorn workers (separate processes, each with its own
+ConversationManager) where every turn of a conversation lands on a random worker.
+Reports turns/s and how many turns saw incomplete history, for the in-memory store,
+SQLite (WAL) and the Redis backend against a local RESP stand-in server.
+
+Usage (from the backend directory):
+    python benchmarks/history_backends.py --workers 4 8 --sessions 2000 --turns 5
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conversation_manager import ConversationManager  # noqa: E402
+from history_store import RedisHistoryBackend, SQLiteHistoryBackend  # noqa: E402
+
+
+class RespStandIn:
+    """In-memory server speaking enough of the Redis protocol for RedisHistoryBackend"""
+
+    def __init__(self):
+        self.hashes = {}
+        self.lists = {}
+
+    def _execute(self, cmd, args):
+        if cmd in ("PING",):
+            return "PONG"
+        if cmd in ("CLIENT", "SELECT", "EXPIRE"):
+            return 1 if cmd == "EXPIRE" else "OK"
+        if cmd == "HSETNX":
+            h = self.hashes.setdefault(args[0], {})
+            if args[1] in h:
+                return 0
+            h[args[1]] = args[2]
+            return 1
+        if cmd == "HINCRBY":
+            h = self.hashes.setdefault(args[0], {})
+            h[args[1]] = str(int(h.get(args[1], 0)) + int(args[2]))
+            return int(h[args[1]])
+        if cmd == "HGET":
+            return self.hashes.get(args[0], {}).get(args[1])
+        if cmd == "HGETALL":
+            return [x for kv in self.hashes.get(args[0], {}).items() for x in kv]
+        if cmd == "RPUSH":
+            items = self.lists.setdefault(args[0], [])
+            items.extend(args[1:])
+            return len(items)
+        if cmd in ("LTRIM", "LRANGE"):
+            items = self.lists.get(args[0], [])
+            start, stop = int(args[1]), int(args[2])
+            start = max(0, len(items) + start if start < 0 else start)
+            stop = len(items) + stop if stop < 0 else stop
+            selected = items[start:stop + 1]
+            if cmd == "LRANGE":
+                return selected
+            self.lists[args[0]] = selected
+            return "OK"
+        if cmd == "DEL":
+            return sum(1 for key in args if self.lists.pop(key, None) is not None or self.hashes.pop(key, None) is not None)
+        return Exception(f"ERR unknown command '{cmd}'")
+
+    @staticmethod
+    def _encode(value) -> bytes:
+        if value is None:
+            return b"$-1\r\n"
+        if isinstance(value, Exception):
+            return f"-{value}\r\n".encode()
+        if isinstance(value, int):
+            return f":{value}\r\n".encode()
+        if isinstance(value, list):
+            return f"*{len(value)}\r\n".encode() + b"".join(RespStandIn._encode(v) for v in value)
+        if value in ("OK", "PONG", "QUEUED"):
+            return f"+{value}\r\n".encode()
+        data = value.encode()
+        return b"$%d\r\n%s\r\n" % (len(data), data)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        queued = None
+        try:
+            while True:
+                header = await reader.readline()
+                if not header:
+                    break
+                parts = []
+                for _ in range(int(header[1:])):
+                    length = int((await reader.readline())[1:])
+                    parts.append((await reader.readexactly(length + 2))[:-2].decode())
+                cmd, args = parts[0].upper(), parts[1:]
+                if cmd == "MULTI":
+                    queued, reply = [], "OK"
+                elif cmd == "EXEC":
+                    reply, queued = [self._execute(c, a) for c, a in queued], None
+                elif queued is not None:
+                    queued.append((cmd, args))
+                    reply = "QUEUED"
+                else:
+                    reply = self._execute(cmd, args)
+                writer.write(self._encode(reply))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+
+def start_resp_stand_in() -> int:
+    ready = threading.Event()
+    port = {}
+
+    def run():
+        loop = asyncio.new_event_loop()
+        server = loop.run_until_complete(asyncio.start_server(RespStandIn().handle, "127.0.0.1", 0))
+        port["value"] = server.sockets[0].getsockname()[1]
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    ready.wait()
+    return port["value"]
+
+
+_manager = None
+
+
+def init_worker(kind: str, target: str):
+    global _manager
+    if kind == "sqlite":
+        backend = SQLiteHistoryBackend(target, idle_ttl_seconds=3600)
+    elif kind == "redis":
+        backend = RedisHistoryBackend(target, idle_ttl_seconds=3600)
+    else:
+        backend = None
+    _manager = ConversationManager(idle_ttl_seconds=3600, backend=backend)
+
+
+def run_turns(batch):
+    """One turn per (session_id, turn): read history, then append the user and assistant messages"""
+    incomplete = 0
+    for session_id, turn in batch:
+        if turn == 0:
+            _manager.create_session("user", "skill_coach", session_id=session_id)
+        history = _manager.get_history_for_llm(session_id, limit=50)
+        if len(history) != 2 * turn:
+            incomplete += 1
+        _manager.add_message(session_id, "user", f"question {turn}")
+        _manager.add_message(session_id, "assistant", f"answer {turn} " * 40, {"agent_type": "skill_coach"})
+    return incomplete
+
+
+def run(kind: str, target: str, workers: int, sessions: int, turns: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    session_ids = [f"{kind}-{workers}-{i}" for i in range(sessions)]
+    incomplete = 0
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(workers, initializer=init_worker, initargs=(kind, target)) as pool:
+        pool.map(run_turns, [[] for _ in range(workers)])  # warm up worker processes
+        started = time.perf_counter()
+        for turn in range(turns):
+            # Each turn of each conversation lands on a random worker, like a load balancer
+            batches = [[] for _ in range(workers)]
+            for session_id in session_ids:
+                batches[rng.randrange(workers)].append((session_id, turn))
+            incomplete += sum(pool.map(run_turns, batches))
+        elapsed = time.perf_counter() - started
+    total = sessions * turns
+    return {
+        "backend": kind,
+        "workers": workers,
+        "turns_per_s": round(total / elapsed),
+        "turns_with_incomplete_history": f"{incomplete / total * 100:.1f}%"
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[4, 8])
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    redis_url = f"redis://127.0.0.1:{start_resp_stand_in()}/0"
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in args.workers:
+            for kind, target in (
+                ("memory", ""),
+                ("sqlite", os.path.join(tmp, f"history-{workers}.db")),
+                ("redis", redis_url),
+            ):
+                if kind == "sqlite":
+                    SQLiteHistoryBackend(target, idle_ttl_seconds=3600).close()  # create schema once
+                results.append(run(kind, target, workers, args.sessions, args.turns, args.seed))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+HTTP connection pooling benchmark
+Compares a fresh httpx.AsyncClient per request (the old Gemini REST path) with the
+shared pooled client, against a local stand-in endpoint that charges a fixed cost
+for every new connection to simulate the TCP + TLS handshake.
+
+Usage (from the backend directory):
+    python benchmarks/http_pooling.py --requests 200 --concurrency 10 --handshake-ms 60
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+
+from http_client import close_http_client, get_http_client  # noqa: E402
+
+RESPONSE_BODY = json.dumps({
+    "candidates": [{"content": {"parts": [{"text": "stand-in answer"}]}}]
+}).encode()
+
+
+async def start_stand_in(handshake_s: float, service_s: float):
+    """Minimal keep-alive HTTP/1.1 server shaped like the Gemini generateContent endpoint."""
+    stats = {"connections": 0}
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        stats["connections"] += 1
+        await asyncio.sleep(handshake_s)
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":", 1)[1])
+                if length:
+                    await reader.readexactly(length)
+                await asyncio.sleep(service_s)
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(RESPONSE_BODY)}\r\n\r\n".encode()
+                    + RESPONSE_BODY
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, stats
+
+
+async def run(label: str, url: str, requests: int, concurrency: int, shared: bool) -> dict:
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+    payload = {"contents": [{"parts": [{"text": "hello"}]}]}
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            if shared:
+                response = await get_http_client().post(url, json=payload)
+            else:
+                async with httpx.AsyncClient(timeout=30.0) as client:
+                    response = await client.post(url, json=payload)
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "mode": label,
+        "requests_per_s": round(requests / elapsed, 1),
+        "latency_p50_ms": round(statistics.median(latencies), 2),
+        "latency_p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 2),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--handshake-ms", type=float, default=60.0, help="Simulated cost of each new connection")
+    parser.add_argument("--service-ms", type=float, default=5.0, help="Simulated server time per request")
+    args = parser.parse_args()
+
+    server, stats = await start_stand_in(args.handshake_ms / 1000, args.service_ms / 1000)
+    port = server.sockets[0].getsockname()[1]
+    url = f"http://127.0.0.1:{port}/v1/models/stand-in:generateContent"
+
+    results = []
+    for label, shared in (("client_per_request", False), ("shared_pool", True)):
+        stats["connections"] = 0
+        result = await run(label, url, args.requests, args.concurrency, shared)
+        result["connections_opened"] = stats["connections"]
+        results.append(result)
+
+    await close_http_client()
+    server.close()
+    await server.wait_closed()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
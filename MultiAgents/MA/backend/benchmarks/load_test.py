@@ -0,0 +1,231 @@
+"""
+Load generator for the mentorship API
+Sends POST /mentorship requests at a target rate (open loop: arrivals do not wait for
+earlier responses). The questions are the query router's example questions for each
+agent, with a mix of identified and anonymous users. Reports p50/p95/p99 latency,
+throughput, and error rates by class as JSON. Save a run with --output and diff a later
+one against it with --compare. Against /mentorship/stream it also reports time to first
+token; that needs --url, because the in-process transport delivers the whole stream at once.
+
+By default the app runs in-process with the fake provider (FAKE_PROVIDER_ENABLED), so no
+quota is spent. Rate limiting and the semantic cache are off unless --rate-limit or
+--semantic-cache is given. With --url it drives a running server instead; start that
+server with FAKE_PROVIDER_ENABLED=true to keep it off real providers.
+
+Usage (from the backend directory):
+    python benchmarks/load_test.py --rate 5 --duration 30 --output baseline.json
+    python benchmarks/load_test.py --rate 5 --duration 30 --compare baseline.json
+    python benchmarks/load_test.py --path /mentorship/stream --rate 5 --duration 30
+    python benchmarks/load_test.py --url http://localhost:8000 --rate 5 --duration 60
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Compared by --compare; lower is better except for throughput
+COMPARED = ("p50_ms", "p95_ms", "p99_ms", "ttft_p50_ms", "ttft_p95_ms", "ttft_p99_ms", "throughput_rps", "error_rate")
+
+
+def percentile(values, p: float) -> float:
+    """Nearest-rank percentile of sorted values"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, int(round(p / 100 * len(values))) - 1))]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or "unknown"
+    except Exception:
+        return "unknown"
+
+
+def configure_in_process(args):
+    """Environment for the in-process app; must run before config is imported"""
+    os.environ["FAKE_PROVIDER_ENABLED"] = "true"
+    os.environ["FAKE_LATENCY"] = args.latency
+    os.environ["FAKE_TOKENS_PER_SECOND"] = str(args.tokens_per_second)
+    os.environ["FAKE_COMPLETION_TOKENS"] = args.completion_tokens
+    os.environ["FAKE_ERROR_RATE"] = str(args.error_rate)
+    os.environ["FAKE_RATE_LIMIT_RATE"] = str(args.rate_limit_rate)
+    os.environ["FAKE_TIMEOUT_RATE"] = str(args.timeout_rate)
+    os.environ["FAKE_SEED"] = str(args.seed)
+    os.environ["RATE_LIMIT_ENABLED"] = "true" if args.rate_limit else "false"
+    os.environ["SEMANTIC_CACHE_ENABLED"] = "true" if args.semantic_cache else "false"
+    os.environ.setdefault("ROUTER_TRAIN_FROM_DB", "false")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+def workload(args, rng: random.Random):
+    from query_router import SEED_QUERIES
+
+    pairs = [(agent_type, query) for agent_type, queries in SEED_QUERIES.items() for query in queries]
+    users = [f"00000000-0000-4000-8000-{i:012d}" for i in range(args.users)]
+    while True:
+        agent_type, query = rng.choice(pairs)
+        yield {
+            "agent_type": "auto" if args.auto else agent_type,
+            "query": query,
+            "user_id": None if rng.random() < args.anonymous_ratio else rng.choice(users)
+        }
+
+
+async def drive(client: httpx.AsyncClient, args) -> dict:
+    rng = random.Random(args.seed)
+    bodies = workload(args, rng)
+    latencies, first_tokens, errors, statuses = [], [], Counter(), Counter()
+    streaming = args.path.endswith("/stream")
+    in_flight = set()
+    sent = 0
+
+    async def one(body):
+        started = time.perf_counter()
+        try:
+            if streaming:
+                async with client.stream("POST", args.path, json=body, timeout=args.timeout) as response:
+                    status, last_event = response.status_code, None
+                    async for line in response.aiter_lines():
+                        if line.startswith("event: "):
+                            if line == "event: token" and last_event != "token":
+                                first_tokens.append((time.perf_counter() - started) * 1000)
+                            last_event = line[7:]
+                    succeeded = last_event == "done"
+            else:
+                response = await client.post(args.path, json=body, timeout=args.timeout)
+                status = response.status_code
+                succeeded = status == 200 and response.json().get("success")
+        except Exception as e:
+            errors[type(e).__name__] += 1
+            return
+        elapsed = (time.perf_counter() - started) * 1000
+        statuses[str(status)] += 1
+        if status != 200:
+            errors[f"http_{status}"] += 1
+        elif not succeeded:
+            errors["unsuccessful"] += 1
+        else:
+            latencies.append(elapsed)
+
+    started = time.perf_counter()
+    next_at = 0.0
+    while next_at < args.duration:
+        delay = started + next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        sent += 1
+        if len(in_flight) >= args.max_in_flight:
+            errors["client_overloaded"] += 1
+        else:
+            task = asyncio.create_task(one(next(bodies)))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        next_at += rng.expovariate(args.rate) if args.arrivals == "poisson" else 1.0 / args.rate
+    if in_flight:
+        await asyncio.wait(in_flight)
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    first_tokens.sort()
+    failed = sum(errors.values())
+    result = {
+        "requests": sent,
+        "succeeded": len(latencies),
+        "elapsed_s": round(elapsed, 2),
+        "offered_rps": round(sent / args.duration, 2),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "max_ms": round(latencies[-1], 1) if latencies else 0.0,
+        "error_rate": round(failed / sent, 4) if sent else 0.0,
+        "errors": dict(errors),
+        "status_codes": dict(statuses),
+    }
+    if streaming:
+        result.update({f"ttft_p{p}_ms": round(percentile(first_tokens, p), 1) for p in (50, 95, 99)})
+    return result
+
+
+async def run(args) -> dict:
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, limits=httpx.Limits(max_connections=args.max_in_flight)) as client:
+            return await drive(client, args)
+
+    configure_in_process(args)
+    import main
+
+    await main.startup_event()
+    try:
+        transport = httpx.ASGITransport(app=main.app, client=("10.0.0.1", 50000))
+        async with httpx.AsyncClient(transport=transport, base_url="http://load-test") as client:
+            result = await drive(client, args)
+    finally:
+        await main.shutdown_event()
+    from fake_provider import get_fake_backend
+    result["fake_provider_outcomes"] = dict(get_fake_backend().outcomes)
+    return result
+
+
+def compare(result: dict, baseline: dict) -> dict:
+    delta = {}
+    for key in COMPARED:
+        old, new = baseline["result"].get(key), result.get(key)
+        if old is None or new is None:
+            continue
+        delta[key] = {"baseline": old, "current": new, "change": round(new - old, 4),
+                      "change_pct": round((new - old) / old * 100, 1) if old else None}
+    return {"baseline_commit": baseline.get("commit"), "metrics": delta}
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="running server; default runs the app in-process with the fake provider")
+    parser.add_argument("--path", default="/mentorship")
+    parser.add_argument("--rate", type=float, default=5.0, help="target requests per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of arrivals")
+    parser.add_argument("--arrivals", choices=("poisson", "constant"), default="poisson")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--anonymous-ratio", type=float, default=0.3)
+    parser.add_argument("--auto", action="store_true", help="send agent_type=auto instead of the question's agent")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--max-in-flight", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default=None, help="write the report here")
+    parser.add_argument("--compare", default=None, help="earlier report to diff against")
+    fake = parser.add_argument_group("fake provider (in-process only)")
+    fake.add_argument("--latency", default="lognormal:800:0.4", help="time to first token distribution")
+    fake.add_argument("--tokens-per-second", type=float, default=80.0)
+    fake.add_argument("--completion-tokens", default="150:600")
+    fake.add_argument("--error-rate", type=float, default=0.0)
+    fake.add_argument("--rate-limit-rate", type=float, default=0.0)
+    fake.add_argument("--timeout-rate", type=float, default=0.0)
+    fake.add_argument("--rate-limit", action="store_true", help="keep the API rate limiter on")
+    fake.add_argument("--semantic-cache", action="store_true", help="keep the semantic cache on")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    report = {"commit": git_commit(), "target": args.url or "in-process", "config": vars(args), "result": result}
+    if args.compare:
+        with open(args.compare) as f:
+            report["comparison"] = compare(result, json.load(f))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
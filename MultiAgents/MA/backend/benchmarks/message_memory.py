@@ -0,0 +1,68 @@
+"""
+Conversation message memory benchmark
+Uses tracemalloc to measure bytes per stored message for the previous dict layout
+(role, content, ISO timestamp string, metadata dict) and the compact Message records.
+Message texts are allocated before tracing starts, so the figures are per-message overhead.
+
+Usage (from the backend directory):
+    python benchmarks/message_memory.py --messages 100000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conversation_manager import Message  # noqa: E402
+
+
+def dict_layout(role: str, content: str, metadata):
+    return {
+        "role": role,
+        "content": content,
+        "timestamp": datetime.utcnow().isoformat(),
+        "metadata": metadata or {}
+    }
+
+
+def compact_layout(role: str, content: str, metadata):
+    return Message(role, content, metadata)
+
+
+def measure(build, contents) -> float:
+    # Roles are literals at the call sites; metadata arrives as a fresh dict per call
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    stored = []
+    for i, content in enumerate(contents):
+        if i % 2:
+            stored.append(build("assistant", content, {"agent_type": "skill_coach", "ai_provider": "gemini"}))
+        else:
+            stored.append(build("user", content, None))
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (after - before) / len(contents)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=100_000)
+    args = parser.parse_args()
+
+    contents = [f"message {i} about learning paths and scholarships" for i in range(args.messages)]
+    legacy = measure(dict_layout, contents)
+    compact = measure(compact_layout, contents)
+    print(json.dumps({
+        "messages": args.messages,
+        "dict_bytes_per_message": round(legacy, 1),
+        "compact_bytes_per_message": round(compact, 1),
+        "reduction": f"{(1 - compact / legacy) * 100:.0f}%"
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Multi-agent panel benchmark
+Compares asking Skill Coach, Career Guide and Networking Guide one after another (what
+clients did with /mentorship/{agent_type}) with the concurrent /mentorship/panel path.
+The model call is replaced by a sleep drawn from a latency distribution, so the numbers
+show orchestration only. A second run makes one agent slower than the deadline and
+checks that the others' answers still come back on time.
+
+Usage (from the backend directory):
+    python benchmarks/panel_latency.py --requests 20 --latency-ms 1500
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import agents  # noqa: E402
+from agents import AgentFactory, run_panel  # noqa: E402
+from langchain_agents import build_workflow_result  # noqa: E402
+
+PANEL = ["skill_coach", "career_guide", "networking_agent"]
+ANSWERS = {
+    "skill_coach": "Start with Andrew Ng's course on Coursera (https://www.coursera.org/learn/machine-learning), "
+                   "then fast.ai. Many Fulbright alumni took the same route.",
+    "career_guide": "Apply for the Fulbright scholarship (deadline: October 1, 2026) and DAAD. "
+                    "Build skills first, for example on Coursera.",
+    "networking_agent": "Attend the NeurIPS conference and ML workshops; poster sessions are the best place "
+                        "to meet Fulbright and DAAD scholars.",
+}
+
+
+def fake_workflow(latency_ms: float, slow_agent: str = None, slow_ms: float = 0):
+    rng = random.Random(5)
+
+    async def run_agent_workflow(agent_type, query, user_id=None, preferred_provider=None,
+                                 session_id=None, conversation_history=None):
+        delay = slow_ms if agent_type == slow_agent else rng.lognormvariate(0, 0.25) * latency_ms
+        await asyncio.sleep(delay / 1000)
+        return build_workflow_result(agent_type, query, ANSWERS[agent_type], "fake")
+    return run_agent_workflow
+
+
+async def sequential(query: str):
+    results = []
+    for agent_type in PANEL:
+        results.append(await AgentFactory.get_agent(agent_type).generate_response(query=query))
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=1500)
+    parser.add_argument("--deadline-s", type=float, default=4.0)
+    args = parser.parse_args()
+    agents.settings.SEMANTIC_CACHE_ENABLED = False
+
+    agents.run_agent_workflow = fake_workflow(args.latency_ms)
+    timings = {"sequential": [], "panel": []}
+    for i in range(args.requests):
+        query = f"I want a PhD in ML abroad ({i})"
+        started = time.perf_counter()
+        await sequential(query)
+        timings["sequential"].append((time.perf_counter() - started) * 1000)
+        started = time.perf_counter()
+        panel = await run_panel(query, PANEL, timeout=args.deadline_s)
+        timings["panel"].append((time.perf_counter() - started) * 1000)
+
+    # One agent far slower than the deadline
+    agents.run_agent_workflow = fake_workflow(args.latency_ms, slow_agent="career_guide", slow_ms=args.deadline_s * 3000)
+    started = time.perf_counter()
+    partial = await run_panel("I want a PhD in ML abroad (slow)", PANEL, timeout=args.deadline_s)
+    partial_ms = (time.perf_counter() - started) * 1000
+
+    print(json.dumps({
+        "agents": PANEL,
+        "model_latency_ms": args.latency_ms,
+        "sequential_p50_ms": round(statistics.median(timings["sequential"]), 1),
+        "panel_p50_ms": round(statistics.median(timings["panel"]), 1),
+        "panel_max_ms": round(max(timings["panel"]), 1),
+        "merged_entities": {kind: [e.get("provider") or e.get("program") or e["type"] for e in panel[kind]]
+                            for kind in ("resources", "opportunities", "events")},
+        "fulbright_mentioned_by": next(e["agents"] for e in panel["opportunities"] if e["program"] == "Fulbright"),
+        "slow_agent_run": {
+            "deadline_s": args.deadline_s,
+            "returned_after_ms": round(partial_ms, 1),
+            "timed_out": partial["timed_out"],
+            "answered": [s["agent_type"] for s in partial["sections"] if s["success"]]
+        }
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,95 @@
+"""
+Provider concurrency benchmark
+Measures event-loop lag and throughput of GeminiProvider under concurrent callers,
+comparing the old in-loop SDK call with the executor-offloaded one.
+
+Usage (from the backend directory):
+    python benchmarks/provider_concurrency.py --callers 50 --requests 4 --latency 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_provider import GeminiProvider  # noqa: E402
+
+
+class FakeSlowModel:
+    """Stands in for genai.GenerativeModel: a blocking call that takes `latency` seconds."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def generate_content(self, prompt: str):
+        time.sleep(self.latency)
+        return type("FakeResponse", (), {"text": f"echo: {prompt[:20]}"})()
+
+
+class InLoopGeminiProvider(GeminiProvider):
+    """The previous behaviour: the synchronous SDK call runs on the event loop."""
+
+    async def generate_response(self, prompt, system_prompt=None):
+        return self.model.generate_content(prompt).text
+
+
+def make_provider(cls, latency: float) -> GeminiProvider:
+    provider = cls.__new__(cls)
+    provider.model_name = "fake"
+    provider.model = FakeSlowModel(latency)
+    return provider
+
+
+async def measure(provider: GeminiProvider, callers: int, requests_per_caller: int) -> dict:
+    lags = []
+    stop = asyncio.Event()
+
+    async def ticker(interval: float = 0.01):
+        # Lag = how late the loop wakes us up beyond the requested interval
+        while not stop.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            lags.append(time.perf_counter() - started - interval)
+
+    async def caller(i: int):
+        for j in range(requests_per_caller):
+            await provider.generate_response(f"question {i}-{j}")
+
+    tick_task = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    await asyncio.gather(*(caller(i) for i in range(callers)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await tick_task
+
+    lags_ms = sorted(lag * 1000 for lag in lags) or [0.0]
+    return {
+        "requests": callers * requests_per_caller,
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_s": round(callers * requests_per_caller / elapsed, 1),
+        "loop_lag_p50_ms": round(statistics.median(lags_ms), 2),
+        "loop_lag_p99_ms": round(lags_ms[int(len(lags_ms) * 0.99) - 1 if len(lags_ms) > 1 else 0], 2),
+        "loop_lag_max_ms": round(lags_ms[-1], 2),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--callers", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=4, help="Requests per caller")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake provider latency in seconds")
+    args = parser.parse_args()
+
+    results = {}
+    for label, cls in (("in_loop", InLoopGeminiProvider), ("offloaded", GeminiProvider)):
+        results[label] = await measure(make_provider(cls, args.latency), args.callers, args.requests)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,123 @@
+"""
+Rate limit middleware overhead benchmark
+Calls a minimal ASGI app directly (no server or socket) with and without
+RateLimitMiddleware in front of it, for POST /mentorship requests whose JSON body names
+the user, spread over many users and client IPs. Reports the added time per request,
+then checks enforcement: a burst past the limit is rejected with 429 and Retry-After.
+Pass --redis-url to measure the shared Redis bucket store as well.
+
+Usage (from the backend directory):
+    python benchmarks/rate_limit_overhead.py --requests 50000 --users 5000 --ips 1000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rate_limiter import MemoryBucketStore, RateLimiter, RateLimitMiddleware, RedisBucketStore  # noqa: E402
+
+
+async def endpoint(scope, receive, send):
+    """Reads the whole body like FastAPI would, then answers 200"""
+    more = True
+    while more:
+        message = await receive()
+        more = message.get("more_body", False)
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+def make_request(i: int, users: int, ips: int):
+    body = json.dumps({
+        "query": "What are the best machine learning courses for beginners?",
+        "user_id": f"00000000-0000-0000-0000-{i % users:012d}",
+        "session_id": None
+    }).encode()
+    scope = {
+        "type": "http", "method": "POST", "path": "/mentorship/skill_coach",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "client": (f"10.0.{(i % ips) // 256}.{(i % ips) % 256}", 50000)
+    }
+    return scope, body
+
+
+async def run(app, requests: int, users: int, ips: int, rounds: int) -> dict:
+    prepared = [make_request(i, users, ips) for i in range(requests)]
+    statuses = {}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses[message["status"]] = statuses.get(message["status"], 0) + 1
+
+    per_request = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for scope, body in prepared:
+            async def receive(body=body):
+                return {"type": "http.request", "body": body, "more_body": False}
+            await app(scope, receive, send)
+        per_request.append((time.perf_counter() - started) / requests * 1e6)
+    return {"per_request_us": round(statistics.median(per_request), 2), "statuses": statuses}
+
+
+async def enforcement(limiter_store) -> dict:
+    limiter = RateLimiter(limiter_store, user_per_minute=60, ip_per_minute=120, burst=5)
+    app = RateLimitMiddleware(endpoint, limiter, paths=["/mentorship"])
+    scope, body = make_request(0, 1, 1)
+    responses = []
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            responses.append((message["status"], dict(message["headers"]).get(b"retry-after")))
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    for _ in range(8):
+        await app(scope, receive, send)
+    return {
+        "burst": 5,
+        "statuses": [status for status, _ in responses],
+        "retry_after": [int(value) for _, value in responses if value is not None]
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50000)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--ips", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--redis-url", default=None)
+    args = parser.parse_args()
+
+    # Limits high enough that the throughput runs are never rejected; rejection is checked separately
+    stores = {"memory": lambda: MemoryBucketStore(max_keys=100000)}
+    if args.redis_url:
+        stores["redis"] = lambda: RedisBucketStore(args.redis_url, prefix=f"ratelimit-bench-{time.time_ns()}")
+
+    baseline = await run(endpoint, args.requests, args.users, args.ips, args.rounds)
+    results = {"requests": args.requests, "users": args.users, "ips": args.ips, "no_middleware": baseline}
+    for name, factory in stores.items():
+        store = factory()
+        limiter = RateLimiter(store, user_per_minute=10**9, ip_per_minute=10**9, burst=10**9)
+        app = RateLimitMiddleware(endpoint, limiter, paths=["/mentorship"])
+        # Redis round trips are far slower; a smaller sample is enough
+        requests = args.requests if name == "memory" else min(args.requests, 2000)
+        measured = await run(app, requests, args.users, args.ips, args.rounds)
+        measured["overhead_us"] = round(measured["per_request_us"] - baseline["per_request_us"], 2)
+        measured["tracked_keys"] = len(store)
+        measured["enforcement"] = await enforcement(factory())
+        results[name] = measured
+        await store.close()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
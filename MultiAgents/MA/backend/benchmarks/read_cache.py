@@ -0,0 +1,103 @@
+"""
+Paginated read benchmark
+Serves GET /users/{id}/sessions style reads (first pages and follow-on pages, skewed
+towards recently active users) mixed with new sessions written through the batch
+writer, against the local PostgREST stand-in. Reports the share of reads served from
+the read-through cache, upstream calls and read latency, and checks that walking
+every page returns each session exactly once.
+
+Usage (from the backend directory):
+    python benchmarks/read_cache.py --users 200 --reads 5000 --write-ratio 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.supabase_writer import PostgrestStandIn  # noqa: E402
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--sessions-per-user", type=int, default=45)
+    parser.add_argument("--reads", type=int, default=5000)
+    parser.add_argument("--write-ratio", type=float, default=0.05)
+    parser.add_argument("--db-latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    stand_in = PostgrestStandIn(args.db_latency_ms / 1000)
+    users = [str(uuid.UUID(int=i + 1)) for i in range(args.users)]
+    base = datetime(2025, 1, 1)
+    for user_id in users:
+        for n in range(args.sessions_per_user):
+            stand_in.tables["mentorship_sessions"].append({
+                "id": str(uuid.uuid4()), "user_id": user_id, "agent_type": "skill_coach",
+                "query": f"question {n}", "response": "answer " * 200, "ai_provider": "gemini", "metadata": {},
+                "created_at": (base + timedelta(minutes=rng.randrange(10 ** 6))).isoformat() + "+00:00"
+            })
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), stand_in.handler())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    import config
+    config.settings.SUPABASE_URL = f"http://127.0.0.1:{server.server_address[1]}"
+    config.settings.SUPABASE_KEY = "stand-in-key"
+    from database import DatabaseManager
+    from read_cache import read_cache
+    db = DatabaseManager()
+    await db.start()
+
+    # Correctness: walking all pages returns every session once, newest first
+    walked, cursor = [], None
+    while True:
+        rows, cursor, _ = await db.get_user_sessions(users[0], limit=10, cursor=cursor, fields=["id", "created_at"])
+        walked.extend(rows)
+        if not cursor:
+            break
+    expected = sorted((r for r in stand_in.tables["mentorship_sessions"] if r["user_id"] == users[0]),
+                      key=lambda r: (r["created_at"], r["id"]), reverse=True)
+    pagination_ok = [r["id"] for r in walked] == [r["id"] for r in expected]
+
+    calls_before = stand_in.calls
+    cached_ms, uncached_ms, writes = [], [], 0
+    cursors = {}
+    for _ in range(args.reads):
+        user_id = users[min(int(rng.paretovariate(1.2)) - 1, len(users) - 1)]
+        if rng.random() < args.write_ratio:
+            await db.create_session(user_id, "skill_coach", "new question", "answer", "gemini", {})
+            writes += 1
+            await asyncio.sleep(0)
+        cursor = cursors.get(user_id) if rng.random() < 0.3 else None
+        started = time.perf_counter()
+        _, next_cursor, cached = await db.get_user_sessions(user_id, limit=10, cursor=cursor)
+        (cached_ms if cached else uncached_ms).append((time.perf_counter() - started) * 1000)
+        cursors[user_id] = next_cursor
+    await db.close()
+    server.shutdown()
+
+    print(json.dumps({
+        "pagination_walk_correct": pagination_ok,
+        "reads": args.reads,
+        "writes": writes,
+        "served_from_cache": f"{len(cached_ms) / args.reads * 100:.1f}%",
+        "upstream_calls": stand_in.calls - calls_before,
+        "cached_read_p50_ms": round(statistics.median(cached_ms), 3) if cached_ms else None,
+        "uncached_read_p50_ms": round(statistics.median(uncached_ms), 2) if uncached_ms else None,
+        "cache": read_cache.stats()
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
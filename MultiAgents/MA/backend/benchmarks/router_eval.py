@@ -0,0 +1,165 @@
+"""
+Query router evaluation
+Offline accuracy and latency of the local agent_type="auto" router. By default it is
+scored on a held-out set of hand-labelled questions, none of which are among its seed
+questions. With --input (a JSONL export of mentorship_sessions with "query" and
+"agent_type"), it runs k-fold cross-validation: train on stored queries plus seeds,
+score on the held-out fold.
+
+Usage (from the backend directory):
+    python benchmarks/router_eval.py
+    python benchmarks/router_eval.py --input sessions.jsonl --folds 5
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from collections import Counter, defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from query_router import SEED_QUERIES, QueryRouter  # noqa: E402
+
+HELD_OUT = {
+    "skill_coach": [
+        "Where can I learn TensorFlow online for free?",
+        "Good beginner tutorials for Java",
+        "How long does it take to learn data analysis with pandas?",
+        "Which AWS certification should I do first?",
+        "Teach me the basics of linear algebra for ML",
+        "Is the Andrew Ng specialization worth it?",
+        "Best way to practice algorithms and data structures",
+        "Recommend a course on natural language processing",
+        "I know Python, what should I study next to become a data engineer?",
+        "Online bootcamp for UI/UX design",
+        "What platform has the best cybersecurity training?",
+        "Study plan for learning Kubernetes in two months",
+    ],
+    "career_guide": [
+        "Scholarships for a masters in the UK for international students",
+        "How competitive is the Rhodes scholarship?",
+        "Can I get a fully funded PhD in Canada?",
+        "Erasmus Mundus programs for computer science",
+        "What are my chances for a Gates Cambridge scholarship?",
+        "Research internships abroad for undergraduates",
+        "Should I do a postdoc or go into industry?",
+        "Which universities in Japan offer MEXT funding?",
+        "Fellowships for women in STEM",
+        "How do I find a PhD position in Australia?",
+        "Funding for a research visit to Europe",
+        "Career options after a masters in physics",
+    ],
+    "writing_agent": [
+        "Can you edit my personal statement?",
+        "How do I write a strong research statement?",
+        "Improve the wording of my thesis abstract",
+        "What should a motivation letter for a scholarship contain?",
+        "Fix the grammar in my conference paper introduction",
+        "How long should a PhD research proposal be?",
+        "Help me rewrite my resume summary",
+        "How to respond to reviewer comments on my manuscript?",
+        "Tips for writing the related work section",
+        "Make my academic CV stand out for faculty jobs",
+        "How to structure a journal article?",
+        "Write a recommendation letter request email to my professor",
+    ],
+    "networking_agent": [
+        "Top NLP conferences for students to attend",
+        "How can I meet researchers at NeurIPS?",
+        "Should I join ACM as a student member?",
+        "Online communities for Pakistani developers",
+        "How to approach professors at a poster session",
+        "Upcoming robotics symposiums in Asia",
+        "Which summer schools help you network with researchers?",
+        "How to grow my network on Twitter as an academic",
+        "Webinars on AI ethics this month",
+        "How do I find a mentor in the industry?",
+        "Local tech events and meetups in Lahore",
+        "Is attending workshops useful for making connections?",
+    ],
+}
+
+
+def score(router: QueryRouter, samples):
+    confusion = defaultdict(Counter)
+    latencies = []
+    fallbacks = 0
+    for query, expected in samples:
+        started = time.perf_counter()
+        routing = router.route(query)
+        latencies.append((time.perf_counter() - started) * 1e6)
+        confusion[expected][routing["agent_type"]] += 1
+        fallbacks += routing["fallback"]
+    return confusion, latencies, fallbacks
+
+
+def report(confusion, latencies, fallbacks, agent_types):
+    total = sum(sum(row.values()) for row in confusion.values())
+    correct = sum(confusion[a][a] for a in agent_types)
+    per_agent = {}
+    for agent_type in agent_types:
+        predicted = sum(confusion[e][agent_type] for e in agent_types)
+        actual = sum(confusion[agent_type].values())
+        per_agent[agent_type] = {
+            "precision": round(confusion[agent_type][agent_type] / predicted, 3) if predicted else None,
+            "recall": round(confusion[agent_type][agent_type] / actual, 3) if actual else None,
+        }
+    latencies.sort()
+    return {
+        "queries": total,
+        "accuracy": round(correct / total, 3),
+        "fallback_rate": round(fallbacks / total, 3),
+        "per_agent": per_agent,
+        "confusion": {a: dict(confusion[a]) for a in agent_types},
+        "routing_us_p50": round(statistics.median(latencies), 1),
+        "routing_us_p99": round(latencies[int(len(latencies) * 0.99) - 1], 1),
+        "routing_us_max": round(latencies[-1], 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", help="JSONL export with query and agent_type fields")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--default-agent", default="skill_coach")
+    parser.add_argument("--min-confidence", type=float, default=0.35)
+    args = parser.parse_args()
+    agent_types = list(SEED_QUERIES)
+
+    def new_router():
+        return QueryRouter(agent_types, args.default_agent, args.min_confidence)
+
+    if not args.input:
+        samples = [(q, a) for a, queries in HELD_OUT.items() for q in queries]
+        router = new_router()
+        result = report(*score(router, samples * 50), agent_types)
+        result["queries"] = len(samples)
+        result["confusion"] = {a: {p: n // 50 for p, n in row.items()} for a, row in result["confusion"].items()}
+        print(json.dumps({"mode": "seed model on held-out questions", "timed_repeats": 50, **result}, indent=2))
+        return
+
+    with open(args.input) as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    samples = [(r["query"], r["agent_type"]) for r in rows if r.get("query") and r.get("agent_type") in agent_types]
+    random.Random(3).shuffle(samples)
+    confusion, latencies, fallbacks = defaultdict(Counter), [], 0
+    for fold in range(args.folds):
+        test = samples[fold::args.folds]
+        train = [s for i, s in enumerate(samples) if i % args.folds != fold]
+        router = new_router()
+        router.fit(train)
+        c, lat, fb = score(router, test)
+        for expected, row in c.items():
+            confusion[expected].update(row)
+        latencies += lat
+        fallbacks += fb
+    print(json.dumps({"mode": f"{args.folds}-fold cross-validation on stored queries",
+                      **report(confusion, latencies, fallbacks, agent_types)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
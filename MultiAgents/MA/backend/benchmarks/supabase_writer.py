@@ -0,0 +1,265 @@
+"""
+Supabase persistence benchmark
+Runs the per-request persistence of BaseAgent (create_session + update_user_history)
+against a local PostgREST-compatible stand-in with a fixed per-call latency, comparing
+the previous inline synchronous calls with the background batch writer. Reports
+request-path latency, event-loop lag, HTTP calls made and checks that every row and
+increment arrived.
+
+Usage (from the backend directory):
+    python benchmarks/supabase_writer.py --requests 500 --concurrency 50 --db-latency-ms 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _split_top_level(text: str):
+    parts, depth, current = [], 0, ""
+    for ch in text:
+        if ch == "," and depth == 0:
+            parts.append(current)
+            current = ""
+            continue
+        depth += ch == "("
+        depth -= ch == ")"
+        current += ch
+    return parts + [current]
+
+
+def _compare(left, op: str, right: str) -> bool:
+    right = right.strip('"')
+    try:
+        left, right = float(left), float(right)
+    except (TypeError, ValueError):
+        left = str(left)
+    return {"eq": left == right, "lt": left < right, "gt": left > right}[op]
+
+
+def _matches_or(row, expr: str) -> bool:
+    """PostgREST or=(a.op.v,and(b.op.v,c.op.v)) with eq/lt/gt comparisons"""
+    if expr.startswith("(") and expr.endswith(")"):
+        expr = expr[1:-1]
+    for term in _split_top_level(expr):
+        if term.startswith("and("):
+            if all(_matches_or(row, f"({t})") for t in _split_top_level(term[4:-1])):
+                return True
+        else:
+            column, op, value = term.split(".", 2)
+            if _compare(row.get(column), op, value):
+                return True
+    return False
+
+
+class PostgrestStandIn:
+    """The subset of PostgREST used by DatabaseManager: insert, filtered/ordered/limited select with
+    column projection and or-filters, update by id, one RPC"""
+
+    def __init__(self, latency_s: float):
+        self.latency_s = latency_s
+        self.tables = {"mentorship_sessions": [], "mentorship_resources": [], "user_mentorship_history": []}
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def handler(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, body=None):
+                data = json.dumps(body if body is not None else []).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _parse(self):
+                parts = urlsplit(self.path)
+                name = parts.path.rsplit("/", 1)[-1]
+                self.params = dict(parse_qsl(parts.query))
+                filters = {k: v.split(".", 1)[1] for k, v in self.params.items() if v.startswith("eq.")}
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length)) if length else None
+                time.sleep(stand_in.latency_s)
+                with stand_in.lock:
+                    stand_in.calls += 1
+                return parts.path, name, filters, body
+
+            def do_GET(self):
+                _, table, filters, _ = self._parse()
+                params = self.params
+                with stand_in.lock:
+                    rows = [r for r in stand_in.tables[table] if all(str(r.get(k)) == v for k, v in filters.items())]
+                if "or" in params:
+                    rows = [r for r in rows if _matches_or(r, params["or"])]
+                for key in reversed(params.get("order", "").split(",") if params.get("order") else []):
+                    column, direction = key.split(".")[:2]
+                    rows.sort(key=lambda r: r.get(column), reverse=direction == "desc")
+                if "limit" in params:
+                    rows = rows[:int(params["limit"])]
+                if params.get("select", "*") != "*":
+                    columns = params["select"].split(",")
+                    rows = [{c: r.get(c) for c in columns} for r in rows]
+                self._reply(200, rows)
+
+            def do_POST(self):
+                path, name, _, body = self._parse()
+                with stand_in.lock:
+                    if "/rpc/" in path:
+                        stand_in.record_history(body["p_rows"])
+                        return self._reply(200, None)
+                    rows = body if isinstance(body, list) else [body]
+                    for row in rows:
+                        row.setdefault("id", str(uuid.uuid4()))
+                        row.setdefault("created_at", datetime.utcnow().isoformat() + "+00:00")
+                        row.setdefault("interaction_count", 1) if name == "user_mentorship_history" else None
+                    stand_in.tables[name].extend(rows)
+                minimal = "return=minimal" in (self.headers.get("Prefer") or "")
+                self._reply(201, [] if minimal else rows)
+
+            def do_PATCH(self):
+                _, table, filters, body = self._parse()
+                with stand_in.lock:
+                    rows = [r for r in stand_in.tables[table] if all(str(r.get(k)) == v for k, v in filters.items())]
+                    for row in rows:
+                        row.update(body)
+                self._reply(200, rows)
+
+        return Handler
+
+    def record_history(self, rows):
+        # Mirrors the record_mentorship_history SQL function (insert or atomic increment)
+        for item in rows:
+            existing = next((r for r in self.tables["user_mentorship_history"]
+                             if r["user_id"] == item["user_id"] and r["agent_type"] == item["agent_type"]), None)
+            if existing:
+                existing["interaction_count"] += item["increment"]
+            else:
+                self.tables["user_mentorship_history"].append({
+                    "id": str(uuid.uuid4()), "user_id": item["user_id"], "agent_type": item["agent_type"],
+                    "interaction_count": item["increment"], "preferences": item.get("preferences") or {}
+                })
+
+
+class LegacyDatabaseManager:
+    """The previous DatabaseManager write path: synchronous client calls inside async methods"""
+
+    def __init__(self, client):
+        self.client = client
+
+    async def create_session(self, user_id, agent_type, query, response, ai_provider, metadata):
+        result = self.client.table("mentorship_sessions").insert({
+            "user_id": user_id, "agent_type": agent_type, "query": query,
+            "response": response, "ai_provider": ai_provider, "metadata": metadata
+        }).execute()
+        return result.data[0]["id"]
+
+    async def update_user_history(self, user_id, agent_type, preferences=None):
+        existing = self.client.table("user_mentorship_history").select("*")\
+            .eq("user_id", user_id).eq("agent_type", agent_type).execute()
+        if existing.data:
+            row = existing.data[0]
+            self.client.table("user_mentorship_history").update({
+                "interaction_count": row["interaction_count"] + 1,
+                "last_interaction": datetime.utcnow().isoformat(),
+            }).eq("id", row["id"]).execute()
+        else:
+            self.client.table("user_mentorship_history").insert({
+                "user_id": user_id, "agent_type": agent_type, "interaction_count": 1, "preferences": {}
+            }).execute()
+
+
+async def drive(manager, requests: int, concurrency: int, users: int) -> dict:
+    latencies, lags = [], []
+    stop = asyncio.Event()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def ticker(interval=0.005):
+        while not stop.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            lags.append((time.perf_counter() - started - interval) * 1000)
+
+    async def one(i: int):
+        async with semaphore:
+            user_id = str(uuid.UUID(int=i % users))
+            started = time.perf_counter()
+            await manager.create_session(user_id, "skill_coach", f"question {i}", "answer " * 50, "gemini", {"n": i})
+            await manager.update_user_history(user_id, "skill_coach")
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    tick = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await tick
+    latencies.sort()
+    lags.sort()
+    return {
+        "requests_per_s": round(requests / elapsed, 1),
+        "persist_latency_p50_ms": round(statistics.median(latencies), 2),
+        "persist_latency_p99_ms": round(latencies[int(len(latencies) * 0.99) - 1], 2),
+        "loop_lag_p99_ms": round(lags[int(len(lags) * 0.99) - 1] if len(lags) > 1 else lags[0], 2),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--users", type=int, default=40)
+    parser.add_argument("--db-latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    results = []
+    for mode in ("inline_sync", "batch_writer"):
+        stand_in = PostgrestStandIn(args.db_latency_ms / 1000)
+        server = ThreadingHTTPServer(("127.0.0.1", 0), stand_in.handler())
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        os.environ["SUPABASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+        os.environ["SUPABASE_KEY"] = "stand-in-key"
+
+        import config
+        config.settings.SUPABASE_URL = os.environ["SUPABASE_URL"]
+        config.settings.SUPABASE_KEY = os.environ["SUPABASE_KEY"]
+        from database import DatabaseManager
+        manager = DatabaseManager()
+        if mode == "inline_sync":
+            manager = LegacyDatabaseManager(manager.client)
+            result = await drive(manager, args.requests, args.concurrency, args.users)
+        else:
+            await manager.start()
+            result = await drive(manager, args.requests, args.concurrency, args.users)
+            await manager.close()
+
+        history = stand_in.tables["user_mentorship_history"]
+        result.update({
+            "mode": mode,
+            "http_calls": stand_in.calls,
+            "sessions_written": len(stand_in.tables["mentorship_sessions"]),
+            "interactions_recorded": sum(r["interaction_count"] for r in history),
+            "history_rows": len(history),
+        })
+        results.append(result)
+        server.shutdown()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
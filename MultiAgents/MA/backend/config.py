@@ -31,12 +31,118 @@ class Settings:
     # Logging Configuration
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     
-    # Rate Limiting (for future use)
+    # Rate Limiting (token buckets per user_id and per client IP on RATE_LIMIT_PATHS; backend "memory" or "redis")
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
     RATE_LIMIT_PER_MINUTE: int = int(os.getenv("RATE_LIMIT_PER_MINUTE", "60"))
-    
+    RATE_LIMIT_IP_PER_MINUTE: int = int(os.getenv("RATE_LIMIT_IP_PER_MINUTE", "120"))
+    RATE_LIMIT_BURST: int = int(os.getenv("RATE_LIMIT_BURST", "10"))
+    RATE_LIMIT_PATHS: str = os.getenv("RATE_LIMIT_PATHS", "/mentorship")
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+    RATE_LIMIT_TRUST_FORWARDED: bool = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() == "true"
+    RATE_LIMIT_MAX_KEYS: int = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
     # Timeouts
     REQUEST_TIMEOUT: int = int(os.getenv("REQUEST_TIMEOUT", "30"))
 
+    # Multi-agent panel (/mentorship/panel): agents asked when none are given, and the shared deadline
+    PANEL_DEFAULT_AGENTS: str = os.getenv("PANEL_DEFAULT_AGENTS", "skill_coach,career_guide,networking_agent")
+    PANEL_TIMEOUT_SECONDS: float = float(os.getenv("PANEL_TIMEOUT_SECONDS", os.getenv("REQUEST_TIMEOUT", "30")))
+
+    # Local query router for agent_type="auto" (retrained from stored session queries at startup)
+    ROUTER_DEFAULT_AGENT: str = os.getenv("ROUTER_DEFAULT_AGENT", "skill_coach")
+    ROUTER_MIN_CONFIDENCE: float = float(os.getenv("ROUTER_MIN_CONFIDENCE", "0.35"))
+    ROUTER_TRAIN_FROM_DB: bool = os.getenv("ROUTER_TRAIN_FROM_DB", "true").lower() == "true"
+    ROUTER_TRAINING_LIMIT: int = int(os.getenv("ROUTER_TRAINING_LIMIT", "5000"))
+
+    # Gemini model probing (results persisted per API key so cold starts make no test calls)
+    MODEL_PROBE_CACHE_PATH: str = os.getenv(
+        "MODEL_PROBE_CACHE_PATH",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), ".model_probe_cache.json")
+    )
+    MODEL_PROBE_TTL_SECONDS: int = int(os.getenv("MODEL_PROBE_TTL_SECONDS", "86400"))
+
+    # Worker threads for blocking provider SDK calls (bounds concurrent Gemini SDK requests)
+    PROVIDER_MAX_WORKERS: int = int(os.getenv("PROVIDER_MAX_WORKERS", "16"))
+
+    # Shared outbound HTTP client (connection pool for provider REST calls)
+    HTTP2_ENABLED: bool = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+    HTTP_CONNECT_TIMEOUT: float = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+
+    # Gemini model routing cool-downs after a failure (seconds)
+    MODEL_RETIRED_COOLDOWN_SECONDS: int = int(os.getenv("MODEL_RETIRED_COOLDOWN_SECONDS", "3600"))
+    MODEL_RATE_LIMIT_COOLDOWN_SECONDS: int = int(os.getenv("MODEL_RATE_LIMIT_COOLDOWN_SECONDS", "30"))
+    MODEL_TRANSIENT_COOLDOWN_SECONDS: int = int(os.getenv("MODEL_TRANSIENT_COOLDOWN_SECONDS", "10"))
+
+    # Admission control: concurrent calls per provider, a bounded priority queue, and shedding past the wait deadline
+    ADMISSION_ENABLED: bool = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+    ADMISSION_GEMINI_CONCURRENCY: int = int(os.getenv("ADMISSION_GEMINI_CONCURRENCY", "8"))
+    ADMISSION_OPENAI_CONCURRENCY: int = int(os.getenv("ADMISSION_OPENAI_CONCURRENCY", "8"))
+    ADMISSION_DEFAULT_CONCURRENCY: int = int(os.getenv("ADMISSION_DEFAULT_CONCURRENCY", "8"))
+    ADMISSION_MAX_QUEUE: int = int(os.getenv("ADMISSION_MAX_QUEUE", "100"))
+    ADMISSION_MAX_WAIT_SECONDS: float = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "10"))
+    ADMISSION_DEFAULT_SERVICE_SECONDS: float = float(os.getenv("ADMISSION_DEFAULT_SERVICE_SECONDS", "5"))
+
+    # Hedged provider requests (AIProviderFactory.generate_with_fallback)
+    HEDGE_ENABLED: bool = os.getenv("HEDGE_ENABLED", "false").lower() == "true"
+    HEDGE_LATENCY_PERCENTILE: float = float(os.getenv("HEDGE_LATENCY_PERCENTILE", "95"))
+    HEDGE_DEFAULT_DELAY_SECONDS: float = float(os.getenv("HEDGE_DEFAULT_DELAY_SECONDS", "8"))
+    HEDGE_MIN_SAMPLES: int = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+    HEDGE_LATENCY_WINDOW: int = int(os.getenv("HEDGE_LATENCY_WINDOW", "200"))
+    HEDGE_MAX_RATIO: float = float(os.getenv("HEDGE_MAX_RATIO", "0.1"))  # at most 10% extra requests
+    HEDGE_BURST: int = int(os.getenv("HEDGE_BURST", "5"))
+
+    # In-memory conversation history limits
+    CONVERSATION_MAX_SESSIONS: int = int(os.getenv("CONVERSATION_MAX_SESSIONS", "10000"))
+    CONVERSATION_MAX_MESSAGES: int = int(os.getenv("CONVERSATION_MAX_MESSAGES", "100"))
+    CONVERSATION_IDLE_TTL_SECONDS: int = int(os.getenv("CONVERSATION_IDLE_TTL_SECONDS", "7200"))
+    CONVERSATION_MAX_BYTES: int = int(os.getenv("CONVERSATION_MAX_BYTES", str(256 * 1024 * 1024)))
+
+    # Supabase persistence: executor threads and the background batch writer
+    DB_MAX_WORKERS: int = int(os.getenv("DB_MAX_WORKERS", "4"))
+    DB_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("DB_FLUSH_INTERVAL_SECONDS", "0.5"))
+    DB_MAX_BATCH: int = int(os.getenv("DB_MAX_BATCH", "200"))
+    DB_MAX_PENDING: int = int(os.getenv("DB_MAX_PENDING", "10000"))
+    READ_CACHE_TTL_SECONDS: float = float(os.getenv("READ_CACHE_TTL_SECONDS", "60"))
+    READ_CACHE_MAX_ENTRIES: int = int(os.getenv("READ_CACHE_MAX_ENTRIES", "5000"))
+
+    # Prompt context: token budget for prior turns, and the rolling summary of older ones
+    CONTEXT_BUDGET_TOKENS: int = int(os.getenv("CONTEXT_BUDGET_TOKENS", "1500"))
+    CONTEXT_SUMMARY_TOKENS: int = int(os.getenv("CONTEXT_SUMMARY_TOKENS", "200"))
+    CONTEXT_SUMMARY_USE_LLM: bool = os.getenv("CONTEXT_SUMMARY_USE_LLM", "false").lower() == "true"
+
+    # Shared conversation history store: "memory" (single worker), "sqlite" (workers on one host) or "redis"
+    HISTORY_BACKEND: str = os.getenv("HISTORY_BACKEND", "memory").lower()
+    HISTORY_SQLITE_PATH: str = os.getenv(
+        "HISTORY_SQLITE_PATH",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "conversations.db")
+    )
+    REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    # Worker threads for history backend I/O, and how stale a cached session may be before a read re-checks its version
+    HISTORY_MAX_WORKERS: int = int(os.getenv("HISTORY_MAX_WORKERS", "4"))
+    HISTORY_VERSION_CHECK_SECONDS: float = float(os.getenv("HISTORY_VERSION_CHECK_SECONDS", "1.0"))
+
+    # Fake AI provider for load tests: replaces every provider and the Gemini REST transport (no real calls)
+    FAKE_PROVIDER_ENABLED: bool = os.getenv("FAKE_PROVIDER_ENABLED", "false").lower() == "true"
+    # Time to first token: constant:MS | uniform:MIN_MS:MAX_MS | lognormal:MEDIAN_MS:SIGMA | exponential:MEAN_MS
+    FAKE_LATENCY: str = os.getenv("FAKE_LATENCY", "lognormal:800:0.4")
+    FAKE_TOKENS_PER_SECOND: float = float(os.getenv("FAKE_TOKENS_PER_SECOND", "80"))
+    FAKE_COMPLETION_TOKENS: str = os.getenv("FAKE_COMPLETION_TOKENS", "150:600")  # MIN:MAX per response
+    FAKE_ERROR_RATE: float = float(os.getenv("FAKE_ERROR_RATE", "0"))  # HTTP 500
+    FAKE_RATE_LIMIT_RATE: float = float(os.getenv("FAKE_RATE_LIMIT_RATE", "0"))  # HTTP 429
+    FAKE_TIMEOUT_RATE: float = float(os.getenv("FAKE_TIMEOUT_RATE", "0"))  # hangs for REQUEST_TIMEOUT
+    FAKE_FAILING_MODELS: str = os.getenv("FAKE_FAILING_MODELS", "")  # always 404, like a retired model
+    FAKE_SEED: str = os.getenv("FAKE_SEED", "")
+
+    # Semantic response cache (near-duplicate questions on fresh sessions)
+    SEMANTIC_CACHE_ENABLED: bool = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+    SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.85"))
+    SEMANTIC_CACHE_TTL_SECONDS: int = int(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "21600"))
+    SEMANTIC_CACHE_MAX_ENTRIES: int = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "5000"))
+    SEMANTIC_CACHE_MAX_BYTES: int = int(os.getenv("SEMANTIC_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
     @classmethod
     def validate(cls):
         """Validate required configuration"""
@@ -46,8 +152,10 @@ class Settings:
         if not cls.SUPABASE_URL or not cls.SUPABASE_KEY:
             logger.warning("Supabase credentials not configured. Database features will be disabled.")
         
-        # At least one AI provider is required
-        if not cls.OPENAI_API_KEY and not cls.GEMINI_API_KEY:
+        # At least one AI provider is required (unless the fake provider stands in for all of them)
+        if cls.FAKE_PROVIDER_ENABLED:
+            logger.warning("FAKE_PROVIDER_ENABLED: responses are simulated and no AI provider is called")
+        elif not cls.OPENAI_API_KEY and not cls.GEMINI_API_KEY:
             errors.append("At least one AI provider API key (OPENAI_API_KEY or GEMINI_API_KEY) is required")
         
         # Validate AI provider name
@@ -0,0 +1,209 @@
+"""
+Token-budgeted conversation context
+Fills a prompt budget with the most recent turns; older turns are folded into a
+per-session rolling summary that is refreshed in the background
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+import asyncio
+import logging
+import re
+import threading
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count (about four characters per token for English prose)"""
+    return (len(text) + 3) // 4 if text else 0
+
+
+def message_key(message: Dict, position: int) -> int:
+    """Identity of a history message: its timestamp, or its position if it has none"""
+    timestamp_us = message.get("timestamp_us")
+    return position if timestamp_us is None else timestamp_us
+
+
+def truncate_to_tokens(text: str, tokens: int) -> str:
+    max_chars = tokens * 4
+    if len(text) <= max_chars:
+        return text
+    return text[:max(0, max_chars - 3)].rstrip() + "..."
+
+
+@dataclass
+class ConversationContext:
+    """Selected history for one prompt"""
+    turns: List[Dict] = field(default_factory=list)
+    summary: Optional[str] = None
+    tokens: int = 0
+    omitted: int = 0  # older messages left out (covered by the summary once it is refreshed)
+
+
+class ContextBuilder:
+    """Chooses which history goes into a prompt by token budget rather than message count.
+
+    Newest messages are added until ``budget_tokens`` is reached; the newest
+    message is truncated if it alone exceeds the budget. When older messages
+    are left out, the session's rolling summary (at most ``summary_tokens``)
+    is included and a refresh covering the newly omitted messages is
+    scheduled on the event loop, so the request never waits for it.
+
+    History is a sliding window, so coverage is tracked by message identity
+    (``timestamp_us``, see ConversationManager.get_history_with_ids), not by
+    position: the summary records the newest message it covers. Messages
+    without a timestamp are keyed by position, which is only right for
+    callers passing the full history.
+    """
+
+    def __init__(self, budget_tokens: int, summary_tokens: int, max_sessions: int, use_llm: bool = False):
+        self.budget_tokens = budget_tokens
+        # The summary may take at most half the budget so recent turns always fit
+        self.summary_tokens = min(summary_tokens, budget_tokens // 2)
+        self.max_sessions = max_sessions
+        self.use_llm = use_llm
+        # session_id -> (key of the newest message covered, summary text), least recently used first
+        self._summaries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._refreshing: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def build(self, session_id: Optional[str], history: Optional[List[Dict]]) -> ConversationContext:
+        history = [m for m in (history or []) if m.get("role") in ("user", "assistant")]
+        if not history:
+            return ConversationContext()
+
+        with self._lock:
+            covered, summary = self._summaries.get(session_id, (None, None)) if session_id else (None, None)
+            if summary is not None:
+                self._summaries.move_to_end(session_id)
+
+        # Reserve room for the summary only when something will be left out
+        total = sum(estimate_tokens(m.get("content", "")) for m in history)
+        budget = self.budget_tokens
+        if total > budget and summary:
+            budget -= estimate_tokens(summary)
+
+        turns: List[Dict] = []
+        used = 0
+        for msg in reversed(history):
+            cost = estimate_tokens(msg.get("content", ""))
+            if used + cost > budget:
+                if not turns and budget > 0:
+                    content = truncate_to_tokens(msg.get("content", ""), budget)
+                    turns.append({"role": msg["role"], "content": content})
+                    used += estimate_tokens(content)
+                break
+            turns.append(msg)
+            used += cost
+        turns.reverse()
+
+        omitted = len(history) - len(turns)
+        context = ConversationContext(turns=turns, omitted=omitted, tokens=used)
+        if omitted:
+            if summary:
+                context.summary = summary
+                context.tokens += estimate_tokens(summary)
+            if session_id:
+                keys = [message_key(m, i) for i, m in enumerate(history[:omitted])]
+                new_messages = [m for m, key in zip(history, keys) if covered is None or key > covered]
+                if new_messages:
+                    self._schedule_refresh(session_id, new_messages, keys[-1], summary)
+        return context
+
+    def _schedule_refresh(self, session_id: str, new_messages: List[Dict], covered: int, previous: Optional[str]):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        with self._lock:
+            if session_id in self._refreshing:
+                return
+            self._refreshing.add(session_id)
+        loop.create_task(self._refresh(session_id, new_messages, covered, previous))
+
+    async def _refresh(self, session_id: str, new_messages: List[Dict], covered: int, previous: Optional[str]):
+        try:
+            summary = None
+            if self.use_llm:
+                summary = await self._summarize_with_llm(previous, new_messages)
+            if not summary:
+                summary = self._summarize_extractive(previous, new_messages)
+            with self._lock:
+                self._summaries[session_id] = (covered, summary)
+                self._summaries.move_to_end(session_id)
+                while len(self._summaries) > self.max_sessions:
+                    self._summaries.popitem(last=False)
+        except Exception as e:
+            logger.warning(f"Conversation summary refresh failed for {session_id[:8]}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(session_id)
+
+    def _summarize_extractive(self, previous: Optional[str], new_messages: List[Dict]) -> str:
+        """Cheap local summary: each question and the opening sentence of each answer"""
+        lines = previous.split("\n") if previous else []
+        for msg in new_messages:
+            content = " ".join(msg.get("content", "").split())
+            if msg["role"] == "user":
+                lines.append(f"- User asked: {truncate_to_tokens(content, 40)}")
+            else:
+                first_sentence = _SENTENCE_END.split(content, 1)[0]
+                lines.append(f"- Assistant covered: {truncate_to_tokens(first_sentence, 40)}")
+        # Keep the newest lines that fit
+        kept: List[str] = []
+        used = 0
+        for line in reversed(lines):
+            cost = estimate_tokens(line) + 1
+            if used + cost > self.summary_tokens:
+                break
+            kept.append(line)
+            used += cost
+        return "\n".join(reversed(kept))
+
+    async def _summarize_with_llm(self, previous: Optional[str], new_messages: List[Dict]) -> Optional[str]:
+        from admission import PRIORITY_BACKGROUND
+        from ai_provider import AIProviderFactory
+
+        transcript = "\n".join(f"{m['role'].capitalize()}: {m.get('content', '')}" for m in new_messages)
+        prompt = (
+            f"Existing summary:\n{previous or '(none)'}\n\nNew conversation turns:\n{transcript}\n\n"
+            f"Update the summary in at most {self.summary_tokens * 3 // 4} words. Keep the student's goals, "
+            "background and any recommendations already given."
+        )
+        try:
+            summary, _ = await AIProviderFactory.generate_with_fallback(
+                prompt, system_prompt="You maintain concise summaries of mentoring conversations.",
+                priority=PRIORITY_BACKGROUND
+            )
+            return truncate_to_tokens(summary.strip(), self.summary_tokens)
+        except Exception as e:
+            logger.debug(f"LLM summary unavailable, using extractive summary: {e}")
+            return None
+
+
+def format_history_lines(context: ConversationContext) -> List[str]:
+    """Prompt lines for a context: the summary (if any), then "User:"/"Assistant:" turns"""
+    lines = []
+    if context.summary:
+        lines.append(f"Summary of earlier conversation:\n{context.summary}")
+    for msg in context.turns:
+        if msg["role"] == "user":
+            lines.append(f"User: {msg['content']}")
+        elif msg["role"] == "assistant":
+            lines.append(f"Assistant: {msg['content']}")
+    return lines
+
+
+# Global context builder instance
+context_builder = ContextBuilder(
+    budget_tokens=settings.CONTEXT_BUDGET_TOKENS,
+    summary_tokens=settings.CONTEXT_SUMMARY_TOKENS,
+    max_sessions=settings.CONVERSATION_MAX_SESSIONS,
+    use_llm=settings.CONTEXT_SUMMARY_USE_LLM
+)
@@ -3,111 +3,352 @@ In-Memory Conversation History Manager
 Free solution - stores conversation history in memory
 """
 
-from typing import Dict, List, Optional
-from datetime import datetime
-import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+import asyncio
+import functools
 import logging
+import sys
+import threading
+import time
+import uuid
+
+from config import settings
+from history_store import HistoryBackend, create_history_backend
 
 logger = logging.getLogger(__name__)
 
+# Approximate fixed cost of one stored message (slots record and timestamp int; metadata is shared)
+MESSAGE_OVERHEAD_BYTES = 120
+# Approximate fixed cost of one session (list, metadata dict, index entry)
+SESSION_OVERHEAD_BYTES = 600
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+# Distinct metadata tuples kept in the sharing pool; least recently used ones are forgotten past this
+METADATA_POOL_SIZE = 1024
+
+# Identical metadata (e.g. {"agent_type": ..., "ai_provider": ...}) is stored once and shared
+_metadata_pool: "OrderedDict[Tuple, Tuple]" = OrderedDict()
+_metadata_pool_lock = threading.Lock()
+
+# Backend calls (SQLite busy waits, Redis round trips) run here so they never block the event loop
+_backend_executor = ThreadPoolExecutor(max_workers=settings.HISTORY_MAX_WORKERS, thread_name_prefix="history-backend")
+
+
+def _utc_now_us() -> int:
+    """Current UTC time as integer microseconds since the epoch"""
+    now = datetime.utcnow()
+    return (now - _EPOCH) // timedelta(microseconds=1)
+
+
+def _intern_metadata(metadata: Optional[Dict]) -> Optional[Tuple]:
+    if not metadata:
+        return None
+    try:
+        key = tuple((sys.intern(k), sys.intern(v) if isinstance(v, str) else v) for k, v in metadata.items())
+        with _metadata_pool_lock:
+            pooled = _metadata_pool.get(key)
+            if pooled is not None:
+                _metadata_pool.move_to_end(key)
+                return pooled
+            # Varying metadata (ids, timestamps) would otherwise grow the pool without bound
+            _metadata_pool[key] = key
+            if len(_metadata_pool) > METADATA_POOL_SIZE:
+                _metadata_pool.popitem(last=False)
+            return key
+    except TypeError:
+        # Unhashable values cannot be pooled; keep a private copy
+        return tuple(metadata.items())
+
+
+class Message:
+    """Compact stored message: interned role, integer epoch-microsecond timestamp, pooled metadata"""
+
+    __slots__ = ("role", "content", "timestamp_us", "metadata")
+
+    def __init__(self, role: str, content: str, metadata: Optional[Dict] = None, timestamp_us: Optional[int] = None):
+        self.role = sys.intern(role)
+        self.content = content
+        self.timestamp_us = _utc_now_us() if timestamp_us is None else timestamp_us
+        self.metadata = _intern_metadata(metadata)
+
+    def to_dict(self) -> Dict:
+        """Public message shape (ISO timestamp string, metadata dict)"""
+        return {
+            "role": self.role,
+            "content": self.content,
+            "timestamp": (_EPOCH + timedelta(microseconds=self.timestamp_us)).isoformat(),
+            "metadata": dict(self.metadata) if self.metadata else {}
+        }
+
 
 class ConversationManager:
-    """Manages conversation history in memory (free, no database needed)"""
-    
-    def __init__(self):
-        # Store conversations: {session_id: List[messages]}
-        self.conversations: Dict[str, List[Dict]] = {}
+    """Manages conversation history in memory (free, no database needed)
+
+    Sessions are kept in an OrderedDict ordered by last access, so the least
+    recently used session is always at the front and eviction is O(1).
+    Limits: idle TTL, messages per session, session count and total bytes.
+
+    With a ``backend`` (see history_store) the in-memory sessions become a
+    write-through cache: writes go to the backend, misses load from it, and
+    reads reload a session when another worker has changed its version. The
+    version is checked at most once per ``version_check_seconds`` per session.
+    Async callers go through ``run_blocking`` so backend I/O stays off the
+    event loop.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = settings.CONVERSATION_MAX_SESSIONS,
+        max_messages_per_session: int = settings.CONVERSATION_MAX_MESSAGES,
+        idle_ttl_seconds: int = settings.CONVERSATION_IDLE_TTL_SECONDS,
+        max_bytes: int = settings.CONVERSATION_MAX_BYTES,
+        backend: Optional[HistoryBackend] = None,
+        version_check_seconds: float = settings.HISTORY_VERSION_CHECK_SECONDS
+    ):
+        # Store conversations: {session_id: List[Message]}, least recently used first
+        self.conversations: "OrderedDict[str, List[Message]]" = OrderedDict()
         # Store session metadata
         self.session_metadata: Dict[str, Dict] = {}
-        # Cleanup old conversations (keep last 100 sessions)
-        self.max_sessions = 100
-    
-    def create_session(self, user_id: Optional[str] = None, agent_type: str = "skill_coach") -> str:
-        """Create a new conversation session"""
-        session_id = str(uuid.uuid4())
-        self.conversations[session_id] = []
-        self.session_metadata[session_id] = {
-            "user_id": user_id,
-            "agent_type": agent_type,
-            "created_at": datetime.utcnow().isoformat(),
-            "message_count": 0
-        }
-        
-        # Cleanup old sessions if too many
-        if len(self.conversations) > self.max_sessions:
-            self._cleanup_old_sessions()
-        
-        logger.info(f"Created new conversation session: {session_id[:8]}")
+        self.max_sessions = max_sessions
+        self.max_messages_per_session = max_messages_per_session
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.max_bytes = max_bytes
+        self.bytes_used = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.trimmed_messages = 0
+        self.backend = backend
+        self.backend_loads = 0
+        self.version_check_seconds = version_check_seconds
+        self._lock = threading.RLock()
+
+    def create_session(self, user_id: Optional[str] = None, agent_type: str = "skill_coach", session_id: Optional[str] = None) -> str:
+        """Create a new conversation session (optionally under a caller-supplied id)"""
+        session_id = session_id or str(uuid.uuid4())
+        created_at = datetime.utcnow().isoformat()
+        with self._lock:
+            self._install(session_id, {"user_id": user_id, "agent_type": agent_type, "created_at": created_at, "version": 0}, [])
+            if self.backend:
+                self.backend.create_session(session_id, user_id, agent_type, created_at)
+
+        logger.debug(f"Created new conversation session: {session_id[:8]}")
         return session_id
-    
+
+    async def run_blocking(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Call a (possibly backend-bound) history method from async code.
+
+        With a backend the call runs in a worker thread; in memory only it runs inline.
+        """
+        if self.backend is None:
+            return func(*args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_backend_executor, functools.partial(func, *args, **kwargs))
+
+    def has_session(self, session_id: str) -> bool:
+        """True if the session exists and has not been idle past the TTL"""
+        with self._lock:
+            return self._touch(session_id)
+
+    def get_agent_type(self, session_id: str) -> Optional[str]:
+        """Agent the session was created for, or None if the session does not exist"""
+        with self._lock:
+            if not self._touch(session_id):
+                return None
+            return self.session_metadata[session_id]["agent_type"]
+
     def add_message(self, session_id: str, role: str, content: str, metadata: Optional[Dict] = None):
         """Add a message to conversation history"""
-        if session_id not in self.conversations:
-            # Auto-create session if doesn't exist
-            self.create_session()
-        
-        message = {
-            "role": role,  # "user" or "assistant"
-            "content": content,
-            "timestamp": datetime.utcnow().isoformat(),
-            "metadata": metadata or {}
-        }
-        
-        self.conversations[session_id].append(message)
-        self.session_metadata[session_id]["message_count"] = len(self.conversations[session_id])
-        
+        with self._lock:
+            if not self._touch(session_id):
+                # Auto-create the session under the requested id
+                self.create_session(session_id=session_id)
+
+            message = Message(role, content, metadata)  # role is "user" or "assistant"
+            if self.backend:
+                stored = (message.role, content, message.timestamp_us, dict(message.metadata) if message.metadata else None)
+                version = self.backend.append_message(session_id, stored, self.max_messages_per_session)
+                if version != self.session_metadata[session_id]["version"] + 1:
+                    # Another worker wrote in between: reload, which includes this message
+                    self._load_from_backend(session_id)
+                    logger.debug(f"Added {role} message to session {session_id[:8]}")
+                    return
+                self.session_metadata[session_id]["version"] = version
+                self.session_metadata[session_id]["checked_at"] = time.monotonic()
+            size = MESSAGE_OVERHEAD_BYTES + len(content)
+
+            messages = self.conversations[session_id]
+            session_meta = self.session_metadata[session_id]
+            messages.append(message)
+            session_meta["bytes"] += size
+            self.bytes_used += size
+
+            # Per-session cap: drop the oldest messages
+            excess = len(messages) - self.max_messages_per_session
+            if excess > 0:
+                freed = sum(MESSAGE_OVERHEAD_BYTES + len(m.content) for m in messages[:excess])
+                del messages[:excess]
+                session_meta["bytes"] -= freed
+                self.bytes_used -= freed
+
+            session_meta["message_count"] = len(messages)
+            self._enforce_limits(keep=session_id)
+
         logger.debug(f"Added {role} message to session {session_id[:8]}")
-    
+
     def get_history(self, session_id: str, limit: int = 20) -> List[Dict]:
         """Get conversation history for a session"""
-        if session_id not in self.conversations:
-            return []
-        
-        # Return last N messages
-        return self.conversations[session_id][-limit:]
-    
+        with self._lock:
+            if not self._touch(session_id, refresh=True):
+                return []
+
+            # Return last N messages
+            return [msg.to_dict() for msg in self.conversations[session_id][-limit:]]
+
     def get_history_for_llm(self, session_id: str, limit: int = 10) -> List[Dict]:
         """Get conversation history formatted for LLM (last N exchanges)"""
-        history = self.get_history(session_id, limit * 2)  # Get more to ensure pairs
-        
-        formatted = []
-        for msg in history:
-            formatted.append({
-                "role": msg["role"],
-                "content": msg["content"]
-            })
-        
-        return formatted
-    
+        return [{"role": msg.role, "content": msg.content} for msg in self._recent(session_id, limit)]
+
+    def get_history_with_ids(self, session_id: str, limit: int = 10) -> List[Dict]:
+        """get_history_for_llm plus each message's ``timestamp_us``, for the context builder's summary coverage"""
+        return [
+            {"role": msg.role, "content": msg.content, "timestamp_us": msg.timestamp_us}
+            for msg in self._recent(session_id, limit)
+        ]
+
+    def _recent(self, session_id: str, limit: int) -> List[Message]:
+        with self._lock:
+            if not self._touch(session_id, refresh=True):
+                return []
+            return self.conversations[session_id][-limit * 2:]  # Get more to ensure pairs
+
     def clear_session(self, session_id: str):
         """Clear conversation history for a session"""
+        with self._lock:
+            if session_id in self.conversations:
+                session_meta = self.session_metadata[session_id]
+                self.bytes_used -= session_meta["bytes"] - SESSION_OVERHEAD_BYTES
+                session_meta["bytes"] = SESSION_OVERHEAD_BYTES
+                self.conversations[session_id] = []
+                session_meta["message_count"] = 0
+                if self.backend:
+                    session_meta["version"] = self.backend.clear_session(session_id)
+                logger.info(f"Cleared session {session_id[:8]}")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "sessions": len(self.conversations),
+            "bytes_used": self.bytes_used,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "trimmed_messages": self.trimmed_messages,
+            "backend": type(self.backend).__name__ if self.backend else "memory",
+            "backend_loads": self.backend_loads
+        }
+
+    def close(self):
+        if self.backend:
+            # Let queued backend calls finish before their connections are closed
+            _backend_executor.shutdown(wait=True)
+            self.backend.close()
+
+    def _touch(self, session_id: str, refresh: bool = False) -> bool:
+        """Mark a session as used now; expire it instead if it has been idle too long.
+
+        A session missing locally is loaded from the backend. With ``refresh``,
+        a cached session is reloaded if another worker has changed it.
+        """
+        session_meta = self.session_metadata.get(session_id)
+        if session_meta is None:
+            return self.backend is not None and self._load_from_backend(session_id)
+        now = time.monotonic()
+        if now - session_meta["last_access"] > self.idle_ttl_seconds:
+            self._drop(session_id)
+            self.expirations += 1
+            return self.backend is not None and self._load_from_backend(session_id)
+        session_meta["last_access"] = now
+        self.conversations.move_to_end(session_id)
+        if refresh and self.backend and now - session_meta["checked_at"] >= self.version_check_seconds:
+            session_meta["checked_at"] = now
+            version = self.backend.version(session_id)
+            if version is not None and version != session_meta["version"]:
+                return self._load_from_backend(session_id)
+        return True
+
+    def _load_from_backend(self, session_id: str) -> bool:
+        loaded = self.backend.load_session(session_id, self.max_messages_per_session)
+        if loaded is None:
+            return False
+        meta, stored = loaded
+        messages = [Message(role, content, metadata, timestamp_us) for role, content, timestamp_us, metadata in stored]
+        self._install(session_id, meta, messages)
+        self.backend_loads += 1
+        return True
+
+    def _install(self, session_id: str, meta: Dict, messages: List[Message]):
+        """Put a session into the local cache as the most recently used"""
         if session_id in self.conversations:
-            self.conversations[session_id] = []
-            self.session_metadata[session_id]["message_count"] = 0
-            logger.info(f"Cleared session {session_id[:8]}")
-    
-    def _cleanup_old_sessions(self):
-        """Remove oldest sessions if we have too many"""
-        if len(self.conversations) <= self.max_sessions:
-            return
-        
-        # Sort by creation time and remove oldest
-        sessions_by_time = sorted(
-            self.session_metadata.items(),
-            key=lambda x: x[1].get("created_at", ""),
-            reverse=False
-        )
-        
-        to_remove = len(self.conversations) - self.max_sessions
-        for session_id, _ in sessions_by_time[:to_remove]:
-            del self.conversations[session_id]
-            del self.session_metadata[session_id]
-        
-        logger.info(f"Cleaned up {to_remove} old sessions")
-
-
-# Global conversation manager instance
-conversation_manager = ConversationManager()
+            self._drop(session_id)
+        size = SESSION_OVERHEAD_BYTES + sum(MESSAGE_OVERHEAD_BYTES + len(m.content) for m in messages)
+        self.conversations[session_id] = messages
+        self.session_metadata[session_id] = {
+            "user_id": meta.get("user_id"),
+            "agent_type": meta.get("agent_type"),
+            "created_at": meta.get("created_at"),
+            "message_count": len(messages),
+            "version": meta.get("version", 0),
+            "last_access": time.monotonic(),
+            "checked_at": time.monotonic(),
+            "bytes": size
+        }
+        self.bytes_used += size
+        self._enforce_limits(keep=session_id)
+
+    def _drop(self, session_id: str):
+        del self.conversations[session_id]
+        self.bytes_used -= self.session_metadata.pop(session_id)["bytes"]
+
+    def _enforce_limits(self, keep: Optional[str] = None):
+        """Expire idle sessions and evict least recently used ones until within limits.
+
+        The ``keep`` session is never evicted; if it alone is over the byte
+        budget, its oldest messages are trimmed instead.
+        """
+        now = time.monotonic()
+        while self.conversations:
+            oldest_id = next(iter(self.conversations))
+            if oldest_id == keep:
+                break
+            if now - self.session_metadata[oldest_id]["last_access"] > self.idle_ttl_seconds:
+                self._drop(oldest_id)
+                self.expirations += 1
+            elif len(self.conversations) > self.max_sessions or self.bytes_used > self.max_bytes:
+                self._drop(oldest_id)
+                self.evictions += 1
+            else:
+                break
+        if keep in self.conversations and self.bytes_used > self.max_bytes:
+            self._trim_oldest(keep)
 
+    def _trim_oldest(self, session_id: str):
+        """Drop a session's oldest messages (never the newest) until total bytes are within budget"""
+        messages = self.conversations[session_id]
+        drop = freed = 0
+        while drop < len(messages) - 1 and self.bytes_used - freed > self.max_bytes:
+            freed += MESSAGE_OVERHEAD_BYTES + len(messages[drop].content)
+            drop += 1
+        if drop:
+            del messages[:drop]
+            session_meta = self.session_metadata[session_id]
+            session_meta["bytes"] -= freed
+            session_meta["message_count"] = len(messages)
+            self.bytes_used -= freed
+            self.trimmed_messages += drop
 
 
+# Global conversation manager instance (HISTORY_BACKEND selects the shared store, default in-memory only)
+conversation_manager = ConversationManager(backend=create_history_backend())
@@ -1,7 +1,83 @@
 from supabase import create_client, Client
 from config import settings
-from typing import Optional, Dict, Any, List
+from db_writer import BatchWriter
+from read_cache import read_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import asyncio
+import base64
+import json
+import logging
+import math
+import uuid
+
+logger = logging.getLogger(__name__)
+
+SESSION_COLUMNS = ("id", "user_id", "agent_type", "query", "response", "ai_provider", "metadata", "created_at")
+SESSION_LIST_COLUMNS = ("id", "agent_type", "query", "ai_provider", "created_at")
+RESOURCE_COLUMNS = ("id", "session_id", "resource_type", "title", "description", "url", "provider", "relevance_score", "created_at")
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(sort_value: Any, row_id: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([sort_value, row_id]).encode()).decode().rstrip("=")
+
+
+def as_uuid(value: Any) -> Optional[str]:
+    """Canonical UUID string, or None if the value is not a UUID (uuid columns reject anything else)"""
+    try:
+        return str(uuid.UUID(str(value)))
+    except (TypeError, ValueError):
+        return None
+
+
+def require_uuid(value: Any, name: str) -> str:
+    """Canonical UUID string; ValueError (a 400 at the API) otherwise"""
+    canonical = as_uuid(value)
+    if canonical is None:
+        raise ValueError(f"{name} must be a UUID")
+    return canonical
+
+
+def decode_cursor(cursor: str, check_sort_value: Callable[[Any], Any]) -> Tuple[Any, str]:
+    """(sort value, row id) from a cursor; both end up in PostgREST filters, so both are validated"""
+    try:
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        row_id = as_uuid(row_id)
+        if row_id is None:
+            raise ValueError("row id is not a UUID")
+        return check_sort_value(sort_value), row_id
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def timestamp_value(value: Any) -> str:
+    """An ISO 8601 timestamp, unchanged"""
+    if not isinstance(value, str):
+        raise ValueError("not a timestamp")
+    datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return value
+
+
+def score_value(value: Any) -> Optional[float]:
+    """A finite number, or None for a NULL score"""
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError("not a number")
+    return value
+
+
+def projection(fields: Optional[Sequence[str]], allowed: Sequence[str], default: Sequence[str], keyset: Sequence[str]) -> Tuple[str, List[str]]:
+    """PostgREST select string (requested columns plus keyset columns) and the columns to return"""
+    requested = list(fields) if fields else list(default)
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(allowed)}")
+    selected = requested + [k for k in keyset if k not in requested]
+    return ",".join(selected), requested
+
 
 class DatabaseManager:
     def __init__(self):
@@ -11,9 +87,23 @@ class DatabaseManager:
         else:
             self.client = None
             self.enabled = False
-            import logging
-            logger = logging.getLogger(__name__)
             logger.warning("Supabase not configured. Database features disabled.")
+        # supabase-py is synchronous: every call runs on this pool, never on the event loop
+        self._executor = ThreadPoolExecutor(max_workers=settings.DB_MAX_WORKERS, thread_name_prefix="supabase")
+        self.writer = BatchWriter(self._run, lambda: self.client, on_flushed=self._invalidate)
+
+    async def _run(self, fn: Callable[[], Any]) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn)
+
+    async def start(self):
+        """Start the background batch writer (call from the app's startup hook)"""
+        if self.enabled:
+            self.writer.start()
+
+    async def close(self):
+        """Flush buffered writes (call from the app's shutdown hook)"""
+        if self.enabled:
+            await self.writer.stop()
 
     async def create_session(
         self,
@@ -26,15 +116,22 @@ class DatabaseManager:
     ) -> str:
         if not self.enabled:
             return "no-db-" + str(hash(f"{user_id}{agent_type}{query}") % 1000000)
-        result = self.client.table("mentorship_sessions").insert({
-            "user_id": user_id,
+        # The id is generated here so callers have it before the batched insert lands
+        session_id = str(uuid.uuid4())
+        # A malformed user_id would fail the whole bulk insert it is batched with; keep the session, unattributed
+        db_user_id = as_uuid(user_id) if user_id else None
+        if user_id and not db_user_id:
+            logger.warning(f"Ignoring non-UUID user_id {user_id!r} for session {session_id[:8]}")
+        await self._write("mentorship_sessions", {
+            "id": session_id,
+            "user_id": db_user_id,
             "agent_type": agent_type,
             "query": query,
             "response": response,
             "ai_provider": ai_provider,
             "metadata": metadata
-        }).execute()
-        return result.data[0]["id"]
+        })
+        return session_id
 
     async def create_resource(
         self,
@@ -48,7 +145,7 @@ class DatabaseManager:
     ):
         if not self.enabled:
             return
-        self.client.table("mentorship_resources").insert({
+        await self._write("mentorship_resources", {
             "session_id": session_id,
             "resource_type": resource_type,
             "title": title,
@@ -56,7 +153,27 @@ class DatabaseManager:
             "url": url,
             "provider": provider,
             "relevance_score": relevance_score
-        }).execute()
+        })
+
+    async def _write(self, table: str, row: Dict[str, Any]):
+        """Queue the row for the batch writer, or insert it directly when the writer is not running"""
+        self._invalidate(table, [row])
+        if self.writer.running:
+            self.writer.add(table, row)
+        else:
+            await self._run(lambda: self.client.table(table).insert(row, returning="minimal").execute())
+            self._invalidate(table, [row])
+
+    def _invalidate(self, table: str, rows: List[Dict[str, Any]]):
+        """Drop cached pages a write affects (on enqueue, and again once the rows are stored)"""
+        if table == "mentorship_sessions":
+            owners = {("sessions", row.get("user_id")) for row in rows}
+        elif table == "mentorship_resources":
+            owners = {("resources", row.get("session_id")) for row in rows}
+        else:
+            return
+        for owner in owners:
+            read_cache.invalidate(owner)
 
     async def update_user_history(
         self,
@@ -66,44 +183,107 @@ class DatabaseManager:
     ):
         if not self.enabled:
             return
-        existing = self.client.table("user_mentorship_history")\
-            .select("*")\
-            .eq("user_id", user_id)\
-            .eq("agent_type", agent_type)\
-            .maybe_single()\
-            .execute()
-
-        if existing.data:
-            self.client.table("user_mentorship_history")\
-                .update({
-                    "interaction_count": existing.data["interaction_count"] + 1,
-                    "last_interaction": datetime.utcnow().isoformat(),
-                    "preferences": preferences or existing.data["preferences"],
-                    "updated_at": datetime.utcnow().isoformat()
-                })\
-                .eq("id", existing.data["id"])\
-                .execute()
-        else:
-            self.client.table("user_mentorship_history").insert({
-                "user_id": user_id,
-                "agent_type": agent_type,
-                "interaction_count": 1,
-                "preferences": preferences or {}
-            }).execute()
-
-    async def get_user_sessions(self, user_id: str, agent_type: Optional[str] = None) -> List[Dict[str, Any]]:
-        query = self.client.table("mentorship_sessions").select("*").eq("user_id", user_id)
-        if agent_type:
-            query = query.eq("agent_type", agent_type)
-        result = query.order("created_at", desc=True).limit(10).execute()
-        return result.data
-
-    async def get_session_resources(self, session_id: str) -> List[Dict[str, Any]]:
-        result = self.client.table("mentorship_resources")\
-            .select("*")\
-            .eq("session_id", session_id)\
-            .order("relevance_score", desc=True)\
-            .execute()
-        return result.data
+        user_id = as_uuid(user_id)
+        if not user_id:
+            # user_mentorship_history.user_id is a uuid; one bad value would fail the whole RPC batch
+            logger.warning("Skipping user history update for a non-UUID user_id")
+            return
+        # One atomic upsert-with-increment (record_mentorship_history RPC) instead of select-then-update
+        if self.writer.running:
+            self.writer.add_history(user_id, agent_type, preferences)
+            return
+        payload = [{"user_id": user_id, "agent_type": agent_type, "increment": 1, "preferences": preferences}]
+        await self._run(lambda: self.client.rpc("record_mentorship_history", {"p_rows": payload}).execute())
+
+    async def get_user_sessions(
+        self,
+        user_id: str,
+        agent_type: Optional[str] = None,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str], bool]:
+        """Newest-first page of a user's sessions; returns (rows, next_cursor, served_from_cache)
+
+        Keyset pagination on (created_at, id), so deep pages cost the same as the first.
+        """
+        # Canonical form, so the cache key matches the one writes invalidate
+        user_id = require_uuid(user_id, "user_id")
+        select, returned = projection(fields, SESSION_COLUMNS, SESSION_LIST_COLUMNS, ("created_at", "id"))
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        after = decode_cursor(cursor, timestamp_value) if cursor else None
+
+        def load():
+            query = self.client.table("mentorship_sessions").select(select).eq("user_id", user_id)
+            if agent_type:
+                query = query.eq("agent_type", agent_type)
+            if after:
+                created_at, row_id = after
+                query = query.or_(f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt."{row_id}")')
+            return query.order("created_at", desc=True).order("id", desc=True).limit(limit + 1).execute().data
+
+        async def load_page():
+            return self._page(await self._run(load), limit, "created_at", returned)
+
+        (rows, next_cursor), cached = await read_cache.get_or_load(
+            ("sessions", user_id), (agent_type, limit, cursor, select), load_page
+        )
+        return rows, next_cursor, cached
+
+    async def get_session_resources(
+        self,
+        session_id: str,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str], bool]:
+        """Most relevant first page of a session's resources; returns (rows, next_cursor, served_from_cache)
+
+        Resources without a relevance_score come last.
+        """
+        session_id = require_uuid(session_id, "session_id")
+        select, returned = projection(fields, RESOURCE_COLUMNS, RESOURCE_COLUMNS, ("relevance_score", "id"))
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        after = decode_cursor(cursor, score_value) if cursor else None
+
+        def load():
+            query = self.client.table("mentorship_resources").select(select).eq("session_id", session_id)
+            if after:
+                score, row_id = after
+                if score is None:
+                    query = query.or_(f'and(relevance_score.is.null,id.lt."{row_id}")')
+                else:
+                    query = query.or_(
+                        f'relevance_score.lt.{score},and(relevance_score.eq.{score},id.lt."{row_id}"),relevance_score.is.null'
+                    )
+            query = query.order("relevance_score", desc=True, nullsfirst=False).order("id", desc=True)
+            return query.limit(limit + 1).execute().data
+
+        async def load_page():
+            return self._page(await self._run(load), limit, "relevance_score", returned)
+
+        (rows, next_cursor), cached = await read_cache.get_or_load(
+            ("resources", session_id), (limit, cursor, select), load_page
+        )
+        return rows, next_cursor, cached
+
+    async def get_training_queries(self, limit: int) -> List[Dict[str, Any]]:
+        """Most recent session queries with their agent_type (query router training data)"""
+        if not self.enabled:
+            return []
+        return await self._run(
+            lambda: self.client.table("mentorship_sessions").select("query,agent_type,metadata")
+            .order("created_at", desc=True).limit(limit).execute().data
+        )
+
+    @staticmethod
+    def _page(rows: List[Dict[str, Any]], limit: int, sort_column: str, returned: List[str]):
+        """Trim the look-ahead row, build the next cursor and drop keyset-only columns"""
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor(last[sort_column], last["id"])
+        return [{k: row.get(k) for k in returned} for row in rows], next_cursor
 
 db = DatabaseManager()
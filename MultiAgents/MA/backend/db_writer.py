@@ -0,0 +1,172 @@
+"""
+Background batching writer for Supabase
+Request handlers enqueue rows and return; a background task flushes them in bulk
+on the database executor so the synchronous client never blocks the event loop
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import logging
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Parents before children so foreign keys resolve within one flush
+TABLE_ORDER = ("mentorship_sessions", "mentorship_resources")
+
+
+class BatchWriter:
+    """Buffers inserts per table and coalesces user-history increments.
+
+    ``run`` executes a blocking callable off the event loop and ``client``
+    returns the supabase client. Rows are flushed every ``flush_interval``
+    seconds, or sooner once ``max_batch`` rows are waiting. A failed batch is
+    retried once on the next flush, then dropped with an error log; at most
+    ``max_pending`` rows are held, oldest dropped first. ``on_flushed`` is
+    called with (table, rows) after each successful insert. One invalid row
+    fails its whole batch, so callers check values first (DatabaseManager
+    drops non-UUID user ids before enqueueing).
+    """
+
+    def __init__(
+        self,
+        run: Callable[[Callable[[], Any]], Awaitable[Any]],
+        client: Callable[[], Any],
+        flush_interval: float = settings.DB_FLUSH_INTERVAL_SECONDS,
+        max_batch: int = settings.DB_MAX_BATCH,
+        max_pending: int = settings.DB_MAX_PENDING,
+        on_flushed: Optional[Callable[[str, List[Dict[str, Any]]], None]] = None
+    ):
+        self._run = run
+        self._client = client
+        self._on_flushed = on_flushed
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self._rows: Dict[str, List[Tuple[Dict[str, Any], int]]] = {table: [] for table in TABLE_ORDER}
+        # (user_id, agent_type) -> [increment, preferences, attempts]
+        self._history: Dict[Tuple[str, str], List[Any]] = {}
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._flush_lock = asyncio.Lock()
+        self.flushed_rows = 0
+        self.flush_calls = 0
+        self.failures = 0
+        self.dropped = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if not self.running:
+            self._wake = asyncio.Event()
+            self._stopping = False
+            self._task = asyncio.create_task(self._flush_loop())
+            logger.info("Database batch writer started")
+
+    async def stop(self):
+        """Stop the flush loop and write out everything still buffered"""
+        task, self._task = self._task, None
+        if task:
+            # Let an in-progress flush finish rather than cancelling it with rows in hand
+            self._stopping = True
+            self._wake.set()
+            await task
+        await self.flush()
+        logger.info(f"Database batch writer stopped ({self.pending()} rows left unwritten)")
+
+    def pending(self) -> int:
+        return sum(len(rows) for rows in self._rows.values()) + len(self._history)
+
+    def add(self, table: str, row: Dict[str, Any]):
+        self._rows[table].append((row, 0))
+        if self.pending() > self.max_pending:
+            self._drop_oldest()
+        if self.pending() >= self.max_batch:
+            self._wake.set()
+
+    def add_history(self, user_id: str, agent_type: str, preferences: Optional[Dict[str, Any]] = None):
+        entry = self._history.setdefault((user_id, agent_type), [0, None, 0])
+        entry[0] += 1
+        if preferences:
+            entry[1] = preferences
+        if self.pending() >= self.max_batch:
+            self._wake.set()
+
+    def _drop_oldest(self):
+        for table in reversed(TABLE_ORDER):
+            if self._rows[table]:
+                self._rows[table].pop(0)
+                self.dropped += 1
+                logger.warning(f"Database write buffer full; dropped oldest {table} row")
+                return
+
+    async def _flush_loop(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Database flush failed: {e}")
+
+    async def flush(self):
+        async with self._flush_lock:
+            for table in TABLE_ORDER:
+                rows, self._rows[table] = self._rows[table], []
+                for start in range(0, len(rows), self.max_batch):
+                    await self._insert(table, rows[start:start + self.max_batch])
+            if self._history:
+                history, self._history = self._history, {}
+                await self._record_history(history)
+
+    async def _insert(self, table: str, batch: List[Tuple[Dict[str, Any], int]]):
+        payload = [row for row, _ in batch]
+        try:
+            await self._run(lambda: self._client().table(table).insert(payload, returning="minimal").execute())
+            self.flush_calls += 1
+            self.flushed_rows += len(payload)
+            if self._on_flushed:
+                self._on_flushed(table, payload)
+        except Exception as e:
+            self.failures += 1
+            retry = [(row, attempts + 1) for row, attempts in batch if attempts == 0]
+            self.dropped += len(batch) - len(retry)
+            self._rows[table] = retry + self._rows[table]
+            logger.error(f"Bulk insert of {len(payload)} {table} rows failed ({len(retry)} will retry): {e}")
+
+    async def _record_history(self, history: Dict[Tuple[str, str], List[Any]]):
+        payload = [
+            {"user_id": user_id, "agent_type": agent_type, "increment": increment, "preferences": preferences}
+            for (user_id, agent_type), (increment, preferences, _) in history.items()
+        ]
+        try:
+            await self._run(lambda: self._client().rpc("record_mentorship_history", {"p_rows": payload}).execute())
+            self.flush_calls += 1
+            self.flushed_rows += len(payload)
+        except Exception as e:
+            self.failures += 1
+            for key, (increment, preferences, attempts) in history.items():
+                if attempts:
+                    self.dropped += 1
+                    continue
+                entry = self._history.setdefault(key, [0, None, 1])
+                entry[0] += increment
+                entry[1] = entry[1] or preferences
+                entry[2] = 1
+            logger.error(f"User history upsert of {len(payload)} rows failed: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": self.pending(),
+            "flushed_rows": self.flushed_rows,
+            "flush_calls": self.flush_calls,
+            "failures": self.failures,
+            "dropped": self.dropped
+        }
@@ -0,0 +1,217 @@
+"""
+Single-pass entity extraction for agent responses
+One precompiled regex finds platforms, programs, event types, URLs and dates in a
+single scan; matches are deduplicated and linked to nearby URLs and deadlines
+"""
+
+from bisect import bisect_left
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+import re
+
+# kind -> canonical name -> categories (first one is the primary type)
+VOCABULARY: Dict[str, Dict[str, Tuple[str, ...]]] = {
+    "resource": {
+        name: ("course",) for name in (
+            "Coursera", "Udemy", "edX", "YouTube", "Khan Academy", "Pluralsight",
+            "LinkedIn Learning", "Skillshare", "FreeCodeCamp", "Codecademy",
+            "MIT OpenCourseWare", "Stanford Online", "FutureLearn"
+        )
+    },
+    "opportunity": {
+        "Fulbright": ("scholarship", "fellowship"),
+        "Chevening": ("scholarship",),
+        "DAAD": ("scholarship",),
+        "Commonwealth": ("scholarship",),
+        "Erasmus": ("scholarship",),
+        "Rhodes": ("scholarship", "fellowship"),
+        "Gates": ("scholarship", "fellowship"),
+        "Schwarzman": ("scholarship", "fellowship"),
+        "Humboldt": ("fellowship",),
+        "NSF": ("grant",),
+        "NIH": ("grant",),
+        "research grant": ("grant",),
+        "Marie Curie": ("grant",)
+    },
+    "event": {
+        name: (name,) for name in ("conference", "workshop", "seminar", "webinar", "symposium", "summit")
+    }
+}
+# Kinds whose terms also match a plural ("workshops")
+PLURAL_KINDS = ("event",)
+
+# A URL is linked to an entity when it starts within this many characters after it
+URL_WINDOW_CHARS = 200
+# A deadline is linked to an entity when it starts within this many characters after it
+DEADLINE_WINDOW_CHARS = 300
+
+_MONTHS = ("january", "february", "march", "april", "may", "june", "july", "august", "september",
+           "october", "november", "december", "jan", "feb", "mar", "apr", "jun", "jul", "aug", "sep", "sept",
+           "oct", "nov", "dec")
+_URL_CHARS = r"[^\s<>()\[\]\"'`]"
+_DEADLINE_CUE = re.compile(r"deadline|apply by|due|closes?|closing date|applications? (?:open|close)", re.IGNORECASE)
+_URL_TRAILING = ".,;:!?*_"
+_DATE_TOKEN = re.compile(r"\d+|[a-z]+")
+_MONTH_NUMBERS = {name[:3]: number for number, name in enumerate(_MONTHS[:12], start=1)}
+
+
+def trie_pattern(words) -> str:
+    """Regex alternation for lowercase words factored into a prefix trie.
+
+    Python's regex engine tries alternatives one by one; with a trie each
+    position is rejected after a single character test instead of one per word.
+    """
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def parse_date(text: str) -> Optional[str]:
+    """ISO date for a matched date string, or None if it is not a valid calendar date"""
+    day = month = year = None
+    for token in _DATE_TOKEN.findall(text.lower()):
+        if token.isdigit():
+            if len(token) == 4 and year is None:
+                year = int(token)
+            elif day is None:
+                day = int(token)
+            elif month is None:
+                # ISO order (2026-03-15): the first number after the year was the month
+                day, month = int(token), day
+        elif token[:3] in _MONTH_NUMBERS:
+            month = _MONTH_NUMBERS[token[:3]]
+    try:
+        return date(year, month, day).isoformat()
+    except (TypeError, ValueError):
+        return None
+
+
+class EntityExtractor:
+    """Finds every vocabulary term, URL and date in one ``finditer`` pass.
+
+    The response is lowercased once and scanned with a single trie-factored
+    regex; terms match on word boundaries (so "Gates" does not match
+    "delegates"). Each (kind, name) is reported once with the offsets of
+    all its mentions, a URL and a deadline. The URL is one that names the
+    entity (coursera.org for Coursera) or else the first URL following a
+    mention; the deadline is the first one following a mention. A date
+    counts as a deadline when a cue such as "deadline" or "apply by"
+    precedes it on the same line.
+    """
+
+    def __init__(self, vocabulary: Dict[str, Dict[str, Tuple[str, ...]]] = VOCABULARY):
+        self.vocabulary = vocabulary
+        # normalized term -> (kind, canonical name); names are unique across kinds
+        self._terms = {_normalize(name): (kind, name) for kind, names in vocabulary.items() for name in names}
+        day = r"\d{1,2}(?:st|nd|rd|th)?"
+        month = trie_pattern(_MONTHS)
+        pattern = (
+            rf"\b(?:(?P<term>{trie_pattern(self._terms)})s?\b"
+            rf"|(?P<url>(?:https?://|www\.){_URL_CHARS}+)"
+            rf"|(?P<date>{month}\.?\s+{day},?\s+\d{{4}}\b|{day}\s+(?:of\s+)?{month}\.?,?\s+\d{{4}}\b"
+            rf"|\d{{4}}-\d\d-\d\d\b))"
+        ).replace(r"\ ", r"\s+")
+        self._pattern = re.compile(pattern)
+        # Used when lowercasing changes the text length (offsets would not line up)
+        self._pattern_ignorecase = re.compile(pattern, re.IGNORECASE)
+        # URLs that name a known entity are only linked to that entity, never by proximity
+        self._slugs = re.compile("|".join(
+            re.escape(name.lower().replace(" ", ""))
+            for kind, names in vocabulary.items() if kind not in PLURAL_KINDS for name in names
+        ))
+
+    def _canonical(self, text: str) -> Optional[Tuple[str, str]]:
+        key = _normalize(text)
+        found = self._terms.get(key)
+        if found is None and key.endswith("s"):
+            found = self._terms.get(key[:-1])
+            if found and found[0] not in PLURAL_KINDS:
+                return None
+        return found
+
+    def extract(self, text: str) -> Dict[str, List[Dict[str, Any]]]:
+        """Entities per kind, plus every URL and deadline, in order of first appearance"""
+        text = text or ""
+        mentions: List[Tuple[int, int, str, str]] = []
+        urls: List[Tuple[int, str, bool]] = []  # (offset, url, names a known entity)
+        deadlines: List[Dict[str, Any]] = []
+
+        lowered = text.lower()
+        if len(lowered) == len(text):
+            matches = self._pattern.finditer(lowered)
+        else:
+            lowered, matches = text, self._pattern_ignorecase.finditer(text)
+
+        for match in matches:
+            group = match.lastgroup
+            start, end = match.span()
+            if group == "term":
+                found = self._canonical(match.group())
+                if found:
+                    mentions.append((start, end) + found)
+            elif group == "url":
+                url = text[start:end].rstrip(_URL_TRAILING)
+                urls.append((start, url, self._slugs.search(url.lower()) is not None))
+            else:
+                line_start = lowered.rfind("\n", 0, start) + 1
+                if _DEADLINE_CUE.search(lowered, max(line_start, start - 80), start):
+                    date_text = text[start:end]
+                    deadlines.append({"text": date_text, "date": parse_date(date_text), "start": start})
+
+        url_starts = [pos for pos, _, _ in urls]
+        deadline_starts = [d["start"] for d in deadlines]
+        entities: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for index, (start, end, kind, name) in enumerate(mentions):
+            # Links stop at the next mention so one URL is not credited to every entity before it
+            limit = mentions[index + 1][0] if index + 1 < len(mentions) else len(text)
+            entity = entities.get((kind, name))
+            if entity is None:
+                # A URL naming the entity (coursera.org for Coursera) wins over proximity
+                slug = name.lower().replace(" ", "")
+                entity = entities[(kind, name)] = {
+                    "kind": kind, "name": name, "categories": list(self.vocabulary[kind][name]),
+                    "start": start, "end": end, "offsets": [], "deadline": None,
+                    "url": next((url for _, url, named in urls if named and slug in url.lower()), None)
+                }
+            entity["offsets"].append([start, end])
+            if entity["url"] is None:
+                stop = min(limit, end + URL_WINDOW_CHARS)
+                for i in range(bisect_left(url_starts, end), len(urls)):
+                    pos, url, named = urls[i]
+                    if pos >= stop:
+                        break
+                    if not named:
+                        entity["url"] = url
+                        break
+            if entity["deadline"] is None:
+                i = bisect_left(deadline_starts, end)
+                if i < len(deadlines) and deadlines[i]["start"] < min(limit, end + DEADLINE_WINDOW_CHARS):
+                    entity["deadline"] = deadlines[i]["date"] or deadlines[i]["text"]
+
+        result: Dict[str, List[Dict[str, Any]]] = {kind: [] for kind in self.vocabulary}
+        for entity in entities.values():
+            entity["mentions"] = len(entity["offsets"])
+            result[entity["kind"]].append(entity)
+        result["urls"] = [url for _, url, _ in urls]
+        result["deadlines"] = deadlines
+        return result
+
+
+# Global extractor instance
+entity_extractor = EntityExtractor()
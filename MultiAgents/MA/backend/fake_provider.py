@@ -0,0 +1,251 @@
+"""
+Fake AI provider for load testing
+Simulated model calls with configurable latency, token rate and injected failures, so the
+API can be load-tested without spending OpenAI or Gemini quota. Served as an AIProvider
+for AIProviderFactory and as an httpx transport that answers the Gemini REST endpoints
+"""
+
+from collections import Counter
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Tuple
+import asyncio
+import json
+import logging
+import random
+
+import httpx
+
+from ai_provider import AIProvider
+from config import settings
+from context_builder import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Tokens per SSE chunk on streaming requests
+STREAM_CHUNK_TOKENS = 24
+# How long an injected 429/500/404 takes to come back
+ERROR_LATENCY_SECONDS = 0.05
+
+# Response text is drawn from these, with entity-extractor terms mixed in so post-processing does real work
+_WORDS = ("learn", "practice", "projects", "skills", "research", "apply", "start", "build", "portfolio", "python",
+          "data", "course", "weeks", "plan", "review", "mentor", "network", "papers", "deadline", "goals")
+_TERMS = ("Coursera", "edX", "Udemy", "Fulbright", "DAAD", "Chevening", "conference", "workshop", "webinar")
+
+
+class LatencyDistribution:
+    """Time-to-first-token sampler parsed from a spec string (milliseconds).
+
+    ``constant:MS``, ``uniform:MIN_MS:MAX_MS``, ``lognormal:MEDIAN_MS:SIGMA``
+    or ``exponential:MEAN_MS``.
+    """
+
+    def __init__(self, spec: str):
+        self.spec = spec
+        kind, *params = spec.split(":")
+        try:
+            values = [float(p) for p in params]
+        except ValueError:
+            raise ValueError(f"Invalid latency distribution '{spec}': parameters must be numbers")
+        arity = {"constant": 1, "uniform": 2, "lognormal": 2, "exponential": 1}
+        if kind not in arity or len(values) != arity[kind]:
+            raise ValueError(
+                f"Invalid latency distribution '{spec}'; use constant:MS, uniform:MIN_MS:MAX_MS, "
+                "lognormal:MEDIAN_MS:SIGMA or exponential:MEAN_MS"
+            )
+        self.kind = kind
+        self.values = values
+
+    def sample(self, rng: random.Random) -> float:
+        """Seconds"""
+        if self.kind == "constant":
+            ms = self.values[0]
+        elif self.kind == "uniform":
+            ms = rng.uniform(*self.values)
+        elif self.kind == "lognormal":
+            ms = self.values[0] * rng.lognormvariate(0.0, self.values[1])
+        else:
+            ms = rng.expovariate(1.0 / self.values[0])
+        return max(ms, 0.0) / 1000
+
+
+class FakeBackend:
+    """Simulated model shared by the fake provider and the fake Gemini transport.
+
+    A call first draws its outcome: an injected 429, 500 or timeout (at the
+    configured rates), a 404 for a model listed in ``failing_models`` (as a
+    retired model would), or success. A success waits the sampled
+    time-to-first-token, then generates ``completion_tokens`` at
+    ``tokens_per_second``. A timeout hangs for ``timeout_seconds`` and raises
+    ``asyncio.TimeoutError``.
+    """
+
+    def __init__(
+        self,
+        latency: LatencyDistribution,
+        tokens_per_second: float,
+        completion_tokens: Tuple[int, int],
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        timeout_rate: float = 0.0,
+        timeout_seconds: float = 30.0,
+        failing_models: Iterable[str] = (),
+        seed: Optional[int] = None
+    ):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.timeout_rate = timeout_rate
+        self.timeout_seconds = timeout_seconds
+        self.failing_models = frozenset(failing_models)
+        self.rng = random.Random(seed)
+        self.outcomes: Counter = Counter()
+
+    @classmethod
+    def from_settings(cls) -> "FakeBackend":
+        low, _, high = settings.FAKE_COMPLETION_TOKENS.partition(":")
+        return cls(
+            latency=LatencyDistribution(settings.FAKE_LATENCY),
+            tokens_per_second=settings.FAKE_TOKENS_PER_SECOND,
+            completion_tokens=(int(low), int(high or low)),
+            error_rate=settings.FAKE_ERROR_RATE,
+            rate_limit_rate=settings.FAKE_RATE_LIMIT_RATE,
+            timeout_rate=settings.FAKE_TIMEOUT_RATE,
+            timeout_seconds=settings.REQUEST_TIMEOUT,
+            failing_models=[m.strip() for m in settings.FAKE_FAILING_MODELS.split(",") if m.strip()],
+            seed=int(settings.FAKE_SEED) if settings.FAKE_SEED else None
+        )
+
+    def draw(self, model: str) -> str:
+        """Outcome of one call: ok, rate_limited, error, timeout or model_unavailable"""
+        if model in self.failing_models:
+            outcome = "model_unavailable"
+        else:
+            r = self.rng.random()
+            if r < self.rate_limit_rate:
+                outcome = "rate_limited"
+            elif r < self.rate_limit_rate + self.error_rate:
+                outcome = "error"
+            elif r < self.rate_limit_rate + self.error_rate + self.timeout_rate:
+                outcome = "timeout"
+            else:
+                outcome = "ok"
+        self.outcomes[outcome] += 1
+        return outcome
+
+    async def fail(self, outcome: str) -> Tuple[int, str]:
+        """Wait out an injected failure; (HTTP status, message), or raises asyncio.TimeoutError"""
+        if outcome == "timeout":
+            await asyncio.sleep(self.timeout_seconds)
+            raise asyncio.TimeoutError(f"Fake provider timed out after {self.timeout_seconds}s")
+        await asyncio.sleep(ERROR_LATENCY_SECONDS)
+        return {
+            "rate_limited": (429, "Resource has been exhausted (fake rate limit)"),
+            "error": (500, "Internal error (fake failure)"),
+            "model_unavailable": (404, "Model is not found or not supported (fake)")
+        }[outcome]
+
+    def _text(self, tokens: int) -> str:
+        words = [self.rng.choice(_TERMS) if self.rng.random() < 0.08 else self.rng.choice(_WORDS)
+                 for _ in range(max(1, tokens * 3 // 4))]
+        return " ".join(words)
+
+    async def generate(self, prompt: str, chunk_tokens: Optional[int] = None) -> AsyncIterator[Tuple[str, Dict[str, int]]]:
+        """Yield (text, running usage) pieces at the configured token rate; one piece unless ``chunk_tokens`` is set"""
+        total = self.rng.randint(*self.completion_tokens)
+        prompt_tokens = estimate_tokens(prompt)
+        await asyncio.sleep(self.latency.sample(self.rng))
+        produced = 0
+        while produced < total:
+            step = min(chunk_tokens or total, total - produced)
+            await asyncio.sleep(step / self.tokens_per_second)
+            produced += step
+            text = self._text(step)
+            yield (text if produced == step else " " + text), {
+                "promptTokenCount": prompt_tokens, "candidatesTokenCount": produced, "totalTokenCount": prompt_tokens + produced
+            }
+
+    async def complete(self, prompt: str, model: str = "fake") -> Tuple[int, str, Dict[str, int]]:
+        """(HTTP status, response text or error message, usage)"""
+        outcome = self.draw(model)
+        if outcome != "ok":
+            status, message = await self.fail(outcome)
+            return status, message, {}
+        pieces, usage = [], {}
+        async for text, usage in self.generate(prompt):
+            pieces.append(text)
+        return 200, "".join(pieces), usage
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "latency": self.latency.spec,
+            "tokens_per_second": self.tokens_per_second,
+            "outcomes": dict(self.outcomes)
+        }
+
+
+class FakeProvider(AIProvider):
+    """AIProvider backed by :class:`FakeBackend` (failures raise like the real providers do)"""
+
+    def __init__(self, backend: "FakeBackend" = None, name: str = "fake"):
+        self.backend = backend or get_fake_backend()
+        self.name = name
+
+    async def generate_response(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+        full_prompt = f"{system_prompt}\n\n{prompt}" if system_prompt else prompt
+        status, text, _ = await self.backend.complete(full_prompt, self.name)
+        if status != 200:
+            raise Exception(f"Fake {self.name} API error: HTTP {status}: {text}")
+        return text
+
+
+class FakeGeminiTransport(httpx.AsyncBaseTransport):
+    """Answers ``models/{model}:generateContent`` and ``:streamGenerateContent?alt=sse`` like the Gemini REST API"""
+
+    def __init__(self, backend: "FakeBackend" = None):
+        self.backend = backend or get_fake_backend()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        model, _, method = request.url.path.rsplit("/", 1)[-1].partition(":")
+        body = json.loads(await request.aread() or b"{}")
+        prompt = "".join(part.get("text", "") for content in body.get("contents", []) for part in content.get("parts", []))
+
+        outcome = self.backend.draw(model)
+        if outcome != "ok":
+            try:
+                status, message = await self.backend.fail(outcome)
+            except asyncio.TimeoutError as e:
+                raise httpx.ReadTimeout(str(e), request=request)
+            return httpx.Response(status, json={"error": {"code": status, "message": message}}, request=request)
+
+        if method == "streamGenerateContent":
+            return httpx.Response(
+                200, headers={"content-type": "text/event-stream"}, content=self._sse(prompt), request=request
+            )
+        pieces, usage = [], {}
+        async for text, usage in self.backend.generate(prompt):
+            pieces.append(text)
+        return httpx.Response(200, json=_gemini_payload("".join(pieces), usage), request=request)
+
+    async def _sse(self, prompt: str) -> AsyncIterator[bytes]:
+        async for text, usage in self.backend.generate(prompt, chunk_tokens=STREAM_CHUNK_TOKENS):
+            yield f"data: {json.dumps(_gemini_payload(text, usage))}\r\n\r\n".encode()
+
+
+def _gemini_payload(text: str, usage: Dict[str, int]) -> Dict[str, Any]:
+    return {
+        "candidates": [{"content": {"parts": [{"text": text}], "role": "model"}}],
+        "usageMetadata": usage
+    }
+
+
+# Global fake backend instance, built on first use so FAKE_* settings are only parsed when the fake is used
+_fake_backend: Optional[FakeBackend] = None
+
+
+def get_fake_backend() -> FakeBackend:
+    """Get the shared fake backend, creating it from settings on first use"""
+    global _fake_backend
+    if _fake_backend is None:
+        _fake_backend = FakeBackend.from_settings()
+    return _fake_backend
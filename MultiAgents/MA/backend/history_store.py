@@ -0,0 +1,289 @@
+"""
+Shared conversation history backends
+Durable store behind ConversationManager's local cache so any uvicorn worker can
+continue a conversation and history survives restarts
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# (role, content, timestamp_us, metadata dict or None)
+StoredMessage = Tuple[str, str, int, Optional[Dict[str, Any]]]
+
+
+class HistoryBackend(ABC):
+    """Write-through target for ConversationManager.
+
+    Every session carries a ``version`` that increases with each append or
+    clear. Workers compare it with their cached copy to detect writes made
+    by other processes.
+    """
+
+    @abstractmethod
+    def create_session(self, session_id: str, user_id: Optional[str], agent_type: str, created_at: str):
+        pass
+
+    @abstractmethod
+    def append_message(self, session_id: str, message: StoredMessage, max_messages: int) -> int:
+        """Append and trim to the newest ``max_messages``; returns the new version"""
+        pass
+
+    @abstractmethod
+    def load_session(self, session_id: str, limit: int) -> Optional[Tuple[Dict[str, Any], List[StoredMessage]]]:
+        """Session metadata (including ``version``) and its newest ``limit`` messages, or None"""
+        pass
+
+    @abstractmethod
+    def version(self, session_id: str) -> Optional[int]:
+        pass
+
+    @abstractmethod
+    def clear_session(self, session_id: str) -> int:
+        pass
+
+    def close(self):
+        pass
+
+
+class SQLiteHistoryBackend(HistoryBackend):
+    """SQLite in WAL mode: one writer and many readers across processes on one host"""
+
+    def __init__(self, path: str, idle_ttl_seconds: int):
+        self.path = path
+        self.idle_ttl_seconds = idle_ttl_seconds
+        # One connection per thread (callers include the conversation manager's executor threads);
+        # all of them are kept here so close() can close every one
+        self._conns: Dict[int, sqlite3.Connection] = {}
+        self._conns_lock = threading.Lock()
+        self._writes = 0
+        conn = self._conn()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS conversation_sessions (
+                session_id TEXT PRIMARY KEY,
+                user_id TEXT,
+                agent_type TEXT,
+                created_at TEXT,
+                version INTEGER NOT NULL DEFAULT 0,
+                last_access REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS conversation_messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                timestamp_us INTEGER NOT NULL,
+                metadata TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_conversation_messages_session
+                ON conversation_messages(session_id, id);
+            CREATE INDEX IF NOT EXISTS idx_conversation_sessions_last_access
+                ON conversation_sessions(last_access);
+        """)
+        self.prune_idle()
+
+    def _conn(self) -> sqlite3.Connection:
+        thread_id = threading.get_ident()
+        conn = self._conns.get(thread_id)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._conns_lock:
+                self._conns[thread_id] = conn
+        return conn
+
+    def create_session(self, session_id, user_id, agent_type, created_at):
+        self._conn().execute(
+            """INSERT INTO conversation_sessions (session_id, user_id, agent_type, created_at, last_access)
+               VALUES (?, ?, ?, ?, ?)
+               ON CONFLICT(session_id) DO NOTHING""",
+            (session_id, user_id, agent_type, created_at, time.time())
+        )
+
+    def append_message(self, session_id, message, max_messages):
+        role, content, timestamp_us, metadata = message
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                """INSERT INTO conversation_sessions (session_id, created_at, last_access)
+                   VALUES (?, ?, ?)
+                   ON CONFLICT(session_id) DO NOTHING""",
+                (session_id, time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime()), time.time())
+            )
+            conn.execute(
+                "INSERT INTO conversation_messages (session_id, role, content, timestamp_us, metadata) VALUES (?, ?, ?, ?, ?)",
+                (session_id, role, content, timestamp_us, json.dumps(metadata) if metadata else None)
+            )
+            conn.execute(
+                """DELETE FROM conversation_messages WHERE session_id = ? AND id <= (
+                       SELECT id FROM conversation_messages WHERE session_id = ?
+                       ORDER BY id DESC LIMIT 1 OFFSET ?)""",
+                (session_id, session_id, max_messages)
+            )
+            version = conn.execute(
+                """UPDATE conversation_sessions SET version = version + 1, last_access = ?
+                   WHERE session_id = ? RETURNING version""",
+                (time.time(), session_id)
+            ).fetchone()[0]
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        self._writes += 1
+        if self._writes % 1000 == 0:
+            self.prune_idle()
+        return version
+
+    def load_session(self, session_id, limit):
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT user_id, agent_type, created_at, version FROM conversation_sessions WHERE session_id = ?",
+            (session_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        rows = conn.execute(
+            """SELECT role, content, timestamp_us, metadata FROM conversation_messages
+               WHERE session_id = ? ORDER BY id DESC LIMIT ?""",
+            (session_id, limit)
+        ).fetchall()
+        messages = [(r[0], r[1], r[2], json.loads(r[3]) if r[3] else None) for r in reversed(rows)]
+        meta = {"user_id": row[0], "agent_type": row[1], "created_at": row[2], "version": row[3]}
+        return meta, messages
+
+    def version(self, session_id):
+        row = self._conn().execute(
+            "SELECT version FROM conversation_sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def clear_session(self, session_id):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM conversation_messages WHERE session_id = ?", (session_id,))
+            row = conn.execute(
+                "UPDATE conversation_sessions SET version = version + 1 WHERE session_id = ? RETURNING version",
+                (session_id,)
+            ).fetchone()
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return row[0] if row else 0
+
+    def prune_idle(self):
+        """Delete sessions idle past the TTL"""
+        cutoff = time.time() - self.idle_ttl_seconds
+        conn = self._conn()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                """DELETE FROM conversation_messages WHERE session_id IN (
+                       SELECT session_id FROM conversation_sessions WHERE last_access < ?)""",
+                (cutoff,)
+            )
+            conn.execute("DELETE FROM conversation_sessions WHERE last_access < ?", (cutoff,))
+            conn.execute("COMMIT")
+        except sqlite3.OperationalError as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            logger.warning(f"History prune skipped: {e}")
+
+    def close(self):
+        """Close the connections of every thread that used this backend"""
+        with self._conns_lock:
+            conns, self._conns = list(self._conns.values()), {}
+        for conn in conns:
+            conn.close()
+
+
+class RedisHistoryBackend(HistoryBackend):
+    """Redis (or any RESP-compatible server) via redis-py; expiry uses the idle TTL"""
+
+    def __init__(self, url: str, idle_ttl_seconds: int, prefix: str = "conv"):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("HISTORY_BACKEND=redis requires the 'redis' package (pip install redis)") from e
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.prefix = prefix
+
+    def _keys(self, session_id: str) -> Tuple[str, str]:
+        return f"{self.prefix}:{session_id}:meta", f"{self.prefix}:{session_id}:msgs"
+
+    def create_session(self, session_id, user_id, agent_type, created_at):
+        meta_key, _ = self._keys(session_id)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hsetnx(meta_key, "created_at", created_at)
+        pipe.hsetnx(meta_key, "user_id", user_id or "")
+        pipe.hsetnx(meta_key, "agent_type", agent_type)
+        pipe.hsetnx(meta_key, "version", 0)
+        pipe.expire(meta_key, self.idle_ttl_seconds)
+        pipe.execute()
+
+    def append_message(self, session_id, message, max_messages):
+        meta_key, msgs_key = self._keys(session_id)
+        pipe = self.client.pipeline(transaction=True)
+        pipe.rpush(msgs_key, json.dumps(message))
+        pipe.ltrim(msgs_key, -max_messages, -1)
+        pipe.hincrby(meta_key, "version", 1)
+        pipe.expire(msgs_key, self.idle_ttl_seconds)
+        pipe.expire(meta_key, self.idle_ttl_seconds)
+        return int(pipe.execute()[2])
+
+    def load_session(self, session_id, limit):
+        meta_key, msgs_key = self._keys(session_id)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hgetall(meta_key)
+        pipe.lrange(msgs_key, -limit, -1)
+        meta, raw = pipe.execute()
+        if not meta:
+            return None
+        messages = [tuple(json.loads(item)) for item in raw]
+        return {
+            "user_id": meta.get("user_id") or None,
+            "agent_type": meta.get("agent_type"),
+            "created_at": meta.get("created_at"),
+            "version": int(meta.get("version", 0))
+        }, messages
+
+    def version(self, session_id):
+        value = self.client.hget(self._keys(session_id)[0], "version")
+        return int(value) if value is not None else None
+
+    def clear_session(self, session_id):
+        meta_key, msgs_key = self._keys(session_id)
+        pipe = self.client.pipeline(transaction=True)
+        pipe.delete(msgs_key)
+        pipe.hincrby(meta_key, "version", 1)
+        return int(pipe.execute()[1])
+
+    def close(self):
+        self.client.close()
+
+
+def create_history_backend(kind: str = settings.HISTORY_BACKEND) -> Optional[HistoryBackend]:
+    """Backend selected by HISTORY_BACKEND; None keeps history in process memory only"""
+    kind = (kind or "memory").lower()
+    if kind == "memory":
+        return None
+    if kind == "sqlite":
+        os.makedirs(os.path.dirname(os.path.abspath(settings.HISTORY_SQLITE_PATH)), exist_ok=True)
+        return SQLiteHistoryBackend(settings.HISTORY_SQLITE_PATH, settings.CONVERSATION_IDLE_TTL_SECONDS)
+    if kind == "redis":
+        return RedisHistoryBackend(settings.REDIS_URL, settings.CONVERSATION_IDLE_TTL_SECONDS)
+    raise ValueError(f"Unknown HISTORY_BACKEND: {kind}")
@@ -0,0 +1,68 @@
+"""
+Shared HTTP client
+One pooled httpx.AsyncClient for outbound provider REST calls, so requests reuse
+warm TCP/TLS connections instead of paying the handshake every time
+"""
+
+from typing import Optional
+import logging
+
+import httpx
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _build_client() -> httpx.AsyncClient:
+    http2 = settings.HTTP2_ENABLED
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("HTTP/2 requested but the 'h2' package is not installed; using HTTP/1.1")
+            http2 = False
+
+    transport = None
+    if settings.FAKE_PROVIDER_ENABLED:
+        from fake_provider import FakeGeminiTransport
+        transport = FakeGeminiTransport()
+        logger.warning("Provider REST calls are answered by the fake Gemini transport")
+
+    return httpx.AsyncClient(
+        transport=transport,
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+        ),
+        timeout=httpx.Timeout(settings.REQUEST_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT)
+    )
+
+
+async def start_http_client():
+    """Create the shared client (called from the app startup event)"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+        logger.info("Shared HTTP client started")
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared client, creating it lazily outside the app lifecycle (scripts, benchmarks)"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+async def close_http_client():
+    """Close pooled connections (called from the app shutdown event)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        logger.info("Shared HTTP client closed")
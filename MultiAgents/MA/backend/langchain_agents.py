@@ -3,7 +3,7 @@ LangChain-based Multi-Agent Mentorship System
 Uses LangGraph for orchestration and supports both OpenAI and Gemini
 """
 
-from typing import Dict, Any, List, Optional, TypedDict, Annotated
+from typing import Dict, Any, AsyncIterator, Callable, List, Optional, Tuple, TypedDict, Annotated
 try:
     from langchain.agents import AgentExecutor, create_openai_functions_agent
 except ImportError:
@@ -31,15 +31,29 @@ from langgraph.graph import StateGraph, END
 from langgraph.graph.message import add_messages
 from langchain_core.runnables import RunnableConfig
 import operator
+import asyncio
 import json
+import time
+import httpx
 from config import settings
 from database import db
+from ai_provider import GEMINI_SDK_MODELS, AIProviderFactory, probe_gemini_model
+from model_probe_cache import model_probe_cache
+from http_client import get_http_client
+from model_router import gemini_router
+from context_builder import ConversationContext, context_builder, estimate_tokens, format_history_lines
+from entity_extractor import entity_extractor
+from admission import PRIORITY_ANONYMOUS, AdmissionRejected, admission_controller, priority_for, retry_after_header
+from metrics import completion_tokens, errors, fallback_hops, prompt_tokens, workflow_duration, workflow_in_flight
 import logging
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+GEMINI_API_BASE = "https://generativelanguage.googleapis.com/v1"
+OPENAI_CHAT_MODEL = "gpt-3.5-turbo"
+
 
 class GraphState(TypedDict):
     """State for LangGraph agent workflow"""
@@ -59,14 +73,23 @@ class LangChainAgentManager:
     def __init__(self):
         self.llm_openai = None
         self.llm_gemini = None
+        self.fingerprint = None
         self._initialize_llms()
     
+    @staticmethod
+    def config_fingerprint() -> int:
+        """Changes whenever a setting the LLM instances are built from changes"""
+        return hash((settings.OPENAI_API_KEY, settings.GEMINI_API_KEY))
+    
     def _initialize_llms(self):
         """Initialize LLM instances for both providers"""
+        self.llm_openai = None
+        self.llm_gemini = None
+        self.fingerprint = self.config_fingerprint()
         try:
             if settings.OPENAI_API_KEY:
                 self.llm_openai = ChatOpenAI(
-                    model="gpt-3.5-turbo",
+                    model=OPENAI_CHAT_MODEL,
                     temperature=0.7,
                     api_key=settings.OPENAI_API_KEY,
                     max_tokens=2000
@@ -107,27 +130,17 @@ class LangChainAgentManager:
         """Get direct Gemini model (bypassing LangChain if needed)"""
         if settings.GEMINI_API_KEY:
             genai.configure(api_key=settings.GEMINI_API_KEY)
-            # Try models that work with current API version
-            models_to_try = ['models/gemini-1.5-flash-latest', 'models/gemini-1.5-pro-latest', 'models/gemini-1.5-flash', 'models/gemini-1.5-pro']
-            for model_name in models_to_try:
-                try:
-                    model = genai.GenerativeModel(model_name)
-                    # Test if it works
-                    test_resp = model.generate_content("test")
-                    logger.info(f"Using Gemini model: {model_name}")
-                    return model
-                except Exception as e:
-                    logger.debug(f"Model {model_name} failed: {e}")
-                    continue
-            # Fallback - try without models/ prefix
-            try:
-                return genai.GenerativeModel('gemini-1.5-flash')
-            except:
-                return genai.GenerativeModel('gemini-1.5-pro')
+            # Model availability is probed once per API key and persisted (see model_probe_cache)
+            model_name = model_probe_cache.choose_model(settings.GEMINI_API_KEY, GEMINI_SDK_MODELS, probe_gemini_model)
+            logger.info(f"Using Gemini model: {model_name}")
+            return genai.GenerativeModel(model_name)
         return None
     
     def get_provider_name(self, provider: Optional[str] = None) -> str:
         """Get the actual provider name being used"""
+        if settings.FAKE_PROVIDER_ENABLED:
+            # The fake provider answers on the Gemini REST path (see fake_provider.FakeGeminiTransport)
+            return "gemini"
         if provider == "openai" and self.llm_openai:
             return "openai"
         elif provider == "gemini" and self.llm_gemini:
@@ -211,10 +224,9 @@ def get_networking_agent_tools() -> List[Tool]:
     ]
 
 
-def get_system_prompt(agent_type: str) -> str:
-    """Get system prompt for each agent type with detailed instructions"""
-    prompts = {
-        "skill_coach": """You are an EXPERT Skill Coach AI agent specializing in recommending online courses and learning resources. Provide COMPREHENSIVE, DETAILED responses like ChatGPT or Claude AI.
+# System prompts with detailed instructions, per agent type
+SYSTEM_PROMPTS: Dict[str, str] = {
+    "skill_coach": """You are an EXPERT Skill Coach AI agent specializing in recommending online courses and learning resources. Provide COMPREHENSIVE, DETAILED responses like ChatGPT or Claude AI.
 
 RESPONSE GUIDELINES:
 - Be thorough and detailed (300-500 words for comprehensive questions)
@@ -258,7 +270,7 @@ For each resource, mention:
 
 Be encouraging, practical, and specific. Prioritize quality resources from reputable platforms.""",
 
-        "career_guide": """You are an expert Career Guide AI agent specializing in scholarships, fellowships, and international academic opportunities for students and researchers.
+    "career_guide": """You are an expert Career Guide AI agent specializing in scholarships, fellowships, and international academic opportunities for students and researchers.
 
 Your role:
 - Guide students on scholarship opportunities (both local and international)
@@ -285,7 +297,7 @@ For each opportunity, mention:
 
 Be realistic, encouraging, and provide actionable advice. Emphasize opportunities suitable for Pakistani students when relevant.""",
 
-        "writing_agent": """You are an expert Writing Assistant AI agent specializing in academic and professional writing for students and researchers.
+    "writing_agent": """You are an expert Writing Assistant AI agent specializing in academic and professional writing for students and researchers.
 
 Your role:
 - Help write and improve research paper abstracts
@@ -322,7 +334,7 @@ For PROPOSALS:
 
 Be constructive, specific, and educational. Explain WHY certain changes improve the writing.""",
 
-        "networking_agent": """You are an expert Networking Guide AI agent specializing in helping students and researchers build their professional network and find relevant events.
+    "networking_agent": """You are an expert Networking Guide AI agent specializing in helping students and researchers build their professional network and find relevant events.
 
 Your role:
 - Recommend academic conferences in their field
@@ -354,8 +366,21 @@ For organizations:
 - How to join
 
 Be encouraging about networking, provide realistic opportunities, and include both in-person and virtual options. Consider opportunities accessible to Pakistani students."""
-    }
-    return prompts.get(agent_type, "You are a helpful AI assistant.")
+}
+DEFAULT_SYSTEM_PROMPT = "You are a helpful AI assistant."
+
+
+def get_system_prompt(agent_type: str) -> str:
+    """Get system prompt for each agent type with detailed instructions"""
+    return SYSTEM_PROMPTS.get(agent_type, DEFAULT_SYSTEM_PROMPT)
+
+
+AGENT_TOOLS = {
+    "skill_coach": get_skill_coach_tools,
+    "career_guide": get_career_guide_tools,
+    "writing_agent": get_writing_agent_tools,
+    "networking_agent": get_networking_agent_tools
+}
 
 
 def create_agent_chain(agent_type: str, provider: Optional[str] = None):
@@ -372,24 +397,11 @@ def create_agent_chain(agent_type: str, provider: Optional[str] = None):
         llm = agent_manager.get_llm(provider)
         
         # Get tools for agent type
-        tools_map = {
-            "skill_coach": get_skill_coach_tools(),
-            "career_guide": get_career_guide_tools(),
-            "writing_agent": get_writing_agent_tools(),
-            "networking_agent": get_networking_agent_tools()
-        }
-        
-        tools = tools_map.get(agent_type, [])
+        tools = AGENT_TOOLS[agent_type]() if agent_type in AGENT_TOOLS else []
         
         # Create prompt template
         system_prompt = get_system_prompt(agent_type)
         
-        # Simplified prompt for better compatibility
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", system_prompt),
-            ("human", "{input}")
-        ])
-        
         # Create agent chain
         # Try OpenAI functions agent if using OpenAI
         if provider_name == "openai" and tools and create_openai_functions_agent:
@@ -415,7 +427,7 @@ def create_agent_chain(agent_type: str, provider: Optional[str] = None):
                 logger.warning(f"Failed to create OpenAI functions agent: {e}. Using simple chain.")
         
         # Fallback: Simple chain (works with OpenAI)
-        chain = prompt | llm
+        chain = create_chat_chain(agent_type, llm)
         logger.info(f"Created simple chain for {agent_type} using {provider_name}")
         return chain
         
@@ -424,6 +436,81 @@ def create_agent_chain(agent_type: str, provider: Optional[str] = None):
         raise
 
 
+def create_chat_chain(agent_type: str, llm):
+    """Prompt | LLM chain without tools (also used for token streaming)"""
+    # Simplified prompt for better compatibility
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", get_system_prompt(agent_type)),
+        MessagesPlaceholder(variable_name="chat_history", optional=True),
+        ("human", "{input}")
+    ])
+    return prompt | llm
+
+
+class AgentChainCache:
+    """Compiled chains and agent executors per (agent_type, provider, kind).
+
+    Prompt templates, tool lists and executors hold no per-request state
+    (input and chat history are passed to ``ainvoke``), so each is built
+    once and shared. ``kind`` is "agent" (tool-calling executor, or the
+    simple chain when tools are unavailable) or "chat" (prompt | LLM, used
+    for streaming). When the provider configuration fingerprint changes the
+    LLM instances are recreated and every cached chain is dropped.
+    """
+    
+    def __init__(self):
+        self._chains: Dict[tuple, Any] = {}
+        self.hits = 0
+        self.builds = 0
+        self.rebuilds = 0
+    
+    def get(self, agent_type: str, provider: Optional[str] = None, kind: str = "agent"):
+        if agent_manager.config_fingerprint() != agent_manager.fingerprint:
+            logger.info("AI provider configuration changed; rebuilding LLM clients and agent chains")
+            agent_manager._initialize_llms()
+            self._chains.clear()
+            self.rebuilds += 1
+        
+        provider_name = agent_manager.get_provider_name(provider)
+        key = (agent_type, provider_name, kind)
+        chain = self._chains.get(key)
+        if chain is not None:
+            self.hits += 1
+            return chain
+        
+        if kind == "chat":
+            chain = create_chat_chain(agent_type, agent_manager.get_llm(provider_name))
+        else:
+            chain = create_agent_chain(agent_type, provider_name)
+        self._chains[key] = chain
+        self.builds += 1
+        return chain
+    
+    def warm(self):
+        """Build every chain for the configured LangChain providers (called at startup)"""
+        if not agent_manager.llm_openai:
+            return
+        for agent_type in SYSTEM_PROMPTS:
+            for kind in ("agent", "chat"):
+                try:
+                    self.get(agent_type, "openai", kind)
+                except Exception as e:
+                    logger.warning(f"Could not prebuild {kind} chain for {agent_type}: {e}")
+        logger.info(f"Prebuilt {len(self._chains)} agent chains")
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            "chains": len(self._chains),
+            "hits": self.hits,
+            "builds": self.builds,
+            "config_rebuilds": self.rebuilds
+        }
+
+
+# Global chain cache
+chain_cache = AgentChainCache()
+
+
 async def run_agent_workflow(
     agent_type: str,
     query: str,
@@ -436,23 +523,13 @@ async def run_agent_workflow(
     Run agent workflow using LangGraph for orchestration
     Supports conversation history for context
     """
+    started = time.perf_counter()
+    provider_used: Optional[str] = None
+    routing_metadata: Dict[str, Any] = {}
+    workflow_in_flight.inc(agent_type)
     try:
-        # Build context from conversation history
-        context_prompt = ""
-        if conversation_history and len(conversation_history) > 0:
-            # Include last few exchanges for context
-            recent_history = conversation_history[-6:]  # Last 3 exchanges (user + assistant pairs)
-            context_lines = []
-            for msg in recent_history:
-                role = msg.get("role", "")
-                content = msg.get("content", "")
-                if role == "user":
-                    context_lines.append(f"User: {content}")
-                elif role == "assistant":
-                    context_lines.append(f"Assistant: {content}")
-            
-            if context_lines:
-                context_prompt = "\n\nPrevious conversation:\n" + "\n".join(context_lines) + "\n\nCurrent question:"
+        # Select prior turns by token budget (older turns are folded into a rolling summary)
+        context = context_builder.build(session_id, conversation_history)
         
         # Initialize state
         initial_state: GraphState = {
@@ -468,133 +545,489 @@ async def run_agent_workflow(
         
         # Determine provider being used
         provider_used = agent_manager.get_provider_name(preferred_provider)
+        routing_metadata.update(context_metadata(context))
         
-        # For Gemini, use REST API directly (most reliable)
+        # For Gemini, use REST API directly (most reliable); every model call, hedges included, takes its own slot
         if provider_used == "gemini":
             try:
-                import httpx
-                import asyncio
-                system_prompt = get_system_prompt(agent_type)
-                
-                # Include conversation history in prompt if available
-                if conversation_history and len(conversation_history) > 0:
-                    history_text = "\n\nPrevious conversation:\n"
-                    recent = conversation_history[-6:]  # Last 3 exchanges
-                    for msg in recent:
-                        role = msg.get("role", "")
-                        content = msg.get("content", "")
-                        if role == "user":
-                            history_text += f"User: {content}\n"
-                        elif role == "assistant":
-                            history_text += f"Assistant: {content}\n"
-                    
-                    full_prompt = f"{system_prompt}{history_text}\n\nCurrent question: {query}\n\nPlease provide a helpful response based on the conversation context."
-                else:
-                    full_prompt = f"{system_prompt}\n\nUser question: {query}\n\nPlease provide a helpful response."
-                
-                # Use REST API directly - try models available for this API key
-                api_key = settings.GEMINI_API_KEY
-                models_to_try = [
-                    'gemini-2.5-flash',      # Latest available
-                    'gemini-2.5-pro',
-                    'gemini-2.0-flash',
-                    'gemini-1.5-flash',
-                    'gemini-1.5-pro'
-                ]
-                
-                response_text = None
-                last_error = None
-                
-                for model_name in models_to_try:
-                    try:
-                        url = f'https://generativelanguage.googleapis.com/v1/models/{model_name}:generateContent?key={api_key}'
-                        data = {
-                            "contents": [{
-                                "parts": [{"text": full_prompt}]
-                            }],
-                            "generationConfig": {
-                                "temperature": 0.7,
-                                "maxOutputTokens": 2000,  # Balanced for speed and quality
-                                "topP": 0.95,
-                                "topK": 40
-                            }
-                        }
-                        
-                        async with httpx.AsyncClient(timeout=30.0) as client:
-                            response = await client.post(url, json=data)
-                            if response.status_code == 200:
-                                result = response.json()
-                                response_text = result.get('candidates', [{}])[0].get('content', {}).get('parts', [{}])[0].get('text', '')
-                                if response_text:
-                                    logger.info(f"Successfully used Gemini REST API with model: {model_name}")
-                                    break
-                            else:
-                                error_data = response.json() if response.headers.get('content-type', '').startswith('application/json') else {}
-                                error_msg = error_data.get('error', {}).get('message', response.text[:100])
-                                logger.debug(f"Model {model_name} failed: {error_msg}")
-                                last_error = f"{model_name}: {error_msg}"
-                                continue
-                    except Exception as e:
-                        logger.debug(f"Model {model_name} exception: {e}")
-                        last_error = f"{model_name}: {str(e)}"
-                        continue
-                
-                if not response_text:
-                    raise Exception(f"All Gemini models failed. Last error: {last_error}. Please check your API key has access to Gemini models.")
+                full_prompt = build_gemini_prompt(agent_type, query, context)
+                response_text, usage = await generate_gemini_rest(full_prompt, routing_metadata, priority=priority_for(user_id))
+                routing_metadata.update(token_usage(
+                    usage.get('promptTokenCount'), usage.get('candidatesTokenCount'), full_prompt, response_text
+                ))
             except Exception as gemini_error:
                 logger.error(f"Gemini REST API failed: {gemini_error}")
                 raise
         else:
-            # For OpenAI, use LangChain
-            chain = create_agent_chain(agent_type, preferred_provider)
-            try:
-                if AgentExecutor and isinstance(chain, AgentExecutor):
-                    # Agent executor returns dict with 'output' key
-                    result = await chain.ainvoke({"input": query, "chat_history": []})
-                    response_text = result.get("output", str(result))
-                else:
-                    # Simple chain returns message object
-                    result = await chain.ainvoke({"input": query})
-                    if hasattr(result, 'content'):
-                        response_text = result.content
-                    elif isinstance(result, str):
-                        response_text = result
+            # Wait for a provider slot; a spike queues here (authenticated users first) instead of hitting upstream 429s
+            async with admission_controller.slot(provider_used, priority_for(user_id)):
+                # For OpenAI, use LangChain
+                chain = chain_cache.get(agent_type, preferred_provider)
+                routing_metadata["model"] = OPENAI_CHAT_MODEL
+                try:
+                    if AgentExecutor and isinstance(chain, AgentExecutor):
+                        # Agent executor returns dict with 'output' key
+                        result = await chain.ainvoke({"input": query, "chat_history": context_messages(context)})
+                        response_text = result.get("output", str(result))
                     else:
-                        response_text = str(result)
-            except Exception as chain_error:
-                logger.error(f"LangChain chain failed: {chain_error}")
-                raise
+                        # Simple chain returns message object
+                        result = await chain.ainvoke({"input": query, "chat_history": context_messages(context)})
+                        if hasattr(result, 'content'):
+                            response_text = result.content
+                        elif isinstance(result, str):
+                            response_text = result
+                        else:
+                            response_text = str(result)
+                    usage = getattr(result, 'usage_metadata', None) or {}
+                    routing_metadata.update(token_usage(
+                        usage.get('input_tokens'), usage.get('output_tokens'), openai_prompt_text(agent_type, query, context), response_text
+                    ))
+                except Exception as chain_error:
+                    logger.error(f"LangChain chain failed: {chain_error}")
+                    raise
+        
+        result = build_workflow_result(agent_type, query, response_text, provider_used, routing_metadata)
+        record_workflow_metrics(agent_type, provider_used, routing_metadata, started)
+        return result
         
-        # Extract metadata
-        metadata = {
-            "query_length": len(query),
-            "response_length": len(response_text),
-            "provider": provider_used,
-            "agent_type": agent_type
+    except AdmissionRejected as e:
+        logger.warning(f"Shed {agent_type} request: {e}")
+        record_workflow_metrics(agent_type, e.provider, routing_metadata, started, e)
+        return workflow_error_result(agent_type, e)
+    except Exception as e:
+        logger.error(f"Error in agent workflow: {e}", exc_info=True)
+        record_workflow_metrics(agent_type, provider_used, routing_metadata, started, e)
+        return workflow_error_result(agent_type, e)
+    finally:
+        workflow_in_flight.dec(agent_type)
+
+
+async def gemini_rest_call(
+    api_key: str,
+    model_name: str,
+    full_prompt: str,
+    priority: int = PRIORITY_ANONYMOUS,
+    admitted: Optional[Callable[[], None]] = None
+) -> Tuple[str, Dict[str, Any]]:
+    """One generateContent call in its own admission slot: (response text, usageMetadata), or raises.
+
+    ``admitted`` is called once the slot is held. Updates the model router and
+    upstream error counters either way; a shed call raises AdmissionRejected.
+    """
+    try:
+        async with admission_controller.slot("gemini", priority):
+            if admitted:
+                admitted()
+            started = time.monotonic()
+            url = f'{GEMINI_API_BASE}/models/{model_name}:generateContent?key={api_key}'
+            response = await get_http_client().post(url, json=gemini_request_body(full_prompt))
+    except AdmissionRejected:
+        raise
+    except Exception as e:
+        logger.debug(f"Model {model_name} exception: {e}")
+        gemini_router.record_failure(api_key, model_name)
+        errors.inc("upstream", "gemini", error_class(e))
+        raise Exception(f"{model_name}: {str(e)}")
+    
+    if response.status_code != 200:
+        error_data = response.json() if response.headers.get('content-type', '').startswith('application/json') else {}
+        error_msg = error_data.get('error', {}).get('message', response.text[:100])
+        logger.debug(f"Model {model_name} failed: {error_msg}")
+        gemini_router.record_failure(api_key, model_name, response.status_code)
+        errors.inc("upstream", "gemini", f"http_{response.status_code}")
+        raise Exception(f"{model_name}: {error_msg}")
+    
+    result = response.json()
+    response_text = result.get('candidates', [{}])[0].get('content', {}).get('parts', [{}])[0].get('text', '')
+    if not response_text:
+        gemini_router.record_failure(api_key, model_name)
+        errors.inc("upstream", "gemini", "empty_response")
+        raise Exception(f"{model_name}: empty response")
+    
+    logger.info(f"Successfully used Gemini REST API with model: {model_name}")
+    gemini_router.record_success(api_key, model_name)
+    AIProviderFactory.hedge_policy.record_latency(model_name, time.monotonic() - started)
+    return response_text, result.get('usageMetadata') or {}
+
+
+async def generate_gemini_rest(
+    full_prompt: str,
+    routing_metadata: Dict[str, Any],
+    hedge: Optional[bool] = None,
+    priority: int = PRIORITY_ANONYMOUS
+) -> Tuple[str, Dict[str, Any]]:
+    """Gemini REST with model fallback: (response text, usageMetadata).
+
+    The router puts the last working model first and skips models that
+    recently failed for this API key. With hedging on, a call slower than
+    that model's usual latency also starts the next model in the plan, and
+    the first answer wins. Each call queues for its own admission slot at
+    ``priority``. Model, attempts and skipped models go into
+    ``routing_metadata``.
+    """
+    api_key = settings.GEMINI_API_KEY
+    models_to_try, skipped_models = gemini_router.plan(api_key)
+    attempts = 0
+    last_error: Optional[Exception] = None
+    model_used = None
+    response = None
+    
+    def start(model_name: str, admitted: Optional[Callable[[], None]] = None):
+        nonlocal attempts
+        attempts += 1
+        return gemini_rest_call(api_key, model_name, full_prompt, priority, admitted)
+    
+    if hedge if hedge is not None else settings.HEDGE_ENABLED:
+        try:
+            response, model_used = await AIProviderFactory.hedge_policy.race(
+                models_to_try, start, lambda model_name, error: None
+            )
+        except Exception as e:
+            last_error = e
+    else:
+        for model_name in models_to_try:
+            try:
+                response = await start(model_name)
+                model_used = model_name
+                break
+            except AdmissionRejected as e:
+                # Every model shares the gemini gate; the next one would be shed too
+                last_error = e
+                break
+            except Exception as e:
+                last_error = e
+    
+    attempts_avoided = gemini_router.record_request(attempts, model_used)
+    routing_metadata.update({
+        "model": model_used,
+        "model_attempts": attempts,
+        "models_skipped": skipped_models,
+        "attempts_avoided": attempts_avoided
+    })
+    if attempts_avoided:
+        logger.info(f"Model router avoided {attempts_avoided} wasted attempt(s)")
+    
+    if response is None:
+        if isinstance(last_error, AdmissionRejected):
+            raise last_error
+        raise Exception(f"All Gemini models failed. Last error: {last_error}. Please check your API key has access to Gemini models.")
+    return response
+
+
+def error_class(error: Exception) -> str:
+    """Short, bounded label for an exception (the providers raise bare Exception for API failures)"""
+    if isinstance(error, AdmissionRejected):
+        return f"shed_{error.reason}"
+    if isinstance(error, (asyncio.TimeoutError, httpx.TimeoutException)):
+        return "timeout"
+    if isinstance(error, httpx.TransportError):
+        return "connection"
+    if type(error) is Exception:
+        return "provider_error"
+    return type(error).__name__
+
+
+def token_usage(prompt_tokens: Optional[int], completion_tokens: Optional[int], prompt: str, response: str) -> Dict[str, Any]:
+    """Token counts reported by the provider, or estimates when it reported none"""
+    if prompt_tokens is None or completion_tokens is None:
+        return {"prompt_tokens": estimate_tokens(prompt), "completion_tokens": estimate_tokens(response), "tokens_estimated": True}
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "tokens_estimated": False}
+
+
+def openai_prompt_text(agent_type: str, query: str, context: ConversationContext) -> str:
+    """The text sent to the OpenAI chain, for token estimates"""
+    return "\n".join([get_system_prompt(agent_type), *format_history_lines(context), query])
+
+
+def record_workflow_metrics(
+    agent_type: str,
+    provider: Optional[str],
+    metadata: Dict[str, Any],
+    started: float,
+    error: Optional[Exception] = None
+):
+    """Latency, tokens, model fallback hops and errors of one workflow run for GET /metrics"""
+    provider = provider or "unknown"
+    model = metadata.get("model") or "unknown"
+    workflow_duration.observe(time.perf_counter() - started, agent_type, provider, model, "error" if error else "ok")
+    if metadata.get("model_attempts", 0) > 1:
+        fallback_hops.inc("model", provider, amount=metadata["model_attempts"] - 1)
+    if error is not None:
+        errors.inc("workflow", provider, error_class(error))
+        return
+    prompt_tokens.inc(agent_type, provider, model, amount=metadata.get("prompt_tokens", 0))
+    completion_tokens.inc(agent_type, provider, model, amount=metadata.get("completion_tokens", 0))
+
+
+def build_gemini_prompt(agent_type: str, query: str, context: Optional[ConversationContext] = None) -> str:
+    """Single-string Gemini prompt: system prompt, budgeted conversation context and the question"""
+    system_prompt = get_system_prompt(agent_type)
+    
+    # Include conversation history in prompt if available
+    history_lines = format_history_lines(context) if context else []
+    if history_lines:
+        history_text = "\n\nPrevious conversation:\n" + "\n".join(history_lines) + "\n"
+        return f"{system_prompt}{history_text}\n\nCurrent question: {query}\n\nPlease provide a helpful response based on the conversation context."
+    return f"{system_prompt}\n\nUser question: {query}\n\nPlease provide a helpful response."
+
+
+def context_messages(context: ConversationContext) -> List[BaseMessage]:
+    """Chat messages for LangChain prompts (the summary, if any, as a leading system message)"""
+    messages: List[BaseMessage] = []
+    if context.summary:
+        messages.append(SystemMessage(content=f"Summary of earlier conversation:\n{context.summary}"))
+    for msg in context.turns:
+        if msg["role"] == "user":
+            messages.append(HumanMessage(content=msg["content"]))
+        else:
+            messages.append(AIMessage(content=msg["content"]))
+    return messages
+
+
+def context_metadata(context: ConversationContext) -> Dict[str, Any]:
+    return {
+        "context_tokens": context.tokens,
+        "context_messages": len(context.turns),
+        "context_omitted": context.omitted,
+        "context_summarized": context.summary is not None
+    }
+
+
+def gemini_request_body(full_prompt: str) -> Dict[str, Any]:
+    return {
+        "contents": [{
+            "parts": [{"text": full_prompt}]
+        }],
+        "generationConfig": {
+            "temperature": 0.7,
+            "maxOutputTokens": 2000,  # Balanced for speed and quality
+            "topP": 0.95,
+            "topK": 40
+        }
+    }
+
+
+def build_workflow_result(
+    agent_type: str,
+    query: str,
+    response_text: str,
+    provider_used: str,
+    extra_metadata: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Successful workflow result with extracted entities and metadata"""
+    # Extract metadata
+    metadata = {
+        "query_length": len(query),
+        "response_length": len(response_text),
+        "provider": provider_used,
+        "agent_type": agent_type,
+        **(extra_metadata or {})
+    }
+    
+    # Process response based on agent type
+    processed_response = process_agent_response(agent_type, response_text)
+    
+    return {
+        "success": True,
+        "agent_type": agent_type,
+        "agent_name": get_agent_name(agent_type),
+        "response": response_text,
+        "ai_provider": provider_used,
+        **processed_response,
+        # After processed_response so its own "metadata" key does not replace the merged one
+        "metadata": {**metadata, **processed_response.get("metadata", {})}
+    }
+
+
+def workflow_error_result(agent_type: str, error: Exception) -> Dict[str, Any]:
+    result = {
+        "success": False,
+        "agent_type": agent_type,
+        "agent_name": get_agent_name(agent_type),
+        "error": str(error),
+        "response": f"I apologize, but I encountered an error processing your request: {str(error)}"
+    }
+    if isinstance(error, AdmissionRejected):
+        # Lets the endpoint answer 503 with Retry-After instead of a generic failure
+        result["response"] = f"The mentorship service is busy right now. Please retry in {retry_after_header(error)} seconds."
+        result["metadata"] = {
+            "shed": True,
+            "shed_reason": error.reason,
+            "provider": error.provider,
+            "retry_after": retry_after_header(error)
         }
+    return result
+
+
+async def admitted_stream(token_stream: AsyncIterator[str], provider: str, priority: int) -> AsyncIterator[str]:
+    """Read a provider stream under an admission slot, yielding its chunks as they arrive.
+
+    A separate task reads upstream into a buffer, so the slot is released once
+    the provider has finished rather than when a slow client has received the
+    last chunk. Upstream errors (AdmissionRejected included) are re-raised
+    after the buffered chunks; closing the generator cancels the upstream read.
+    """
+    buffer: asyncio.Queue = asyncio.Queue()  # bounded by the response length
+
+    async def read_upstream():
+        try:
+            async with admission_controller.slot(provider, priority):
+                async for text in token_stream:
+                    buffer.put_nowait(text)
+        finally:
+            buffer.put_nowait(None)
+
+    reader = asyncio.create_task(read_upstream())
+    try:
+        while True:
+            text = await buffer.get()
+            if text is None:
+                break
+            yield text
+        await reader
+    finally:
+        if not reader.done():
+            reader.cancel()
+
+
+async def stream_agent_workflow(
+    agent_type: str,
+    query: str,
+    user_id: Optional[str] = None,
+    preferred_provider: Optional[str] = None,
+    session_id: Optional[str] = None,
+    conversation_history: Optional[List[Dict]] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming variant of run_agent_workflow
+    Yields {"type": "token", "text": ...} events as the provider produces them, then a
+    single {"type": "done", "result": ...} event with the same result run_agent_workflow
+    returns (entity extraction runs once the full text is known)
+    """
+    started = time.perf_counter()
+    first_token_at: Optional[float] = None
+    chunks: List[str] = []
+    provider_used: Optional[str] = None
+    routing_metadata: Dict[str, Any] = {}
+    workflow_in_flight.inc(agent_type)
+    
+    try:
+        provider_used = agent_manager.get_provider_name(preferred_provider)
+        context = context_builder.build(session_id, conversation_history)
+        routing_metadata.update(context_metadata(context))
         
-        # Process response based on agent type
-        processed_response = process_agent_response(agent_type, response_text)
+        if provider_used == "gemini":
+            token_stream = _stream_gemini(agent_type, query, context, routing_metadata)
+        else:
+            routing_metadata["model"] = OPENAI_CHAT_MODEL
+            token_stream = _stream_openai(agent_type, query, context)
         
-        return {
-            "success": True,
-            "agent_type": agent_type,
-            "agent_name": get_agent_name(agent_type),
-            "response": response_text,
-            "ai_provider": provider_used,
-            "metadata": {**metadata, **processed_response.get("metadata", {})},
-            **processed_response
-        }
+        async for text in admitted_stream(token_stream, provider_used, priority_for(user_id)):
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+                logger.info(f"Time to first token for {agent_type}: {(first_token_at - started) * 1000:.0f} ms")
+            chunks.append(text)
+            yield {"type": "token", "text": text}
+        
+        response_text = "".join(chunks)
+        if not response_text:
+            raise Exception("Provider returned an empty response")
         
+        finished = time.perf_counter()
+        routing_metadata["time_to_first_token_ms"] = round((first_token_at - started) * 1000, 1)
+        routing_metadata["total_time_ms"] = round((finished - started) * 1000, 1)
+        routing_metadata["streamed"] = True
+        if "prompt_tokens" not in routing_metadata:
+            prompt_text = (build_gemini_prompt(agent_type, query, context) if provider_used == "gemini"
+                           else openai_prompt_text(agent_type, query, context))
+            routing_metadata.update(token_usage(None, None, prompt_text, response_text))
+        record_workflow_metrics(agent_type, provider_used, routing_metadata, started)
+        yield {"type": "done", "result": build_workflow_result(agent_type, query, response_text, provider_used, routing_metadata)}
+    
+    except AdmissionRejected as e:
+        logger.warning(f"Shed streaming {agent_type} request: {e}")
+        record_workflow_metrics(agent_type, e.provider, routing_metadata, started, e)
+        yield {"type": "error", "result": workflow_error_result(agent_type, e)}
     except Exception as e:
-        logger.error(f"Error in agent workflow: {e}", exc_info=True)
-        return {
-            "success": False,
-            "agent_type": agent_type,
-            "agent_name": get_agent_name(agent_type),
-            "error": str(e),
-            "response": f"I apologize, but I encountered an error processing your request: {str(e)}"
-        }
+        logger.error(f"Error in streaming agent workflow: {e}", exc_info=True)
+        record_workflow_metrics(agent_type, provider_used, routing_metadata, started, e)
+        yield {"type": "error", "result": workflow_error_result(agent_type, e)}
+    finally:
+        workflow_in_flight.dec(agent_type)
+
+
+async def _stream_gemini(
+    agent_type: str,
+    query: str,
+    context: ConversationContext,
+    routing_metadata: Dict[str, Any]
+) -> AsyncIterator[str]:
+    """Gemini streamGenerateContent over SSE; falls back to the next model only before the first token"""
+    full_prompt = build_gemini_prompt(agent_type, query, context)
+    api_key = settings.GEMINI_API_KEY
+    models_to_try, skipped_models = gemini_router.plan(api_key)
+    last_error = None
+    attempts = 0
+    
+    for model_name in models_to_try:
+        attempts += 1
+        url = f'{GEMINI_API_BASE}/models/{model_name}:streamGenerateContent?alt=sse&key={api_key}'
+        emitted = False
+        usage: Dict[str, Any] = {}
+        try:
+            async with get_http_client().stream("POST", url, json=gemini_request_body(full_prompt)) as response:
+                if response.status_code != 200:
+                    body = (await response.aread()).decode("utf-8", "replace")
+                    logger.debug(f"Model {model_name} stream failed: {body[:100]}")
+                    gemini_router.record_failure(api_key, model_name, response.status_code)
+                    errors.inc("upstream", "gemini", f"http_{response.status_code}")
+                    last_error = f"{model_name}: HTTP {response.status_code}"
+                    continue
+                
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    payload = json.loads(line[5:].strip())
+                    # Each chunk carries the running totals; the last one holds the final counts
+                    usage = payload.get('usageMetadata') or usage
+                    for part in payload.get('candidates', [{}])[0].get('content', {}).get('parts', []):
+                        if part.get('text'):
+                            emitted = True
+                            yield part['text']
+            
+            if emitted:
+                gemini_router.record_success(api_key, model_name)
+                routing_metadata.update({
+                    "model": model_name,
+                    "model_attempts": attempts,
+                    "models_skipped": skipped_models,
+                    "attempts_avoided": gemini_router.record_request(attempts, model_name)
+                })
+                if usage.get('promptTokenCount') is not None and usage.get('candidatesTokenCount') is not None:
+                    routing_metadata.update(token_usage(usage['promptTokenCount'], usage['candidatesTokenCount'], full_prompt, ""))
+                return
+            gemini_router.record_failure(api_key, model_name)
+            errors.inc("upstream", "gemini", "empty_response")
+            last_error = f"{model_name}: empty stream"
+        except Exception as e:
+            if emitted:
+                # Tokens already reached the client; switching models would splice two answers
+                raise
+            logger.debug(f"Model {model_name} stream exception: {e}")
+            gemini_router.record_failure(api_key, model_name)
+            errors.inc("upstream", "gemini", error_class(e))
+            last_error = f"{model_name}: {str(e)}"
+    
+    gemini_router.record_request(attempts, None)
+    raise Exception(f"All Gemini models failed. Last error: {last_error}. Please check your API key has access to Gemini models.")
+
+
+async def _stream_openai(agent_type: str, query: str, context: ConversationContext) -> AsyncIterator[str]:
+    """OpenAI token streaming through the LangChain chat model"""
+    chain = chain_cache.get(agent_type, "openai", kind="chat")
+    async for chunk in chain.astream({"input": query, "chat_history": context_messages(context)}):
+        if chunk.content:
+            yield chunk.content
 
 
 def process_agent_response(agent_type: str, response: str) -> Dict[str, Any]:
@@ -621,44 +1054,50 @@ def process_agent_response(agent_type: str, response: str) -> Dict[str, Any]:
     return result
 
 
+def _entity_fields(entity: Dict[str, Any]) -> Dict[str, Any]:
+    """Location and links shared by every extracted entity"""
+    return {
+        "mentioned": True,
+        "start": entity["start"],
+        "end": entity["end"],
+        "mentions": entity["mentions"],
+        "offsets": entity["offsets"],
+        "url": entity["url"],
+        "deadline": entity["deadline"]
+    }
+
+
+def _format_resource(entity: Dict[str, Any]) -> Dict[str, Any]:
+    return {"type": "course", "provider": entity["name"], **_entity_fields(entity)}
+
+
+def _format_opportunity(entity: Dict[str, Any]) -> Dict[str, Any]:
+    return {"type": entity["categories"][0], "program": entity["name"], "categories": entity["categories"],
+            **_entity_fields(entity)}
+
+
+def _format_event(entity: Dict[str, Any]) -> Dict[str, Any]:
+    return {"type": entity["name"], **_entity_fields(entity)}
+
+
 def extract_resources(response: str) -> List[Dict[str, Any]]:
     """Extract course/platform mentions from response"""
-    resources = []
-    platforms = ["Coursera", "Udemy", "edX", "YouTube", "Khan Academy", "Pluralsight",
-                "LinkedIn Learning", "Skillshare", "FreeCodeCamp", "Codecademy", 
-                "MIT OpenCourseWare", "Stanford Online", "FutureLearn"]
-    
-    for platform in platforms:
-        if platform.lower() in response.lower():
-            resources.append({
-                "type": "course",
-                "provider": platform,
-                "mentioned": True
-            })
-    
-    return resources
+    return [_format_resource(entity) for entity in entity_extractor.extract(response)["resource"]]
 
 
 def extract_opportunities(response: str) -> List[Dict[str, Any]]:
-    """Extract scholarship/opportunity mentions"""
-    opportunities = []
-    keywords = {
-        "scholarship": ["Fulbright", "Chevening", "DAAD", "Commonwealth", "Erasmus", 
-                       "Rhodes", "Gates", "Schwarzman"],
-        "fellowship": ["Rhodes", "Gates", "Schwarzman", "Fulbright", "Humboldt"],
-        "grant": ["NSF", "NIH", "research grant", "Marie Curie"]
+    """Extract scholarship/opportunity mentions (one entry per program, with all its categories)"""
+    return [_format_opportunity(entity) for entity in entity_extractor.extract(response)["opportunity"]]
+
+
+def extract_entities(response: str) -> Dict[str, List[Dict[str, Any]]]:
+    """Resources, opportunities and events from one scan, whatever the agent type"""
+    extracted = entity_extractor.extract(response)
+    return {
+        "resources": [_format_resource(entity) for entity in extracted["resource"]],
+        "opportunities": [_format_opportunity(entity) for entity in extracted["opportunity"]],
+        "events": [_format_event(entity) for entity in extracted["event"]]
     }
-    
-    for opp_type, programs in keywords.items():
-        for program in programs:
-            if program.lower() in response.lower():
-                opportunities.append({
-                    "type": opp_type,
-                    "program": program,
-                    "mentioned": True
-                })
-    
-    return opportunities
 
 
 def detect_writing_type(response: str) -> str:
@@ -678,17 +1117,7 @@ def detect_writing_type(response: str) -> str:
 
 def extract_events(response: str) -> List[Dict[str, Any]]:
     """Extract event/conference mentions"""
-    events = []
-    event_types = ["conference", "workshop", "seminar", "webinar", "symposium", "summit"]
-    
-    for event_type in event_types:
-        if event_type in response.lower():
-            events.append({
-                "type": event_type,
-                "mentioned": True
-            })
-    
-    return events
+    return [_format_event(entity) for entity in entity_extractor.extract(response)["event"]]
 
 
 def get_agent_name(agent_type: str) -> str:
@@ -5,16 +5,32 @@ Multi-Agent Mentorship API with LangChain integration
 
 from fastapi import FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.exceptions import RequestValidationError
 from datetime import datetime
-from typing import Dict
+from typing import Any, Dict, Optional
+import asyncio
+import json
 import logging
 import traceback
 
-from models import MentorshipRequest, MentorshipResponse, AgentInfo, HealthResponse
-from agents import AgentFactory
+from models import (
+    MentorshipRequest, MentorshipResponse, AgentInfo, HealthResponse, PageResponse, PanelRequest, PanelResponse
+)
+from agents import AgentFactory, run_panel
 from config import settings
+from http_client import start_http_client, close_http_client
+from ai_provider import AIProviderFactory
+from model_router import gemini_router
+from semantic_cache import semantic_cache
+from conversation_manager import conversation_manager
+from database import db
+from read_cache import read_cache
+from langchain_agents import chain_cache
+from query_router import query_router
+from rate_limiter import RateLimitMiddleware, rate_limiter
+from admission import admission_controller
+from metrics import metrics
 
 # Configure logging
 logging.basicConfig(
@@ -32,6 +48,17 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
+# Rate limiting (added before CORS so CORS wraps it and 429 responses carry CORS headers)
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(
+        RateLimitMiddleware,
+        limiter=rate_limiter,
+        paths=[p.strip() for p in settings.RATE_LIMIT_PATHS.split(",") if p.strip()],
+        trust_forwarded=settings.RATE_LIMIT_TRUST_FORWARDED,
+        # A panel call runs one agent per requested agent type
+        fan_out={"/mentorship/panel": (len(settings.PANEL_DEFAULT_AGENTS.split(",")), len(AgentFactory._agents))}
+    )
+
 # CORS Middleware
 app.add_middleware(
     CORSMiddleware,
@@ -85,6 +112,23 @@ async def startup_event():
     except ValueError as e:
         logger.warning(f"Configuration warning: {e}")
 
+    await start_http_client()
+    await db.start()
+    chain_cache.warm()
+    if settings.ROUTER_TRAIN_FROM_DB and db.enabled:
+        # Kept on app.state so the task is not garbage-collected while it runs
+        app.state.router_training = asyncio.create_task(query_router.train_from_database())
+
+
+# Shutdown Event
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release shared resources on shutdown"""
+    await db.close()
+    await close_http_client()
+    await rate_limiter.store.close()
+    conversation_manager.close()
+
 
 # Health Check Endpoint
 @app.get("/", response_model=HealthResponse, tags=["Health"])
@@ -112,28 +156,84 @@ async def get_agents():
         )
 
 
+# Runtime Statistics
+@app.get("/stats", tags=["Health"])
+async def get_stats():
+    """Provider routing, hedging, cache and conversation statistics since startup"""
+    fake_provider = None
+    if settings.FAKE_PROVIDER_ENABLED:
+        from fake_provider import get_fake_backend
+        fake_provider = get_fake_backend().stats()
+    return {
+        "hedging": AIProviderFactory.hedge_policy.stats(),
+        "model_routing": gemini_router.stats(),
+        "semantic_cache": semantic_cache.stats(),
+        "conversations": conversation_manager.stats(),
+        "db_writer": db.writer.stats(),
+        "read_cache": read_cache.stats(),
+        "agent_chains": chain_cache.stats(),
+        "query_router": query_router.stats(),
+        "rate_limit": rate_limiter.stats(),
+        "admission": admission_controller.stats(),
+        "fake_provider": fake_provider
+    }
+
+
+# Prometheus Metrics
+@app.get("/metrics", response_class=PlainTextResponse, tags=["Health"])
+async def get_metrics():
+    """Latency histograms, token counts, fallback hops, errors, cache hits and in-flight requests (Prometheus text format)"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+AUTO_AGENT = "auto"
+
+
+async def resolve_agent_type(request: MentorshipRequest) -> Optional[Dict[str, Any]]:
+    """Pick the agent for agent_type="auto" (in place); returns the routing decision, or None"""
+    if request.agent_type != AUTO_AGENT:
+        return None
+    # A continued conversation stays with the agent it was started with
+    session_agent = None
+    if request.session_id:
+        session_agent = await conversation_manager.run_blocking(conversation_manager.get_agent_type, request.session_id)
+    if session_agent in AgentFactory._agents:
+        request.agent_type = session_agent
+        return {"auto": True, "source": "session", "agent_type": session_agent}
+    routing = query_router.route(request.query or "")
+    request.agent_type = routing["agent_type"]
+    logger.info(f"Routed query to {routing['agent_type']} (confidence {routing['confidence']})")
+    return {"auto": True, "source": "router", **routing}
+
+
+def validate_mentorship_request(request: MentorshipRequest):
+    """Reject unknown agents and empty queries (raises HTTPException)"""
+    # Validate agent type
+    if request.agent_type not in AgentFactory._agents:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid agent type: {request.agent_type}. Available: {list(AgentFactory._agents.keys())}"
+        )
+    
+    # Validate query
+    if not request.query or not request.query.strip():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Query cannot be empty"
+        )
+    
+    # Validate provider if specified
+    if request.preferred_provider and request.preferred_provider not in settings.get_available_providers():
+        logger.warning(f"Unavailable provider '{request.preferred_provider}' requested. Will use fallback.")
+
+
 # Mentorship Endpoint
 @app.post("/mentorship", response_model=MentorshipResponse, tags=["Mentorship"])
 async def get_mentorship(request: MentorshipRequest):
     """Get mentorship response from specified agent"""
     try:
-        # Validate agent type
-        if request.agent_type not in AgentFactory._agents:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid agent type: {request.agent_type}. Available: {list(AgentFactory._agents.keys())}"
-            )
-        
-        # Validate query
-        if not request.query or not request.query.strip():
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Query cannot be empty"
-            )
-        
-        # Validate provider if specified
-        if request.preferred_provider and request.preferred_provider not in settings.get_available_providers():
-            logger.warning(f"Unavailable provider '{request.preferred_provider}' requested. Will use fallback.")
+        agent_routing = await resolve_agent_type(request)
+        validate_mentorship_request(request)
         
         logger.info(f"Processing request: agent={request.agent_type}, provider={request.preferred_provider}")
         
@@ -143,13 +243,23 @@ async def get_mentorship(request: MentorshipRequest):
             query=request.query,
             user_id=request.user_id,
             preferred_provider=request.preferred_provider,
-            session_id=request.session_id
+            session_id=request.session_id,
+            agent_routing=agent_routing
         )
         
         # Validate result
         if not isinstance(result, dict):
             raise ValueError("Agent returned invalid result format")
         
+        # Shed by admission control: tell the client when to come back
+        shed = (result.get("metadata") or {}) if not result.get("success") else {}
+        if shed.get("shed"):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=result["error"],
+                headers={"Retry-After": shed["retry_after"]}
+            )
+        
         return MentorshipResponse(**result)
         
     except ValueError as e:
@@ -168,6 +278,75 @@ async def get_mentorship(request: MentorshipRequest):
         )
 
 
+# Streaming Mentorship Endpoint (declared before /mentorship/{agent_type} so "stream" is not taken as an agent type)
+@app.post("/mentorship/stream", tags=["Mentorship"])
+async def stream_mentorship(request: MentorshipRequest):
+    """Stream the agent response as server-sent events.
+
+    Events: `session` (session_id), `token` (text chunk), then `done` with the full
+    MentorshipResponse payload, or `error`.
+    """
+    agent_routing = await resolve_agent_type(request)
+    validate_mentorship_request(request)
+    logger.info(f"Streaming request: agent={request.agent_type}, provider={request.preferred_provider}")
+    agent = AgentFactory.get_agent(request.agent_type)
+
+    async def event_stream():
+        async for event in agent.stream_response(
+            query=request.query,
+            user_id=request.user_id,
+            preferred_provider=request.preferred_provider,
+            session_id=request.session_id,
+            agent_routing=agent_routing
+        ):
+            event_type = event["type"]
+            if event_type in ("done", "error"):
+                data = MentorshipResponse(**event["result"]).model_dump(exclude_none=True)
+            else:
+                data = {key: value for key, value in event.items() if key != "type"}
+            yield f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# Multi-agent Panel Endpoint (declared before /mentorship/{agent_type} so "panel" is not taken as an agent type)
+@app.post("/mentorship/panel", response_model=PanelResponse, tags=["Mentorship"])
+async def get_mentorship_panel(request: PanelRequest):
+    """Ask several agents the same question at once.
+
+    Agents run concurrently under one shared deadline, so the response takes
+    about as long as the slowest agent rather than the sum of all of them.
+    """
+    agent_types = list(dict.fromkeys(request.agent_types or settings.PANEL_DEFAULT_AGENTS.split(",")))
+    unknown = [agent_type for agent_type in agent_types if agent_type not in AgentFactory._agents]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid agent types: {unknown}. Available: {list(AgentFactory._agents.keys())}"
+        )
+    if not request.query or not request.query.strip():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Query cannot be empty"
+        )
+
+    timeout = min(request.timeout_seconds or settings.PANEL_TIMEOUT_SECONDS, settings.PANEL_TIMEOUT_SECONDS)
+    logger.info(f"Panel request: agents={agent_types}, provider={request.preferred_provider}, deadline={timeout}s")
+    result = await run_panel(
+        query=request.query,
+        agent_types=agent_types,
+        user_id=request.user_id,
+        preferred_provider=request.preferred_provider,
+        session_ids=request.session_ids,
+        timeout=timeout
+    )
+    return PanelResponse(**result)
+
+
 # Agent-specific Mentorship Endpoint
 @app.post("/mentorship/{agent_type}", response_model=MentorshipResponse, tags=["Mentorship"])
 async def get_mentorship_by_agent(agent_type: str, request: MentorshipRequest):
@@ -176,8 +355,8 @@ async def get_mentorship_by_agent(agent_type: str, request: MentorshipRequest):
         # Override agent type from URL
         request.agent_type = agent_type
         
-        # Validate agent type
-        if agent_type not in AgentFactory._agents:
+        # Validate agent type ("auto" is resolved by the main endpoint)
+        if agent_type != AUTO_AGENT and agent_type not in AgentFactory._agents:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Invalid agent type: {agent_type}. Available: {list(AgentFactory._agents.keys())}"
@@ -196,6 +375,54 @@ async def get_mentorship_by_agent(agent_type: str, request: MentorshipRequest):
         )
 
 
+def parse_fields(fields: Optional[str]):
+    """Split a comma-separated `fields` query parameter"""
+    return [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+
+
+def require_database():
+    """503 when Supabase is not configured"""
+    if not db.enabled:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Database not configured"
+        )
+
+
+# History Endpoints
+@app.get("/users/{user_id}/sessions", response_model=PageResponse, tags=["History"])
+async def list_user_sessions(
+    user_id: str,
+    agent_type: Optional[str] = None,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
+):
+    """A user's mentorship sessions, newest first (keyset pagination; `fields` is a comma-separated column list)"""
+    require_database()
+    try:
+        items, next_cursor, cached = await db.get_user_sessions(user_id, agent_type, limit, cursor, parse_fields(fields))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return PageResponse(items=items, next_cursor=next_cursor, cached=cached)
+
+
+@app.get("/sessions/{session_id}/resources", response_model=PageResponse, tags=["History"])
+async def list_session_resources(
+    session_id: str,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
+):
+    """Resources recommended in a session, most relevant first (keyset pagination)"""
+    require_database()
+    try:
+        items, next_cursor, cached = await db.get_session_resources(session_id, limit, cursor, parse_fields(fields))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return PageResponse(items=items, next_cursor=next_cursor, cached=cached)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
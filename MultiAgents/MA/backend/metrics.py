@@ -0,0 +1,182 @@
+"""
+Prometheus metrics
+A small in-process registry of counters, gauges and histograms rendered in the
+Prometheus text exposition format by GET /metrics. Recording a sample is a dict update,
+cheap enough to leave on for every request
+"""
+
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+import math
+
+# Seconds; model calls take from a few hundred milliseconds to tens of seconds
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+WAIT_BUCKETS = (0.005, 0.05, 0.25, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r'\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """Monotonic total per label combination"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+                for key, value in self._values.items()]
+
+
+class Gauge(Counter):
+    """Value that goes up and down (in-flight requests)"""
+
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) - amount
+
+    def set(self, value: float, *labels: str):
+        self._values[labels] = value
+
+
+class CallbackGauge(Counter):
+    """Gauge read from the application at scrape time instead of being updated on every change"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str], read: Callable[[], Dict[Tuple[str, ...], float]]):
+        super().__init__(name, documentation, labels)
+        self.read = read
+
+    def samples(self) -> List[str]:
+        self._values = self.read()
+        return super().samples()
+
+
+class Histogram:
+    """Bucketed distribution per label combination.
+
+    ``observe`` increments a single bucket found by bisection; the cumulative
+    ``le`` counts Prometheus expects are only built when rendering.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.bounds = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last is +Inf), sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self._values.get(labels)
+        if series is None:
+            series = self._values[labels] = [[0] * (len(self.bounds) + 1), 0.0]
+        series[0][bisect_left(self.bounds, value)] += 1
+        series[1] += value
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.bounds + (math.inf,), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Metrics in registration order; only updated from the event loop, so no locking"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labels))
+
+    def callback_gauge(self, name: str, documentation: str, labels: Sequence[str],
+                       read: Callable[[], Dict[Tuple[str, ...], float]]) -> CallbackGauge:
+        return self._register(CallbackGauge(name, documentation, labels, read))
+
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+# Global metrics registry
+metrics = MetricsRegistry()
+
+workflow_duration = metrics.histogram(
+    "mentorship_workflow_duration_seconds",
+    "Agent workflow latency, including any admission queue wait",
+    ("agent_type", "provider", "model", "status")
+)
+workflow_in_flight = metrics.gauge(
+    "mentorship_in_flight_requests", "Agent workflows currently running", ("agent_type",)
+)
+prompt_tokens = metrics.counter(
+    "mentorship_prompt_tokens_total", "Prompt tokens sent to providers (estimated when not reported)",
+    ("agent_type", "provider", "model")
+)
+completion_tokens = metrics.counter(
+    "mentorship_completion_tokens_total", "Completion tokens received from providers (estimated when not reported)",
+    ("agent_type", "provider", "model")
+)
+fallback_hops = metrics.counter(
+    "mentorship_fallback_hops_total", "Moves to the next model or provider after a failed attempt",
+    ("kind", "provider")
+)
+errors = metrics.counter(
+    "mentorship_errors_total", "Failed upstream attempts and failed workflows by error class",
+    ("stage", "provider", "error_class")
+)
+cache_lookups = metrics.counter(
+    "mentorship_semantic_cache_lookups_total", "Semantic response cache lookups", ("agent_type", "result")
+)
@@ -0,0 +1,151 @@
+"""
+Persisted Gemini model-probe cache
+Remembers which Gemini model works for an API key so cold starts need no test calls
+"""
+
+from typing import Callable, Dict, List, Optional
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ModelProbeCache:
+    """Disk-backed record of the working Gemini model per API key.
+
+    Entries are keyed by a hash of the API key (the key itself is never
+    written). A fresh entry is used as-is; a stale or missing one is still
+    answered immediately and re-probed in a background thread.
+    """
+
+    def __init__(self, path: str, ttl_seconds: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._in_flight: set = set()
+        self._entries: Dict[str, Dict] = self._load()
+
+    @staticmethod
+    def _key(api_key: str) -> str:
+        return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as fh:
+                return json.load(fh)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable model probe cache {self.path}: {e}")
+            return {}
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as fh:
+                json.dump(self._entries, fh)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"Could not persist model probe cache: {e}")
+
+    def get_model(self, api_key: str, candidates: List[str]) -> Optional[str]:
+        """Cached working model for this key, if it is still one of the candidates."""
+        entry = self._entries.get(self._key(api_key))
+        if entry and entry.get("model") in candidates:
+            return entry["model"]
+        return None
+
+    def is_fresh(self, api_key: str) -> bool:
+        entry = self._entries.get(self._key(api_key))
+        return bool(entry) and time.time() - entry.get("probed_at", 0) < self.ttl_seconds
+
+    def choose_model(
+        self,
+        api_key: str,
+        candidates: List[str],
+        probe: Callable[[str], None],
+        on_change: Optional[Callable[[str], None]] = None
+    ) -> str:
+        """Pick a model without making any LLM call.
+
+        Returns the cached model, or the first candidate when nothing is cached.
+        If the entry is missing or older than the TTL, ``probe`` (which raises
+        when a model is unusable) runs in the background and ``on_change`` is
+        called if it finds a different working model.
+        """
+        model = self.get_model(api_key, candidates)
+        if model is None or not self.is_fresh(api_key):
+            self.revalidate_in_background(api_key, candidates, probe, on_change)
+        return model or candidates[0]
+
+    def revalidate_in_background(
+        self,
+        api_key: str,
+        candidates: List[str],
+        probe: Callable[[str], None],
+        on_change: Optional[Callable[[str], None]] = None
+    ):
+        key = self._key(api_key)
+        with self._lock:
+            if key in self._in_flight:
+                return
+            self._in_flight.add(key)
+
+        def run():
+            try:
+                previous = self.get_model(api_key, candidates)
+                model = self.probe_now(api_key, candidates, probe)
+                if model and model != previous and on_change:
+                    on_change(model)
+            finally:
+                with self._lock:
+                    self._in_flight.discard(key)
+
+        threading.Thread(target=run, name="gemini-model-probe", daemon=True).start()
+
+    def probe_now(self, api_key: str, candidates: List[str], probe: Callable[[str], None]) -> Optional[str]:
+        """Probe candidates in order and persist the first that works."""
+        results: Dict[str, str] = {}
+        working = None
+        for model_name in candidates:
+            try:
+                probe(model_name)
+                results[model_name] = "ok"
+                working = model_name
+                break
+            except Exception as e:
+                results[model_name] = str(e)[:200]
+                logger.debug(f"Model probe {model_name} failed: {e}")
+
+        if working is None:
+            logger.warning("Gemini model probe found no working model; keeping previous choice")
+            return None
+
+        with self._lock:
+            self._entries[self._key(api_key)] = {
+                "model": working,
+                "probed_at": time.time(),
+                "results": results
+            }
+            self._save()
+        logger.info(f"Gemini model probe selected {working}")
+        return working
+
+    def mark_failed(self, api_key: str, model_name: str):
+        """Expire the entry for a model that just failed so the next choice re-probes."""
+        key = self._key(api_key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry.get("model") == model_name:
+                entry["probed_at"] = 0
+                self._save()
+
+
+# Global probe cache instance
+model_probe_cache = ModelProbeCache(settings.MODEL_PROBE_CACHE_PATH, settings.MODEL_PROBE_TTL_SECONDS)
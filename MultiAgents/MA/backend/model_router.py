@@ -0,0 +1,115 @@
+"""
+Gemini model router
+Sticky routing to the last working model per API key, with cool-downs (negative
+caching) for models that recently failed so retired models cost no round trip
+"""
+
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import logging
+import threading
+import time
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+GEMINI_REST_MODELS = [
+    'gemini-2.5-flash',      # Latest available
+    'gemini-2.5-pro',
+    'gemini-2.0-flash',
+    'gemini-1.5-flash',
+    'gemini-1.5-pro'
+]
+
+
+class ModelRouter:
+    """Orders candidate models per API key.
+
+    The last model that answered goes first. Models that failed are skipped
+    until their cool-down expires: long for 404/403 (retired or not enabled
+    for this key), short for rate limits and transient errors. A 400 (invalid
+    argument, prompt too long) is the request's fault, not the model's, and
+    starts no cool-down.
+    """
+
+    def __init__(self, models: List[str]):
+        self.models = list(models)
+        self._state: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.attempts = 0
+        self.attempts_avoided = 0
+
+    @staticmethod
+    def _key(api_key: str) -> str:
+        return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+    def _entry(self, api_key: str) -> Dict:
+        return self._state.setdefault(self._key(api_key), {"sticky": None, "cooldown_until": {}})
+
+    def plan(self, api_key: str) -> Tuple[List[str], List[str]]:
+        """Return (models to try in order, models skipped because they are cooling down)."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entry(api_key)
+            order = list(self.models)
+            if entry["sticky"] in order:
+                order.remove(entry["sticky"])
+                order.insert(0, entry["sticky"])
+            cooling = entry["cooldown_until"]
+            to_try = [m for m in order if cooling.get(m, 0) <= now]
+            skipped = [m for m in order if cooling.get(m, 0) > now]
+        if not to_try:
+            # Everything is cooling down: try the model that recovers first rather than failing outright
+            to_try = sorted(skipped, key=lambda m: cooling.get(m, 0))[:1]
+            skipped = [m for m in skipped if m not in to_try]
+        return to_try, skipped
+
+    def record_success(self, api_key: str, model: str):
+        with self._lock:
+            entry = self._entry(api_key)
+            entry["sticky"] = model
+            entry["cooldown_until"].pop(model, None)
+
+    def record_failure(self, api_key: str, model: str, status_code: Optional[int] = None):
+        if status_code == 400:
+            logger.debug(f"Model {model} rejected the request as invalid; no cool-down")
+            return
+        if status_code in (403, 404):
+            cooldown = settings.MODEL_RETIRED_COOLDOWN_SECONDS
+        elif status_code == 429:
+            cooldown = settings.MODEL_RATE_LIMIT_COOLDOWN_SECONDS
+        else:
+            cooldown = settings.MODEL_TRANSIENT_COOLDOWN_SECONDS
+        with self._lock:
+            entry = self._entry(api_key)
+            entry["cooldown_until"][model] = time.monotonic() + cooldown
+            if entry["sticky"] == model:
+                entry["sticky"] = None
+        logger.debug(f"Model {model} cooling down for {cooldown}s (status={status_code})")
+
+    def record_request(self, attempts: int, succeeded_with: Optional[str]) -> int:
+        """Account one routed request; returns attempts avoided versus walking the static list."""
+        if succeeded_with in self.models:
+            baseline = self.models.index(succeeded_with) + 1
+        else:
+            baseline = len(self.models)
+        avoided = max(0, baseline - attempts)
+        with self._lock:
+            self.requests += 1
+            self.attempts += attempts
+            self.attempts_avoided += avoided
+        return avoided
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "requests": self.requests,
+            "attempts": self.attempts,
+            "attempts_avoided": self.attempts_avoided,
+            "attempts_per_request": round(self.attempts / self.requests, 3) if self.requests else 0.0
+        }
+
+
+# Global router for the Gemini REST path
+gemini_router = ModelRouter(GEMINI_REST_MODELS)
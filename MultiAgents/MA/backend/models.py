@@ -3,7 +3,7 @@ from typing import Optional, Dict, Any, List
 from datetime import datetime
 
 class MentorshipRequest(BaseModel):
-    agent_type: str = Field(..., description="Type of agent: skill_coach, career_guide, writing_agent, networking_agent")
+    agent_type: str = Field(..., description="Type of agent: skill_coach, career_guide, writing_agent, networking_agent, or auto to let the router choose")
     query: str = Field(..., description="User's question or request")
     user_id: Optional[str] = Field(None, description="Optional user ID for tracking")
     preferred_provider: Optional[str] = Field(None, description="Preferred AI provider: openai or gemini")
@@ -23,6 +23,26 @@ class MentorshipResponse(BaseModel):
     writing_type: Optional[str] = None
     error: Optional[str] = None
 
+class PanelRequest(BaseModel):
+    query: str = Field(..., description="User's question or request")
+    agent_types: Optional[List[str]] = Field(None, description="Agents to ask together (default: PANEL_DEFAULT_AGENTS)")
+    user_id: Optional[str] = Field(None, description="Optional user ID for tracking")
+    preferred_provider: Optional[str] = Field(None, description="Preferred AI provider: openai or gemini")
+    session_ids: Optional[Dict[str, str]] = Field(None, description="Conversation session ID per agent type, from a previous panel response")
+    timeout_seconds: Optional[float] = Field(None, gt=0, description="Shared deadline for all agents (capped at PANEL_TIMEOUT_SECONDS)")
+
+class PanelResponse(BaseModel):
+    success: bool
+    query: str
+    response: str = Field(..., description="All answers as one markdown document, one section per agent")
+    sections: List[MentorshipResponse]
+    session_ids: Dict[str, str]
+    timed_out: List[str] = Field(default_factory=list, description="Agents that missed the deadline")
+    resources: List[Dict[str, Any]] = Field(default_factory=list)
+    opportunities: List[Dict[str, Any]] = Field(default_factory=list)
+    events: List[Dict[str, Any]] = Field(default_factory=list)
+    metadata: Optional[Dict[str, Any]] = None
+
 class AgentInfo(BaseModel):
     name: str
     description: str
@@ -33,3 +53,8 @@ class HealthResponse(BaseModel):
     timestamp: str
     available_agents: List[str]
     ai_providers_configured: List[str]
+
+class PageResponse(BaseModel):
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[str] = Field(None, description="Pass as `cursor` to fetch the next page; null on the last page")
+    cached: bool = Field(False, description="True when the page was served from the read cache")
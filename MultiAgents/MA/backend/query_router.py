@@ -0,0 +1,216 @@
+"""
+Local query router for agent_type="auto"
+A multinomial naive Bayes classifier over word unigrams and bigrams picks the agent in
+microseconds, without a model call. It starts from built-in example questions and is
+retrained from stored mentorship_sessions queries
+"""
+
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Tuple
+import logging
+import math
+import re
+import time
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"[a-z0-9+#]+")
+_STOPWORDS = frozenset(
+    "a an the i me my we you your to for of in on at by with about and or is are am be "
+    "do does can could should would will how what which where when who why please some any "
+    "it this that there get want need help".split()
+)
+
+# Example questions per agent; always part of the training set so a fresh install routes sensibly
+SEED_QUERIES: Dict[str, List[str]] = {
+    "skill_coach": [
+        "I want to learn machine learning from scratch, where should I start?",
+        "Recommend the best Python courses for beginners",
+        "What are good online courses for web development?",
+        "I'm a complete beginner in data science, suggest a learning path",
+        "What certifications are valuable for cloud computing careers?",
+        "Create a 6-month learning plan for becoming a full-stack developer",
+        "What should I learn after completing Python basics?",
+        "Suggest resources to master deep learning",
+        "Compare Coursera vs Udemy for data science courses",
+        "What are the best free resources for learning programming?",
+        "Which tutorials teach SQL and databases quickly?",
+        "How do I improve my coding skills for interviews?",
+        "Best YouTube channels to study statistics",
+        "Roadmap to learn React and JavaScript",
+    ],
+    "career_guide": [
+        "What scholarships are available for Pakistani students studying abroad?",
+        "Tell me about Fulbright scholarship requirements and application process",
+        "What are the eligibility criteria for Chevening scholarship?",
+        "Which scholarships cover full tuition and living expenses?",
+        "How can I find research opportunities in Europe?",
+        "What are the best countries for Computer Science PhD programs?",
+        "Tell me about study abroad programs in the USA",
+        "What are good fellowship programs for PhD students in Computer Science?",
+        "How to find research grants for machine learning projects?",
+        "What funding opportunities exist for Pakistani researchers?",
+        "How to plan my career path in academia?",
+        "What skills do I need for a career in AI research?",
+        "Fully funded masters admission in Germany DAAD",
+        "Should I choose industry jobs or a PhD after graduation?",
+    ],
+    "writing_agent": [
+        "Help me write an abstract for my research paper on artificial intelligence",
+        "Review my abstract and suggest improvements",
+        "How to write a compelling abstract for a conference submission?",
+        "Review my CV and suggest improvements for academic positions",
+        "How should I format my CV for PhD applications?",
+        "What sections should I include in my academic resume?",
+        "I need help improving the introduction section of my research paper",
+        "How to structure the methodology section of a research paper?",
+        "Review my paper's conclusion and suggest improvements",
+        "How should I structure a research proposal for a grant application?",
+        "Help me write the significance section of my proposal",
+        "How to improve my academic writing style?",
+        "What are the best practices for citing sources?",
+        "Help me write a literature review for my thesis",
+        "Proofread my statement of purpose",
+        "Draft a cover letter for a research assistant position",
+    ],
+    "networking_agent": [
+        "What are the best AI and machine learning conferences to attend this year?",
+        "Which conferences accept student papers?",
+        "Suggest top-tier conferences for computer vision research",
+        "What virtual conferences are happening for data science?",
+        "Find workshops on deep learning in the next 6 months",
+        "What seminars should I attend as a graduate student?",
+        "What professional organizations should I join as a researcher?",
+        "Which societies offer student memberships in computer science?",
+        "Benefits of joining IEEE vs ACM for students",
+        "Recommend online communities and platforms for data science networking",
+        "Best platforms for academic networking and collaboration",
+        "How to build a professional network as a graduate student?",
+        "How to network effectively at academic conferences?",
+        "What should I include in my LinkedIn profile as a researcher?",
+        "How do I reach out to potential supervisors and mentors?",
+        "Are there tech meetups or hackathons for students?",
+    ],
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased content words with a plural "s" removed, plus adjacent-word bigrams"""
+    words = [w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w
+             for w in _WORD_RE.findall(text.lower()) if w not in _STOPWORDS]
+    return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+
+class QueryRouter:
+    """Multinomial naive Bayes over :func:`tokenize` features with Laplace smoothing.
+
+    Training produces one table of per-class log-likelihoods per feature, so
+    routing is a dict lookup and a few additions per word. Seed questions are
+    weighted ``seed_weight`` times a stored query. A query with no known
+    features, or whose best class probability is under ``min_confidence``,
+    goes to ``default_agent``.
+    """
+
+    def __init__(self, agent_types: Iterable[str], default_agent: str, min_confidence: float, seed_weight: float = 3.0):
+        self.agent_types = list(agent_types)
+        self.default_agent = default_agent
+        self.min_confidence = min_confidence
+        self.seed_weight = seed_weight
+        self.trained_on = 0
+        self.routed = 0
+        self.fallbacks = 0
+        self._model: Tuple[Dict[str, List[float]], List[float]] = ({}, [0.0] * len(self.agent_types))
+        self.fit([])
+
+    def fit(self, samples: Iterable[Tuple[str, str]]):
+        """Retrain on (query, agent_type) samples plus the seed questions"""
+        counts: Dict[str, Counter] = defaultdict(Counter)
+        docs = Counter()
+        weighted = [(query, agent_type, 1.0) for query, agent_type in samples if agent_type in self.agent_types]
+        weighted += [(query, agent_type, self.seed_weight)
+                     for agent_type, queries in SEED_QUERIES.items() if agent_type in self.agent_types
+                     for query in queries]
+        for query, agent_type, weight in weighted:
+            docs[agent_type] += weight
+            for feature in tokenize(query):
+                counts[feature][agent_type] += weight
+
+        totals = Counter()
+        for per_class in counts.values():
+            totals.update(per_class)
+        vocabulary = len(counts) + 1
+        total_docs = sum(docs.values()) or 1.0
+        priors = [math.log((docs[a] + 1.0) / (total_docs + len(self.agent_types))) for a in self.agent_types]
+        table = {
+            feature: [math.log((per_class[a] + 1.0) / (totals[a] + vocabulary)) for a in self.agent_types]
+            for feature, per_class in counts.items()
+        }
+        # Swapped in one assignment so concurrent route() calls see either the old or the new model
+        self._model = (table, priors)
+        self.trained_on = len(weighted)
+
+    def route(self, query: str) -> Dict[str, Any]:
+        """Chosen agent_type with its probability and the routing time"""
+        started = time.perf_counter()
+        table, priors = self._model
+        scores = list(priors)
+        known = 0
+        for feature in tokenize(query):
+            weights = table.get(feature)
+            if weights is None:
+                continue
+            known += 1
+            for i, weight in enumerate(weights):
+                scores[i] += weight
+
+        best = max(range(len(scores)), key=scores.__getitem__)
+        top = scores[best]
+        confidence = 1.0 / sum(math.exp(score - top) for score in scores)
+        agent_type = self.agent_types[best]
+        fallback = not known or confidence < self.min_confidence
+        if fallback:
+            agent_type = self.default_agent
+            self.fallbacks += 1
+        self.routed += 1
+        return {
+            "agent_type": agent_type,
+            "confidence": round(confidence, 3),
+            "fallback": fallback,
+            "routing_us": round((time.perf_counter() - started) * 1e6, 1)
+        }
+
+    async def train_from_database(self, limit: int = settings.ROUTER_TRAINING_LIMIT):
+        """Retrain on stored session queries (sessions that were themselves auto-routed are skipped)"""
+        from database import db
+
+        if not db.enabled:
+            return
+        try:
+            rows = await db.get_training_queries(limit)
+        except Exception as e:
+            logger.warning(f"Query router training data unavailable: {e}")
+            return
+        samples = [
+            (row["query"], row["agent_type"]) for row in rows
+            if row.get("query") and not (row.get("metadata") or {}).get("agent_routing", {}).get("auto")
+        ]
+        self.fit(samples)
+        logger.info(f"Query router trained on {len(samples)} stored queries plus seed questions")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "trained_on": self.trained_on,
+            "features": len(self._model[0]),
+            "routed": self.routed,
+            "fallbacks": self.fallbacks
+        }
+
+
+# Global router instance
+query_router = QueryRouter(
+    agent_types=SEED_QUERIES,
+    default_agent=settings.ROUTER_DEFAULT_AGENT,
+    min_confidence=settings.ROUTER_MIN_CONFIDENCE
+)
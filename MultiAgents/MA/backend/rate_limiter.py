@@ -0,0 +1,295 @@
+"""
+Token-bucket rate limiting
+ASGI middleware that limits requests per user_id and per client IP before they reach
+the agents; buckets live in process memory or, shared between workers, in Redis
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import json
+import logging
+import math
+import re
+import time
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# (key, tokens per second, burst)
+Limit = Tuple[str, float, float]
+
+_USER_ID_RE = re.compile(rb'"user_id"\s*:\s*"((?:[^"\\]|\\.){1,128})"')
+_AGENT_TYPES_RE = re.compile(rb'"agent_types"\s*:\s*\[([^\]]*)\]')
+_STRING_RE = re.compile(rb'"((?:[^"\\]|\\.)*)"')
+
+# Only this much of a POST body is buffered to look for user_id / agent_types
+MAX_SCAN_BYTES = 4096
+
+
+class MemoryBucketStore:
+    """Buckets in a dict, least recently used dropped past ``max_keys``.
+
+    Only touched from the event loop and never awaits while updating, so no
+    lock is needed. Time is ``time.monotonic``.
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        # key -> [tokens, last refill time]
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    async def take(self, limits: Sequence[Limit], cost: float = 1.0) -> float:
+        """Take ``cost`` tokens from every bucket and return 0, or take none and return the seconds to wait"""
+        now = time.monotonic()
+        wait = 0.0
+        levels = []
+        for key, rate, burst in limits:
+            bucket = self._buckets.get(key)
+            tokens = burst if bucket is None else min(burst, bucket[0] + (now - bucket[1]) * rate)
+            levels.append(tokens)
+            if tokens < cost:
+                wait = max(wait, (cost - tokens) / rate)
+        if wait:
+            return wait
+        buckets = self._buckets
+        for (key, _, _), tokens in zip(limits, levels):
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = [tokens - cost, now]
+                if len(buckets) > self.max_keys:
+                    buckets.popitem(last=False)
+            else:
+                bucket[0] = tokens - cost
+                bucket[1] = now
+                buckets.move_to_end(key)
+        return 0.0
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    async def close(self):
+        pass
+
+
+# Same algorithm as MemoryBucketStore, atomic on the server; Redis time keeps workers' clocks out of it
+_TAKE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local cost = tonumber(ARGV[#ARGV])
+local wait = 0
+local levels = {}
+for i, key in ipairs(KEYS) do
+  local rate = tonumber(ARGV[2 * i - 1])
+  local burst = tonumber(ARGV[2 * i])
+  local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+  local tokens = tonumber(bucket[1])
+  if tokens == nil then
+    tokens = burst
+  else
+    tokens = math.min(burst, tokens + (now - tonumber(bucket[2])) * rate)
+  end
+  levels[i] = tokens
+  if tokens < cost then
+    wait = math.max(wait, (cost - tokens) / rate)
+  end
+end
+if wait == 0 then
+  for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i - 1])
+    local burst = tonumber(ARGV[2 * i])
+    redis.call('HSET', key, 'tokens', tostring(levels[i] - cost), 'ts', tostring(now))
+    redis.call('EXPIRE', key, math.ceil(burst / rate) + 1)
+  end
+end
+return tostring(wait)
+"""
+
+
+class RedisBucketStore:
+    """Buckets shared by every worker, updated by one Lua script per request (redis.asyncio)"""
+
+    def __init__(self, url: str, prefix: str = "ratelimit"):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the 'redis' package (pip install redis)") from e
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self._script = self.client.register_script(_TAKE_SCRIPT)
+
+    async def take(self, limits: Sequence[Limit], cost: float = 1.0) -> float:
+        keys = [f"{self.prefix}:{key}" for key, _, _ in limits]
+        args = [value for _, rate, burst in limits for value in (rate, burst)] + [cost]
+        return float(await self._script(keys=keys, args=args))
+
+    def __len__(self) -> int:
+        return 0  # not tracked locally
+
+    async def close(self):
+        await self.client.aclose()
+
+
+def create_bucket_store():
+    """Bucket store selected by RATE_LIMIT_BACKEND ("memory" or "redis")"""
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        logger.info("Rate limit buckets shared through Redis")
+        return RedisBucketStore(settings.REDIS_URL)
+    if settings.RATE_LIMIT_BACKEND != "memory":
+        logger.warning(f"Unknown RATE_LIMIT_BACKEND '{settings.RATE_LIMIT_BACKEND}', using memory")
+    return MemoryBucketStore(settings.RATE_LIMIT_MAX_KEYS)
+
+
+class RateLimiter:
+    """Per-user and per-IP token buckets.
+
+    A request spends ``cost`` tokens (one, or a panel's fan-out) from its IP
+    bucket and, when it names a user, from that user's bucket too; it is let
+    through only if both have enough. The user id is client-supplied, so the
+    IP bucket is always charged: rotating user ids does not buy more requests.
+    Buckets refill continuously at ``per_minute / 60`` tokens per second up
+    to ``burst``. If the shared store is unreachable, requests are allowed
+    (failing open) and counted in ``store_errors``.
+    """
+
+    def __init__(self, store, user_per_minute: int, ip_per_minute: int, burst: int):
+        self.store = store
+        self.user_rate = user_per_minute / 60.0
+        self.ip_rate = ip_per_minute / 60.0
+        self.burst = float(burst)
+        self.allowed = 0
+        self.limited = 0
+        self.store_errors = 0
+
+    async def check(self, user_id: Optional[str], ip: str, cost: int = 1) -> float:
+        """Seconds the caller must wait; 0 means the request may proceed"""
+        limits: List[Limit] = [(f"ip:{ip}", self.ip_rate, self.burst)]
+        if user_id:
+            limits.append((f"user:{user_id}", self.user_rate, self.burst))
+        try:
+            # A cost above the burst could never be paid
+            wait = await self.store.take(limits, min(float(cost), self.burst))
+        except Exception as e:
+            self.store_errors += 1
+            logger.warning(f"Rate limit store unavailable, allowing request: {e}")
+            wait = 0.0
+        if wait:
+            self.limited += 1
+        else:
+            self.allowed += 1
+        return wait
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "store_errors": self.store_errors,
+            "tracked_keys": len(self.store)
+        }
+
+
+def _replay(messages: List[Dict[str, Any]], receive):
+    """ASGI receive that returns already-read body messages before reading further"""
+    pending = list(messages)
+
+    async def replay():
+        if pending:
+            return pending.pop(0)
+        return await receive()
+    return replay
+
+
+class RateLimitMiddleware:
+    """Pure ASGI middleware (no per-request Request/Response objects) in front of ``paths``.
+
+    The user is taken from an ``X-User-Id`` header or, for POST bodies, the
+    JSON ``user_id`` field, found with a byte regex rather than a full parse;
+    the body is then replayed to the app unchanged. Only the first
+    ``MAX_SCAN_BYTES`` of a body are buffered for this; a field past that is
+    not seen, and the request is limited by IP alone. The client IP is the
+    socket peer, or the first ``X-Forwarded-For`` hop when
+    ``trust_forwarded`` is set (only behind a proxy that overwrites it).
+
+    ``fan_out`` maps a path to (default, maximum) agent counts: a request
+    there costs one token per distinct name in its JSON ``agent_types``, or
+    the default when the field is absent, capped at the maximum.
+    """
+
+    def __init__(self, app, limiter: RateLimiter, paths: Sequence[str], trust_forwarded: bool = False,
+                 fan_out: Optional[Dict[str, Tuple[int, int]]] = None):
+        self.app = app
+        self.limiter = limiter
+        self.paths = tuple(paths)
+        self.trust_forwarded = trust_forwarded
+        self.fan_out = fan_out or {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.paths):
+            return await self.app(scope, receive, send)
+
+        user_id = None
+        forwarded = None
+        for name, value in scope["headers"]:
+            if name == b"x-user-id":
+                user_id = value.decode("latin-1")
+            elif name == b"x-forwarded-for" and self.trust_forwarded:
+                forwarded = value.decode("latin-1").split(",", 1)[0].strip()
+
+        fan_out = self.fan_out.get(scope["path"])
+        cost = 1
+        if (user_id is None or fan_out) and scope["method"] == "POST":
+            messages, body, more = [], b"", True
+            while more and len(body) < MAX_SCAN_BYTES:
+                message = await receive()
+                messages.append(message)
+                body += message.get("body", b"")
+                more = message.get("more_body", False) and message["type"] == "http.request"
+            body = body[:MAX_SCAN_BYTES]
+            if user_id is None:
+                match = _USER_ID_RE.search(body)
+                if match:
+                    user_id = match.group(1).decode("utf-8", "replace")
+            if fan_out:
+                cost = self._fan_out_cost(body, *fan_out)
+            receive = _replay(messages, receive)
+
+        client = scope.get("client")
+        ip = forwarded or (client[0] if client else "unknown")
+        wait = await self.limiter.check(user_id, ip, cost)
+        if not wait:
+            return await self.app(scope, receive, send)
+
+        retry_after = max(1, math.ceil(wait))
+        body = json.dumps({
+            "success": False,
+            "error": "Rate limit exceeded",
+            "detail": f"Too many requests; retry after {retry_after} seconds"
+        }).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode())
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+    @staticmethod
+    def _fan_out_cost(body: bytes, default: int, maximum: int) -> int:
+        match = _AGENT_TYPES_RE.search(body)
+        if not match:
+            return max(1, min(default, maximum))
+        names = set(_STRING_RE.findall(match.group(1)))
+        return max(1, min(len(names) or default, maximum))
+
+
+# Global rate limiter instance
+rate_limiter = RateLimiter(
+    create_bucket_store(),
+    user_per_minute=settings.RATE_LIMIT_PER_MINUTE,
+    ip_per_minute=settings.RATE_LIMIT_IP_PER_MINUTE,
+    burst=settings.RATE_LIMIT_BURST
+)
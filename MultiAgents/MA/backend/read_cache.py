@@ -0,0 +1,68 @@
+"""
+Read-through cache for database list queries
+Entries are grouped by owner (a user or a session); a write for an owner bumps its
+generation, which makes every cached page for that owner unreachable in O(1)
+"""
+
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+import threading
+import time
+
+from config import settings
+
+
+class ReadCache:
+    """TTL + LRU cache keyed by (owner, query) with per-owner generation invalidation"""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._generations: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def invalidate(self, owner: Hashable):
+        with self._lock:
+            self._generations[owner] = self._generations.get(owner, 0) + 1
+            self.invalidations += 1
+
+    async def get_or_load(self, owner: Hashable, query: Hashable, load: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Cached value for (owner, query), loading it on a miss; returns (value, was_cached)"""
+        now = time.monotonic()
+        with self._lock:
+            generation = self._generations.get(owner, 0)
+            key = (owner, generation, query)
+            entry = self._entries.get(key)
+            if entry and now - entry[0] <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1], True
+            self.misses += 1
+
+        value = await load()
+        with self._lock:
+            # Skip storing if a write landed while loading; the next read reloads
+            if self._generations.get(owner, 0) == generation:
+                self._entries[key] = (time.monotonic(), value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value, False
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations
+        }
+
+
+# Global cache for paginated session and resource reads
+read_cache = ReadCache(settings.READ_CACHE_TTL_SECONDS, settings.READ_CACHE_MAX_ENTRIES)
@@ -0,0 +1,213 @@
+"""
+Semantic Response Cache
+Serves a stored agent answer when a new question is a near-duplicate of an earlier one
+(only for fresh conversations, where the answer does not depend on history)
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, Optional, Set
+import copy
+import logging
+import math
+import re
+import threading
+import time
+import zlib
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"[a-z0-9+#]+")
+_DIGIT_RE = re.compile(r"[0-9]")
+
+# Function words that change phrasing but not the question being asked
+_STOPWORDS = frozenset(
+    "a an the i me my we you your to for of in on at by with about and or is are am be "
+    "do does can could should would will how what which where when who why please some any "
+    "it this that there get".split()
+)
+
+
+class HashedNgramEmbedder:
+    """Dependency-free text embedding: hashed word unigrams plus character trigrams.
+
+    Vectors are sparse dicts ``{bucket: weight}`` with unit L2 norm, so the dot
+    product of two vectors is their cosine similarity. Buckets use crc32, which
+    is stable across processes (unlike ``hash()``).
+    """
+
+    def __init__(self, dimensions: int = 1 << 20, word_weight: float = 2.0):
+        self.dimensions = dimensions
+        self.word_weight = word_weight
+
+    @staticmethod
+    def normalize(text: str) -> List[str]:
+        words = _WORD_RE.findall(text.lower())
+        return [w for w in words if w not in _STOPWORDS] or words
+
+    def _bucket(self, feature: str) -> int:
+        return zlib.crc32(feature.encode("utf-8")) % self.dimensions
+
+    @staticmethod
+    def numbers(words: List[str]) -> FrozenSet[str]:
+        """Tokens containing a digit (years, deadlines, course numbers)"""
+        return frozenset(w for w in words if _DIGIT_RE.search(w))
+
+    def word_buckets(self, words: List[str]) -> Set[int]:
+        return {self._bucket(f"w:{word}") for word in words}
+
+    def embed(self, text: str) -> Dict[int, float]:
+        words = self.normalize(text)
+        vector: Dict[int, float] = {}
+        for word in words:
+            bucket = self._bucket(f"w:{word}")
+            vector[bucket] = vector.get(bucket, 0.0) + self.word_weight
+            padded = f"^{word}$"
+            for i in range(len(padded) - 2):
+                bucket = self._bucket(f"c:{padded[i:i + 3]}")
+                vector[bucket] = vector.get(bucket, 0.0) + 1.0
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        if norm:
+            for bucket in vector:
+                vector[bucket] /= norm
+        return vector
+
+
+class _Entry:
+    __slots__ = ("agent_type", "vector", "words", "numbers", "result", "created_at", "size")
+
+    def __init__(self, agent_type: str, vector: Dict[int, float], words: Set[int], numbers: FrozenSet[str],
+                 result: Dict[str, Any], size: int):
+        self.agent_type = agent_type
+        self.vector = vector
+        self.words = words
+        self.numbers = numbers
+        self.result = result
+        self.created_at = time.monotonic()
+        self.size = size
+
+
+class SemanticCache:
+    """Per-agent vector index of past answers with TTL, LRU eviction and a memory cap.
+
+    Candidates are found through an inverted index on query words, then scored
+    by cosine similarity; a hit needs similarity >= ``threshold`` and the same
+    numbers as the stored query ("deadline 2025" never answers "deadline 2026",
+    although the two are very similar).
+    """
+
+    # Rough per-vector-component overhead used for the memory budget
+    _BYTES_PER_COMPONENT = 100
+
+    def __init__(self, threshold: float, ttl_seconds: int, max_entries: int, max_bytes: int, max_candidates: int = 64):
+        self.embedder = HashedNgramEmbedder()
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_candidates = max_candidates
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()  # LRU order, oldest first
+        self._index: Dict[str, Dict[int, Set[int]]] = {}  # agent_type -> word bucket -> entry ids
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def lookup(self, agent_type: str, query: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of a cached result for a similar query, or None"""
+        normalized = self.embedder.normalize(query)
+        words = self.embedder.word_buckets(normalized)
+        numbers = self.embedder.numbers(normalized)
+        vector = self.embedder.embed(query)
+        now = time.monotonic()
+        with self._lock:
+            postings = self._index.get(agent_type, {})
+            overlap: Dict[int, int] = {}
+            for word in words:
+                for entry_id in postings.get(word, ()):
+                    overlap[entry_id] = overlap.get(entry_id, 0) + 1
+            candidates = sorted(overlap, key=overlap.get, reverse=True)[:self.max_candidates]
+
+            best_id, best_score = None, 0.0
+            for entry_id in candidates:
+                entry = self._entries[entry_id]
+                if now - entry.created_at > self.ttl_seconds:
+                    self._remove(entry_id)
+                    self.expirations += 1
+                    continue
+                if entry.numbers != numbers:
+                    continue
+                small, large = (vector, entry.vector) if len(vector) < len(entry.vector) else (entry.vector, vector)
+                score = sum(weight * large.get(bucket, 0.0) for bucket, weight in small.items())
+                if score > best_score:
+                    best_id, best_score = entry_id, score
+
+            if best_id is None or best_score < self.threshold:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_id)
+            self.hits += 1
+            result = copy.deepcopy(self._entries[best_id].result)
+        result.setdefault("metadata", {})
+        result["metadata"]["cache_hit"] = True
+        result["metadata"]["cache_similarity"] = round(best_score, 4)
+        return result
+
+    def store(self, agent_type: str, query: str, result: Dict[str, Any]):
+        normalized = self.embedder.normalize(query)
+        words = self.embedder.word_buckets(normalized)
+        if not words:
+            return
+        vector = self.embedder.embed(query)
+        stored = copy.deepcopy({k: v for k, v in result.items() if k != "session_id"})
+        size = 2 * (len(stored.get("response") or "") + len(query)) + self._BYTES_PER_COMPONENT * (len(vector) + len(words))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = _Entry(agent_type, vector, words, self.embedder.numbers(normalized), stored, size)
+            postings = self._index.setdefault(agent_type, {})
+            for word in words:
+                postings.setdefault(word, set()).add(entry_id)
+            self.bytes_used += size
+            while self._entries and (len(self._entries) > self.max_entries or self.bytes_used > self.max_bytes):
+                oldest_id = next(iter(self._entries))
+                self._remove(oldest_id)
+                self.evictions += 1
+
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id)
+        postings = self._index.get(entry.agent_type, {})
+        for word in entry.words:
+            ids = postings.get(word)
+            if ids:
+                ids.discard(entry_id)
+                if not ids:
+                    del postings[word]
+        self.bytes_used -= entry.size
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes_used": self.bytes_used,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+
+# Global semantic cache instance
+semantic_cache = SemanticCache(
+    threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+    ttl_seconds=settings.SEMANTIC_CACHE_TTL_SECONDS,
+    max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+    max_bytes=settings.SEMANTIC_CACHE_MAX_BYTES
+)
@@ -0,0 +1,19 @@
+from semantic_cache import SemanticCache
+
+
+def make_cache():
+    return SemanticCache(threshold=0.85, ttl_seconds=3600, max_entries=100, max_bytes=1 << 20)
+
+
+def test_year_only_difference_is_a_miss():
+    cache = make_cache()
+    cache.store("career_guide", "Fulbright scholarship deadline 2025", {"response": "October 2024"})
+    assert cache.lookup("career_guide", "Fulbright scholarship deadline 2026") is None
+
+
+def test_same_numbers_still_hit():
+    cache = make_cache()
+    cache.store("career_guide", "Fulbright scholarship deadline 2025", {"response": "October 2024"})
+    result = cache.lookup("career_guide", "What is the Fulbright scholarship deadline for 2025?")
+    assert result["response"] == "October 2024"
+    assert result["metadata"]["cache_hit"]
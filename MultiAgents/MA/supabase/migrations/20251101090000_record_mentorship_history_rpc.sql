@@ -0,0 +1,40 @@
+/*
+  # Atomic user history upsert
+
+  ## Overview
+  `update_user_history` used to read the row and then write `interaction_count + 1`
+  back, which costs two round trips and loses increments when two requests race.
+  This function applies a batch of increments in one statement.
+
+  ## New Functions
+
+  ### `record_mentorship_history(p_rows jsonb)`
+  - `p_rows` - JSON array of objects with:
+    - `user_id` (uuid)
+    - `agent_type` (text)
+    - `increment` (integer) - Interactions to add
+    - `preferences` (jsonb, optional) - Replaces stored preferences when present
+  - Inserts missing (user_id, agent_type) rows and atomically increments existing ones
+    using the existing UNIQUE(user_id, agent_type) constraint
+  - Each (user_id, agent_type) pair must appear at most once per call (callers coalesce)
+  - Runs with the caller's privileges, so the user_mentorship_history RLS policies apply;
+    no grant beyond the default EXECUTE is needed
+*/
+
+CREATE OR REPLACE FUNCTION record_mentorship_history(p_rows jsonb)
+RETURNS void
+LANGUAGE sql
+AS $$
+  INSERT INTO user_mentorship_history AS h
+    (user_id, agent_type, interaction_count, preferences, last_interaction, updated_at)
+  SELECT r.user_id, r.agent_type, r.increment, COALESCE(r.preferences, '{}'::jsonb), now(), now()
+  FROM jsonb_to_recordset(p_rows) AS r(user_id uuid, agent_type text, increment integer, preferences jsonb)
+  ON CONFLICT (user_id, agent_type) DO UPDATE SET
+    interaction_count = h.interaction_count + EXCLUDED.interaction_count,
+    preferences = CASE
+      WHEN EXCLUDED.preferences = '{}'::jsonb THEN h.preferences
+      ELSE EXCLUDED.preferences
+    END,
+    last_interaction = now(),
+    updated_at = now();
+$$;
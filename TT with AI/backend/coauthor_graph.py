@@ -0,0 +1,182 @@
+import threading
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .database import insert_coauthor_papers, load_coauthor_papers
+
+# Papers with hundreds of authors (large collaborations) would add a clique of
+# tens of thousands of edges while saying little about who actually works together.
+MAX_AUTHORS_PER_PAPER = 50
+
+# Minimum time between rebuilds when new papers keep arriving
+REBUILD_INTERVAL_SECONDS = 60.0
+
+
+class CoauthorGraph:
+    """Undirected co-authorship graph stored as CSR adjacency arrays.
+
+    Neighbours of node ``i`` are ``indices[indptr[i]:indptr[i + 1]]``; node
+    numbers map to Semantic Scholar author ids through ``author_ids``.
+    """
+
+    def __init__(self, author_ids: List[str], indptr: array, indices: array):
+        self.author_ids = author_ids
+        self.node_of: Dict[str, int] = {author_id: i for i, author_id in enumerate(author_ids)}
+        self.indptr = indptr
+        self.indices = indices
+
+    @classmethod
+    def from_papers(cls, papers: Iterable[List[str]]) -> "CoauthorGraph":
+        node_of: Dict[str, int] = {}
+        author_ids: List[str] = []
+        pairs = set()
+        for authors in papers:
+            if len(authors) < 2 or len(authors) > MAX_AUTHORS_PER_PAPER:
+                continue
+            nodes = []
+            for author_id in authors:
+                node = node_of.get(author_id)
+                if node is None:
+                    node = node_of[author_id] = len(author_ids)
+                    author_ids.append(author_id)
+                nodes.append(node)
+            for i, a in enumerate(nodes):
+                for b in nodes[i + 1:]:
+                    if a != b:
+                        pairs.add((a, b) if a < b else (b, a))
+
+        n = len(author_ids)
+        degree = array("i", bytes(4 * (n + 1)))
+        for a, b in pairs:
+            degree[a + 1] += 1
+            degree[b + 1] += 1
+        indptr = array("i", degree)
+        for i in range(1, n + 1):
+            indptr[i] += indptr[i - 1]
+
+        indices = array("i", bytes(4 * indptr[n]))
+        fill = array("i", indptr[:n])
+        for a, b in pairs:
+            indices[fill[a]] = b
+            fill[a] += 1
+            indices[fill[b]] = a
+            fill[b] += 1
+        return cls(author_ids, indptr, indices)
+
+    @property
+    def node_count(self) -> int:
+        return len(self.author_ids)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.indices) // 2
+
+    def neighbors(self, node: int) -> array:
+        return self.indices[self.indptr[node]:self.indptr[node + 1]]
+
+    def distance(
+        self, sources: Iterable[str], targets: Iterable[str], max_depth: int = 6
+    ) -> Optional[Tuple[int, List[str]]]:
+        """Shortest collaboration distance between any source and any target author.
+
+        Runs a bidirectional BFS, always expanding the smaller frontier.
+        Returns ``(distance, path_of_author_ids)`` or None if the authors are
+        not connected within ``max_depth`` hops.
+        """
+        source_nodes = {self.node_of[a] for a in sources if a in self.node_of}
+        target_nodes = {self.node_of[a] for a in targets if a in self.node_of}
+        if not source_nodes or not target_nodes:
+            return None
+        common = source_nodes & target_nodes
+        if common:
+            return 0, [self.author_ids[next(iter(common))]]
+
+        parents_fwd: Dict[int, int] = {node: -1 for node in source_nodes}
+        parents_bwd: Dict[int, int] = {node: -1 for node in target_nodes}
+        frontier_fwd, frontier_bwd = list(source_nodes), list(target_nodes)
+        depth = 0
+        while frontier_fwd and frontier_bwd and depth < max_depth:
+            expand_forward = len(frontier_fwd) <= len(frontier_bwd)
+            frontier = frontier_fwd if expand_forward else frontier_bwd
+            parents, other = (parents_fwd, parents_bwd) if expand_forward else (parents_bwd, parents_fwd)
+            next_frontier: List[int] = []
+            meeting = None
+            for node in frontier:
+                for neighbor in self.indices[self.indptr[node]:self.indptr[node + 1]]:
+                    if neighbor in parents:
+                        continue
+                    parents[neighbor] = node
+                    if neighbor in other:
+                        meeting = neighbor
+                        break
+                    next_frontier.append(neighbor)
+                if meeting is not None:
+                    break
+            depth += 1
+            if meeting is not None:
+                path = self._walk(parents_fwd, meeting)[::-1] + self._walk(parents_bwd, meeting)[1:]
+                return len(path) - 1, [self.author_ids[node] for node in path]
+            if expand_forward:
+                frontier_fwd = next_frontier
+            else:
+                frontier_bwd = next_frontier
+        return None
+
+    @staticmethod
+    def _walk(parents: Dict[int, int], node: int) -> List[int]:
+        path = [node]
+        while parents[node] != -1:
+            node = parents[node]
+            path.append(node)
+        return path
+
+
+# Replaced by reference assignment only, so readers keep whichever graph they already hold
+_graph: Optional[CoauthorGraph] = None
+_rebuild_requested = threading.Event()
+_builder: Optional[threading.Thread] = None
+_builder_lock = threading.Lock()
+
+
+def record_papers(papers: List[Dict]) -> None:
+    """Persist paper author lists seen during verification and mark the graph stale."""
+    try:
+        if insert_coauthor_papers(papers):
+            _rebuild_requested.set()
+    except Exception as e:
+        print(f"⚠️ Failed to record co-authorship data: {e}")
+
+
+def start_graph_builder() -> None:
+    """Build the graph on a background thread, then rebuild it whenever new papers arrive.
+
+    Rebuilds happen at most once per REBUILD_INTERVAL_SECONDS, and each new
+    graph is swapped in whole, so lookups never wait on a build.
+    """
+    global _builder
+    with _builder_lock:
+        if _builder is None or not _builder.is_alive():
+            _builder = threading.Thread(target=_build_loop, name="coauthor-graph-builder", daemon=True)
+            _builder.start()
+
+
+def _build_loop() -> None:
+    global _graph
+    while True:
+        # Cleared before loading, so papers recorded during the build trigger the next one
+        _rebuild_requested.clear()
+        try:
+            _graph = CoauthorGraph.from_papers(load_coauthor_papers())
+        except Exception as e:
+            print(f"⚠️ Co-authorship graph build failed: {e}. Retrying later.")
+            _rebuild_requested.set()
+        time.sleep(REBUILD_INTERVAL_SECONDS)
+        _rebuild_requested.wait()
+
+
+def get_coauthor_graph() -> Optional[CoauthorGraph]:
+    """Return the latest built graph, or None while the first build is still running."""
+    if _graph is None:
+        start_graph_builder()
+    return _graph
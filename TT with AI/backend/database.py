@@ -1,6 +1,8 @@
+import hashlib
+import json
 import os
 import sqlite3
-from datetime import datetime
+from datetime import datetime, date, timedelta
 from typing import Optional, Dict, Any, List
 
 # Try to import Firestore (optional dependency)
@@ -19,6 +21,9 @@ FIRESTORE_ENABLED = os.getenv("FIRESTORE_ENABLED", "false").lower() == "true"
 FIRESTORE_CREDENTIALS_PATH = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
 FIRESTORE_PROJECT_ID = os.getenv("FIRESTORE_PROJECT_ID", "academic-matchmaker-prod")
 
+# History documents per batch in the one-time Firestore rollup backfill (batches cap at 500 writes)
+FIRESTORE_BACKFILL_BATCH = 200
+
 # Initialize Firestore client (if enabled and available)
 _firestore_client: Optional[Any] = None
 
@@ -75,6 +80,68 @@ def init_db() -> None:
             )
             """
         )
+        # Keyset pagination walks ids backwards; these keep filtered pages index-only
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_verify_history_name ON verify_history (name, id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_verify_history_university ON verify_history (university, id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_verify_history_date ON verify_history (date)")
+        # Daily rollups maintained on every insert so /history/stats never scans history
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS verify_history_daily (
+              day TEXT PRIMARY KEY,
+              total INTEGER NOT NULL DEFAULT 0,
+              verified INTEGER NOT NULL DEFAULT 0,
+              score_sum INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        _backfill_daily_rollups(conn)
+        # Latest verdict per professor, served by the cacheable GET endpoint
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS professor_verdicts (
+              lookup_key TEXT PRIMARY KEY,
+              name TEXT NOT NULL,
+              university TEXT NOT NULL,
+              verified INTEGER NOT NULL,
+              score INTEGER NOT NULL,
+              evidence_links TEXT NOT NULL,
+              summary TEXT NOT NULL,
+              version INTEGER NOT NULL,
+              updated_at TEXT NOT NULL
+            )
+            """
+        )
+        # Paper -> author lists accumulated from Semantic Scholar, the source of the co-authorship graph
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS coauthor_papers (
+              paper_id TEXT PRIMARY KEY,
+              author_ids TEXT NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS coauthor_authors (
+              author_id TEXT PRIMARY KEY,
+              name TEXT NOT NULL,
+              name_key TEXT NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_coauthor_authors_name_key ON coauthor_authors (name_key)")
+        # Output of the entity-resolution job: one canonical document per professor
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS professor_canonical (
+              lookup_key TEXT PRIMARY KEY,
+              canonical_path TEXT NOT NULL,
+              cluster_size INTEGER NOT NULL,
+              resolved_at TEXT NOT NULL
+            )
+            """
+        )
         conn.commit()
     finally:
         conn.close()
@@ -84,28 +151,107 @@ def init_db() -> None:
         client = _get_firestore_client()
         if client:
             print("✅ Firestore initialized successfully")
+            try:
+                _backfill_firestore_rollups(client)
+            except Exception as e:
+                print(f"⚠️ Firestore rollup backfill failed: {e}. It will be retried on the next start.")
         else:
             print("⚠️ Firestore not available, using SQLite only")
 
 
+def _backfill_daily_rollups(conn: sqlite3.Connection) -> None:
+    """One-time rollup build for databases created before verify_history_daily existed."""
+    has_rollups = conn.execute("SELECT 1 FROM verify_history_daily LIMIT 1").fetchone()
+    if has_rollups:
+        return
+    conn.execute(
+        """
+        INSERT INTO verify_history_daily (day, total, verified, score_sum)
+        SELECT substr(date, 1, 10), COUNT(*), SUM(verified), SUM(score)
+        FROM verify_history
+        GROUP BY substr(date, 1, 10)
+        """
+    )
+
+
+def _backfill_firestore_rollups(client: Any) -> None:
+    """One-time verify_history_daily build for Firestore history written before the rollups existed.
+
+    Each document is flagged ``rolled_up`` in the same batch as its rollup
+    increment, so an interrupted backfill resumes without double counting.
+    insert_history writes new documents already flagged.
+    """
+    marker = client.collection("verify_history_meta").document("daily_rollups")
+    if marker.get().exists:
+        return
+    pending: List[Any] = []
+    for doc in client.collection("verify_history").stream():
+        if doc.to_dict().get("rolled_up"):
+            continue
+        pending.append(doc)
+        if len(pending) == FIRESTORE_BACKFILL_BATCH:
+            _commit_rollup_backfill(client, pending)
+            pending = []
+    if pending:
+        _commit_rollup_backfill(client, pending)
+    marker.set({"backfilled_at": datetime.utcnow()})
+
+
+def _commit_rollup_backfill(client: Any, docs: List[Any]) -> None:
+    rollups: Dict[str, Dict[str, int]] = {}
+    batch = client.batch()
+    for doc in docs:
+        data = doc.to_dict()
+        timestamp = data.get("timestamp") or data.get("date")
+        day = timestamp.date().isoformat() if hasattr(timestamp, "date") else str(timestamp)[:10]
+        rollup = rollups.setdefault(day, {"total": 0, "verified": 0, "score_sum": 0})
+        rollup["total"] += 1
+        rollup["verified"] += 1 if data.get("verified") else 0
+        rollup["score_sum"] += int(data.get("score", 0))
+        batch.update(doc.reference, {"rolled_up": True})
+    for day, rollup in rollups.items():
+        batch.set(client.collection("verify_history_daily").document(day), {
+            "day": day,
+            "total": firestore.Increment(rollup["total"]),
+            "verified": firestore.Increment(rollup["verified"]),
+            "score_sum": firestore.Increment(rollup["score_sum"]),
+        }, merge=True)
+    batch.commit()
+
+
 def insert_history(name: str, university: str, verified: bool, score: int) -> None:
-    """Insert verification history into database (Firestore preferred, SQLite fallback)."""
+    """Insert verification history into database (Firestore preferred, SQLite fallback).
+
+    The matching daily rollup row is updated in the same write so stats stay
+    current without re-aggregating the history table.
+    """
     timestamp = datetime.utcnow()
+    day = timestamp.date().isoformat()
     
     # Try Firestore first if enabled
     firestore_client = _get_firestore_client()
     if firestore_client:
         try:
-            # Store in Firestore collection: verify_history
+            # Store in Firestore collection: verify_history, plus its daily rollup
+            batch = firestore_client.batch()
             doc_ref = firestore_client.collection("verify_history").document()
-            doc_ref.set({
+            batch.set(doc_ref, {
                 "name": name,
                 "university": university,
                 "verified": verified,
                 "score": int(score),
                 "date": timestamp,
-                "timestamp": timestamp
+                "timestamp": timestamp,
+                "rolled_up": True
             })
+            rollup_ref = firestore_client.collection("verify_history_daily").document(day)
+            batch.set(rollup_ref, {
+                "day": day,
+                "total": firestore.Increment(1),
+                "verified": firestore.Increment(1 if verified else 0),
+                "score_sum": firestore.Increment(int(score)),
+            }, merge=True)
+            batch.commit()
             return  # Successfully saved to Firestore
         except Exception as e:
             print(f"⚠️ Firestore save failed: {e}. Falling back to SQLite.")
@@ -117,11 +263,368 @@ def insert_history(name: str, university: str, verified: bool, score: int) -> No
             "INSERT INTO verify_history (name, university, verified, score, date) VALUES (?, ?, ?, ?, ?)",
             (name, university, 1 if verified else 0, int(score), timestamp.isoformat()),
         )
+        conn.execute(
+            """
+            INSERT INTO verify_history_daily (day, total, verified, score_sum) VALUES (?, 1, ?, ?)
+            ON CONFLICT(day) DO UPDATE SET
+              total = total + 1,
+              verified = verified + excluded.verified,
+              score_sum = score_sum + excluded.score_sum
+            """,
+            (day, 1 if verified else 0, int(score)),
+        )
         conn.commit()
     finally:
         conn.close()
 
 
+def normalize_lookup_key(name: str, university: str) -> str:
+    """Case- and whitespace-insensitive key for a (name, university) pair."""
+    return f"{' '.join(name.lower().split())}|{' '.join(university.lower().split())}"
+
+
+def save_verdict(name: str, university: str, result: Dict[str, Any]) -> None:
+    """Store the latest verdict for a professor, bumping its version."""
+    lookup_key = normalize_lookup_key(name, university)
+    timestamp = datetime.utcnow()
+    verdict = {
+        "name": name,
+        "university": university,
+        "verified": bool(result.get("verified", False)),
+        "score": int(result.get("confidence_score", 0)),
+        "evidence_links": list(result.get("evidence_links", [])),
+        "summary": str(result.get("summary", "")),
+    }
+
+    firestore_client = _get_firestore_client()
+    if firestore_client:
+        try:
+            doc_ref = firestore_client.collection("professor_verdicts").document(_verdict_doc_id(lookup_key))
+            doc_ref.set({
+                **verdict,
+                "lookup_key": lookup_key,
+                "version": firestore.Increment(1),
+                "updated_at": timestamp,
+            }, merge=True)
+            return
+        except Exception as e:
+            print(f"⚠️ Firestore verdict save failed: {e}. Falling back to SQLite.")
+
+    conn = _get_conn()
+    try:
+        conn.execute(
+            """
+            INSERT INTO professor_verdicts
+              (lookup_key, name, university, verified, score, evidence_links, summary, version, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, 1, ?)
+            ON CONFLICT(lookup_key) DO UPDATE SET
+              name = excluded.name,
+              university = excluded.university,
+              verified = excluded.verified,
+              score = excluded.score,
+              evidence_links = excluded.evidence_links,
+              summary = excluded.summary,
+              version = version + 1,
+              updated_at = excluded.updated_at
+            """,
+            (
+                lookup_key,
+                name,
+                university,
+                1 if verdict["verified"] else 0,
+                verdict["score"],
+                json.dumps(verdict["evidence_links"]),
+                verdict["summary"],
+                timestamp.isoformat(),
+            ),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def get_latest_verdict(name: str, university: str) -> Optional[Dict[str, Any]]:
+    """Fetch the stored verdict for a professor with a single key lookup.
+
+    Returns None when the professor has never been verified.
+    """
+    lookup_key = normalize_lookup_key(name, university)
+
+    firestore_client = _get_firestore_client()
+    if firestore_client:
+        try:
+            doc = firestore_client.collection("professor_verdicts").document(_verdict_doc_id(lookup_key)).get()
+            if doc.exists:
+                data = doc.to_dict()
+                updated_at = data.get("updated_at")
+                return {
+                    "lookup_key": lookup_key,
+                    "name": data.get("name", name),
+                    "university": data.get("university", university),
+                    "verified": bool(data.get("verified", False)),
+                    "score": int(data.get("score", 0)),
+                    "evidence_links": list(data.get("evidence_links", [])),
+                    "summary": str(data.get("summary", "")),
+                    "version": int(data.get("version", 1)),
+                    "updated_at": updated_at.replace(tzinfo=None) if hasattr(updated_at, "replace") else datetime.utcnow(),
+                }
+        except Exception as e:
+            print(f"⚠️ Firestore verdict lookup failed: {e}. Falling back to SQLite.")
+
+    conn = _get_conn()
+    try:
+        row = conn.execute("SELECT * FROM professor_verdicts WHERE lookup_key = ?", (lookup_key,)).fetchone()
+    finally:
+        conn.close()
+    if not row:
+        return None
+    return {
+        "lookup_key": lookup_key,
+        "name": row["name"],
+        "university": row["university"],
+        "verified": bool(row["verified"]),
+        "score": int(row["score"]),
+        "evidence_links": json.loads(row["evidence_links"]),
+        "summary": row["summary"],
+        "version": int(row["version"]),
+        "updated_at": datetime.fromisoformat(row["updated_at"]),
+    }
+
+
+def _verdict_doc_id(lookup_key: str) -> str:
+    # Firestore document ids cannot contain "/", which university names sometimes do
+    return hashlib.sha1(lookup_key.encode("utf-8")).hexdigest()
+
+
+def list_history(
+    name: Optional[str] = None,
+    university: Optional[str] = None,
+    verified: Optional[bool] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+) -> Dict[str, Any]:
+    """Return one page of verification history, newest first.
+
+    Pagination is keyset based: ``cursor`` is the ``next_cursor`` of the
+    previous page, so deep pages cost the same as the first one.
+    Raises ValueError for a malformed cursor.
+    """
+    firestore_client = _get_firestore_client()
+    if firestore_client:
+        try:
+            return _list_history_firestore(firestore_client, name, university, verified, date_from, date_to, cursor, limit)
+        except ValueError:
+            raise
+        except Exception as e:
+            print(f"⚠️ Firestore history query failed: {e}. Falling back to SQLite.")
+
+    clauses: List[str] = []
+    params: List[Any] = []
+    if name:
+        clauses.append("name = ?")
+        params.append(name)
+    if university:
+        clauses.append("university = ?")
+        params.append(university)
+    if verified is not None:
+        clauses.append("verified = ?")
+        params.append(1 if verified else 0)
+    if date_from:
+        clauses.append("date >= ?")
+        params.append(date_from.isoformat())
+    if date_to:
+        clauses.append("date < ?")
+        params.append((date_to + timedelta(days=1)).isoformat())
+    if cursor:
+        try:
+            last_id = int(cursor)
+        except ValueError:
+            raise ValueError(f"Invalid cursor: {cursor}")
+        clauses.append("id < ?")
+        params.append(last_id)
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    conn = _get_conn()
+    try:
+        rows = conn.execute(
+            f"SELECT id, name, university, verified, score, date FROM verify_history {where} ORDER BY id DESC LIMIT ?",
+            (*params, limit + 1),
+        ).fetchall()
+    finally:
+        conn.close()
+
+    items = [
+        {
+            "id": str(row["id"]),
+            "name": row["name"],
+            "university": row["university"],
+            "verified": bool(row["verified"]),
+            "score": int(row["score"]),
+            "date": row["date"],
+        }
+        for row in rows[:limit]
+    ]
+    next_cursor = items[-1]["id"] if len(rows) > limit else None
+    return {"items": items, "next_cursor": next_cursor}
+
+
+def _list_history_firestore(
+    firestore_client: Any,
+    name: Optional[str],
+    university: Optional[str],
+    verified: Optional[bool],
+    date_from: Optional[date],
+    date_to: Optional[date],
+    cursor: Optional[str],
+    limit: int,
+) -> Dict[str, Any]:
+    """Firestore variant of list_history; cursors are document ids."""
+    collection = firestore_client.collection("verify_history")
+    query = collection
+    if name:
+        query = query.where("name", "==", name)
+    if university:
+        query = query.where("university", "==", university)
+    if verified is not None:
+        query = query.where("verified", "==", verified)
+    if date_from:
+        query = query.where("timestamp", ">=", datetime.combine(date_from, datetime.min.time()))
+    if date_to:
+        query = query.where("timestamp", "<", datetime.combine(date_to + timedelta(days=1), datetime.min.time()))
+    query = query.order_by("timestamp", direction=firestore.Query.DESCENDING)
+    if cursor:
+        snapshot = collection.document(cursor).get()
+        if not snapshot.exists:
+            raise ValueError(f"Invalid cursor: {cursor}")
+        query = query.start_after(snapshot)
+
+    docs = list(query.limit(limit + 1).stream())
+    items = []
+    for doc in docs[:limit]:
+        data = doc.to_dict()
+        timestamp = data.get("timestamp") or data.get("date")
+        items.append({
+            "id": doc.id,
+            "name": data.get("name", ""),
+            "university": data.get("university", ""),
+            "verified": bool(data.get("verified", False)),
+            "score": int(data.get("score", 0)),
+            "date": timestamp.isoformat() if hasattr(timestamp, "isoformat") else str(timestamp),
+        })
+    next_cursor = items[-1]["id"] if len(docs) > limit else None
+    return {"items": items, "next_cursor": next_cursor}
+
+
+def get_history_stats(date_from: Optional[date] = None, date_to: Optional[date] = None) -> Dict[str, Any]:
+    """Daily counts, average confidence and verification rate from the rollup tables.
+
+    Each history row is written to Firestore or, when that fails, to SQLite,
+    so the two stores' rollups are added together day by day.
+    """
+    clauses: List[str] = []
+    params: List[Any] = []
+    if date_from:
+        clauses.append("day >= ?")
+        params.append(date_from.isoformat())
+    if date_to:
+        clauses.append("day <= ?")
+        params.append(date_to.isoformat())
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    conn = _get_conn()
+    try:
+        rows = conn.execute(
+            f"SELECT day, total, verified, score_sum FROM verify_history_daily {where} ORDER BY day",
+            params,
+        ).fetchall()
+    finally:
+        conn.close()
+    by_day: Dict[str, Dict[str, Any]] = {row["day"]: dict(row) for row in rows}
+
+    firestore_client = _get_firestore_client()
+    if firestore_client:
+        try:
+            query = firestore_client.collection("verify_history_daily")
+            if date_from:
+                query = query.where("day", ">=", date_from.isoformat())
+            if date_to:
+                query = query.where("day", "<=", date_to.isoformat())
+            for doc in query.order_by("day").stream():
+                data = doc.to_dict()
+                day = data.get("day", doc.id)
+                rollup = by_day.setdefault(day, {"day": day, "total": 0, "verified": 0, "score_sum": 0})
+                for field in ("total", "verified", "score_sum"):
+                    rollup[field] += data.get(field, 0)
+        except Exception as e:
+            print(f"⚠️ Firestore stats query failed: {e}. Showing SQLite history only.")
+
+    rollups = [by_day[day] for day in sorted(by_day)]
+    days = [_summarize_rollup(r.get("day", ""), r.get("total", 0), r.get("verified", 0), r.get("score_sum", 0)) for r in rollups]
+    overall = _summarize_rollup(
+        None,
+        sum(r.get("total", 0) for r in rollups),
+        sum(r.get("verified", 0) for r in rollups),
+        sum(r.get("score_sum", 0) for r in rollups),
+    )
+    overall.pop("date")
+    return {**overall, "days": days}
+
+
+def _summarize_rollup(day: Optional[str], total: int, verified: int, score_sum: int) -> Dict[str, Any]:
+    return {
+        "date": day,
+        "total": int(total),
+        "verified": int(verified),
+        "verification_rate": round(verified / total, 4) if total else 0.0,
+        "average_confidence": round(score_sum / total, 2) if total else 0.0,
+    }
+
+
+def professor_collection_paths() -> List[str]:
+    """Professor collection paths in lookup priority order (from existing codebase pattern)."""
+    # Get app ID from environment or use default
+    app_id = os.getenv("APP_ID", "academic-match-production")
+    paths = [
+        f"artifacts/{app_id}/public/data/professors",
+        "artifacts/academic-match-production/public/data/professors",
+        "artifacts/academic-matchmaker-prod/public/data/professors",
+        "professors",
+    ]
+    return list(dict.fromkeys(paths))
+
+
+def replace_canonical_mapping(rows: List[tuple]) -> None:
+    """Atomically replace the entity-resolution mapping with ``(lookup_key, canonical_path, cluster_size)`` rows."""
+    resolved_at = datetime.utcnow().isoformat()
+    conn = _get_conn()
+    try:
+        with conn:
+            conn.execute("DELETE FROM professor_canonical")
+            conn.executemany(
+                "INSERT OR REPLACE INTO professor_canonical (lookup_key, canonical_path, cluster_size, resolved_at) VALUES (?, ?, ?, ?)",
+                ((key, path, size, resolved_at) for key, path, size in rows),
+            )
+    finally:
+        conn.close()
+
+
+def get_canonical_professor_path(name: str, university: str) -> Optional[str]:
+    """Canonical Firestore document path for a professor, if entity resolution has seen them."""
+    conn = _get_conn()
+    try:
+        row = conn.execute(
+            "SELECT canonical_path FROM professor_canonical WHERE lookup_key = ?",
+            (normalize_lookup_key(name, university or ""),),
+        ).fetchone()
+        return row[0] if row else None
+    except sqlite3.OperationalError:
+        # init_db has not run yet in this process (e.g. one-off scripts)
+        return None
+    finally:
+        conn.close()
+
+
 def get_professor_from_firestore(name: str, university: str) -> Optional[Dict[str, Any]]:
     """Try to get professor data from Firestore if available.
     
@@ -137,15 +640,17 @@ def get_professor_from_firestore(name: str, university: str) -> Optional[Dict[st
     if not firestore_client:
         return None
     
-    # Possible collection paths (from existing codebase pattern)
-    # Get app ID from environment or use default
-    app_id = os.getenv("APP_ID", "academic-match-production")
-    collection_paths = [
-        f"artifacts/{app_id}/public/data/professors",
-        "artifacts/academic-match-production/public/data/professors",
-        "artifacts/academic-matchmaker-prod/public/data/professors",
-        "professors",
-    ]
+    # Entity resolution maps known professors to one canonical document: a single read
+    canonical_path = get_canonical_professor_path(name, university)
+    if canonical_path:
+        try:
+            doc = firestore_client.document(canonical_path).get()
+            if doc.exists:
+                return {"id": doc.id, **doc.to_dict()}
+        except Exception as e:
+            print(f"⚠️ Canonical professor lookup failed: {e}. Searching collections.")
+    
+    collection_paths = professor_collection_paths()
     
     # Search in professor collections
     for collection_path in collection_paths:
@@ -231,3 +736,72 @@ def get_professor_from_firestore(name: str, university: str) -> Optional[Dict[st
     return None
 
 
+def insert_coauthor_papers(papers: List[Dict[str, Any]]) -> int:
+    """Store Semantic Scholar papers (with their ``authors`` list) for the co-authorship graph.
+
+    Returns the number of papers that were not seen before.
+    """
+    paper_rows = []
+    author_rows = []
+    for paper in papers:
+        paper_id = paper.get("paperId")
+        authors = [a for a in (paper.get("authors") or []) if a.get("authorId")]
+        if not paper_id or len(authors) < 2:
+            continue
+        paper_rows.append((paper_id, json.dumps([a["authorId"] for a in authors])))
+        for author in authors:
+            author_name = author.get("name") or ""
+            author_rows.append((author["authorId"], author_name, " ".join(author_name.lower().split())))
+    if not paper_rows:
+        return 0
+
+    conn = _get_conn()
+    try:
+        before = conn.total_changes
+        conn.executemany("INSERT OR IGNORE INTO coauthor_papers (paper_id, author_ids) VALUES (?, ?)", paper_rows)
+        inserted = conn.total_changes - before
+        conn.executemany(
+            "INSERT OR REPLACE INTO coauthor_authors (author_id, name, name_key) VALUES (?, ?, ?)",
+            author_rows,
+        )
+        conn.commit()
+        return inserted
+    finally:
+        conn.close()
+
+
+def load_coauthor_papers() -> List[List[str]]:
+    """Return the author id list of every stored paper."""
+    conn = _get_conn()
+    try:
+        return [json.loads(row[0]) for row in conn.execute("SELECT author_ids FROM coauthor_papers")]
+    finally:
+        conn.close()
+
+
+def find_author_ids(name: str) -> List[str]:
+    """Semantic Scholar author ids recorded under this name (case-insensitive)."""
+    conn = _get_conn()
+    try:
+        rows = conn.execute(
+            "SELECT author_id FROM coauthor_authors WHERE name_key = ?",
+            (" ".join(name.lower().split()),),
+        ).fetchall()
+        return [row[0] for row in rows]
+    finally:
+        conn.close()
+
+
+def get_author_names(author_ids: List[str]) -> Dict[str, str]:
+    if not author_ids:
+        return {}
+    conn = _get_conn()
+    try:
+        placeholders = ",".join("?" for _ in author_ids)
+        rows = conn.execute(
+            f"SELECT author_id, name FROM coauthor_authors WHERE author_id IN ({placeholders})",
+            author_ids,
+        ).fetchall()
+        return {row[0]: row[1] for row in rows}
+    finally:
+        conn.close()
@@ -0,0 +1,243 @@
+"""Batch entity resolution for professor records spread across Firestore collections.
+
+The same professor can be stored in several professor collections and in
+``users``. This job reads every record, finds duplicates and writes a
+canonical document path per (name, university) key, which
+``get_professor_from_firestore`` uses to do a single document read.
+
+Candidate pairs come from multi-pass sorted-neighbourhood blocking: records
+are sorted by a few blocking keys and only records within ``window`` positions
+of each other are compared, so the work is O(n log n + n * window) rather
+than O(n^2).
+
+Usage:
+    python -m backend.entity_resolution                 # read Firestore, write mapping
+    python -m backend.entity_resolution --input records.jsonl --output mapping.jsonl
+"""
+
+import argparse
+import json
+import re
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .database import (
+    _get_firestore_client,
+    init_db,
+    normalize_lookup_key,
+    professor_collection_paths,
+    replace_canonical_mapping,
+)
+
+NAME_TITLES = {"dr", "prof", "professor", "mr", "mrs", "ms", "phd", "sir"}
+UNIVERSITY_STOPWORDS = {"university", "of", "the", "institute", "college", "and", "at"}
+_NON_ALNUM = re.compile(r"[^a-z0-9\s]")
+
+MATCH_THRESHOLD = 0.8
+# Name credit when one first name is an initial or abbreviation of the other ("J. Smith" / "Jane Smith")
+INITIAL_MATCH_SCORE = 0.75
+# A missing university cannot confirm a match, so identical names alone stay below MATCH_THRESHOLD
+MISSING_UNIVERSITY_SCORE = 0.25
+
+
+class Record:
+    __slots__ = ("path", "priority", "name", "university", "email", "clean_name", "last", "first", "first_name",
+                 "first_abbreviated", "name_tokens", "uni_tokens", "uni_key")
+
+    def __init__(self, path: str, priority: int, name: str, university: str, email: str):
+        self.path = path
+        self.priority = priority
+        self.name = name
+        self.university = university
+        self.email = email.strip().lower()
+        tokens = [t for t in _NON_ALNUM.sub(" ", name.lower()).split() if t not in NAME_TITLES]
+        self.clean_name = " ".join(tokens)
+        self.name_tokens = frozenset(tokens)
+        self.last = tokens[-1] if tokens else ""
+        self.first = tokens[0][:1] if tokens else ""
+        self.first_name = tokens[0] if len(tokens) > 1 else ""
+        # "J." and "Chris." are abbreviations; "Jane" is a full first name
+        raw_first = next((t for t in name.lower().split() if _NON_ALNUM.sub("", t) not in NAME_TITLES), "")
+        self.first_abbreviated = len(self.first_name) == 1 or raw_first.endswith(".")
+        uni_tokens = [t for t in _NON_ALNUM.sub(" ", university.lower()).split() if t not in UNIVERSITY_STOPWORDS]
+        self.uni_tokens = frozenset(uni_tokens)
+        self.uni_key = "".join(sorted(uni_tokens))[:6]
+
+
+class UnionFind:
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, i: int) -> int:
+        parent = self.parent
+        root = i
+        while parent[root] != root:
+            root = parent[root]
+        while parent[i] != root:
+            parent[i], i = root, parent[i]
+        return root
+
+    def union(self, a: int, b: int) -> None:
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            if ra < rb:
+                self.parent[rb] = ra
+            else:
+                self.parent[ra] = rb
+
+
+def _jaccard(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def first_names_compatible(a: Record, b: Record) -> bool:
+    """Same first name, or one is an initial or abbreviation the other starts with."""
+    if a.first_name == b.first_name:
+        return True
+    if a.first_abbreviated and b.first_name.startswith(a.first_name):
+        return True
+    return b.first_abbreviated and a.first_name.startswith(b.first_name)
+
+
+def score_pair(a: Record, b: Record) -> float:
+    """Similarity in [0, 1] between two professor records."""
+    if a.email and a.email == b.email:
+        return 1.0
+    if not a.last or a.last != b.last or not first_names_compatible(a, b):
+        return 0.0
+    name_score = _jaccard(a.name_tokens, b.name_tokens)
+    if a.first_name != b.first_name:
+        name_score = max(name_score, INITIAL_MATCH_SCORE)
+    if a.uni_tokens and b.uni_tokens:
+        uni_score = _jaccard(a.uni_tokens, b.uni_tokens)
+    else:
+        uni_score = MISSING_UNIVERSITY_SCORE
+    return 0.6 * name_score + 0.4 * uni_score
+
+
+def _blocking_keys(record: Record) -> Tuple[str, str, str]:
+    return (
+        f"{record.last}|{record.first}|{record.uni_key}",
+        f"{record.uni_key}|{record.last}",
+        record.email or f"~{record.last}{record.first}",
+    )
+
+
+def resolve(records: List[Record], window: int = 6) -> List[int]:
+    """Cluster records; returns the cluster root index of every record.
+
+    Clusters holding different full first names are never merged on name
+    similarity, so "J. Smith" cannot chain "Jane Smith" and "John Smith"
+    together. A shared email still merges them.
+    """
+    uf = UnionFind(len(records))
+    full_names = [frozenset([r.first_name]) if r.first_name and not r.first_abbreviated else frozenset() for r in records]
+    keys = [_blocking_keys(r) for r in records]
+    for pass_index in range(3):
+        order = sorted(range(len(records)), key=lambda i: keys[i][pass_index])
+        for pos, i in enumerate(order):
+            a = records[i]
+            for j in order[pos + 1:pos + window]:
+                ri, rj = uf.find(i), uf.find(j)
+                if ri == rj:
+                    continue
+                b = records[j]
+                same_email = bool(a.email) and a.email == b.email
+                if not same_email and len(full_names[ri] | full_names[rj]) > 1:
+                    continue
+                if score_pair(a, b) >= MATCH_THRESHOLD:
+                    uf.union(i, j)
+                    full_names[uf.find(i)] = full_names[ri] | full_names[rj]
+    return [uf.find(i) for i in range(len(records))]
+
+
+def canonical_rows(records: List[Record], roots: List[int]) -> List[Tuple[str, str, int]]:
+    """Pick a canonical document per cluster and key every member's (name, university) to it."""
+    clusters: Dict[int, List[int]] = {}
+    for i, root in enumerate(roots):
+        clusters.setdefault(root, []).append(i)
+
+    rows: Dict[str, Tuple[str, str, int]] = {}
+    for members in clusters.values():
+        canonical = min(
+            members,
+            key=lambda i: (records[i].priority, not records[i].university, records[i].path),
+        )
+        canonical_path = records[canonical].path
+        for i in members:
+            # Key both the stored spelling and the title-free one users usually type
+            for name in (records[i].name, records[i].clean_name):
+                key = normalize_lookup_key(name, records[i].university)
+                rows[key] = (key, canonical_path, len(members))
+    return list(rows.values())
+
+
+def load_firestore_records() -> Iterable[Record]:
+    client = _get_firestore_client()
+    if not client:
+        raise RuntimeError("Firestore is not enabled; use --input to resolve an exported JSONL file")
+
+    paths = professor_collection_paths()
+    for priority, collection_path in enumerate(paths):
+        for doc in client.collection(collection_path).select(["name", "university", "email"]).stream():
+            data = doc.to_dict() or {}
+            if data.get("name"):
+                yield Record(f"{collection_path}/{doc.id}", priority, data["name"], data.get("university") or "", data.get("email") or "")
+
+    users = client.collection("users").where("userType", "==", "professor")
+    for doc in users.select(["name", "university", "email"]).stream():
+        data = doc.to_dict() or {}
+        if data.get("name"):
+            yield Record(f"users/{doc.id}", len(paths), data["name"], data.get("university") or "", data.get("email") or "")
+
+
+def load_jsonl_records(path: str) -> Iterable[Record]:
+    """Records exported as JSON lines with ``path``, ``name`` and optional ``university``, ``email``, ``priority``."""
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            if not line.strip():
+                continue
+            data = json.loads(line)
+            yield Record(
+                data["path"],
+                int(data.get("priority", 0)),
+                data.get("name") or "",
+                data.get("university") or "",
+                data.get("email") or "",
+            )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Resolve duplicate professor records to canonical documents")
+    parser.add_argument("--input", help="JSONL export to resolve instead of reading Firestore")
+    parser.add_argument("--output", help="Also write the mapping as JSONL to this file")
+    parser.add_argument("--window", type=int, default=6, help="Sorted-neighbourhood window size")
+    parser.add_argument("--dry-run", action="store_true", help="Do not replace the mapping used by the verifier")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    records = list(load_jsonl_records(args.input) if args.input else load_firestore_records())
+    loaded = time.perf_counter()
+    roots = resolve(records, window=args.window)
+    rows = canonical_rows(records, roots)
+    resolved = time.perf_counter()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            for key, canonical_path, size in rows:
+                fh.write(json.dumps({"lookup_key": key, "canonical_path": canonical_path, "cluster_size": size}) + "\n")
+    if not args.dry_run:
+        init_db()
+        replace_canonical_mapping(rows)
+
+    clusters = len(set(roots))
+    print(
+        f"✅ Resolved {len(records)} records into {clusters} professors "
+        f"({len(records) - clusters} duplicates) | load {loaded - started:.1f}s, resolve {resolved - loaded:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
-from fastapi import FastAPI, HTTPException
+import hashlib
+from datetime import date, datetime
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel, Field
 from typing import List, Optional
 from dotenv import load_dotenv
@@ -9,7 +12,20 @@ import os
 load_dotenv()
 
 from .verify_logic import verify_professor
-from .database import init_db, insert_history
+from .database import (
+    init_db,
+    insert_history,
+    list_history,
+    get_history_stats,
+    save_verdict,
+    get_latest_verdict,
+    find_author_ids,
+    get_author_names,
+)
+from .coauthor_graph import get_coauthor_graph, start_graph_builder
+
+# How long a stored verdict may be served from HTTP caches before revalidation
+VERDICT_MAX_AGE_SECONDS = int(os.getenv("VERDICT_MAX_AGE_SECONDS", "86400"))
 
 
 class ProfessorRequest(BaseModel):
@@ -24,6 +40,56 @@ class ProfessorResponse(BaseModel):
     summary: str
 
 
+class ProfessorVerdict(ProfessorResponse):
+    name: str
+    university: str
+    version: int
+    updated_at: str
+
+
+class HistoryItem(BaseModel):
+    id: str
+    name: str
+    university: str
+    verified: bool
+    score: int
+    date: str
+
+
+class HistoryPage(BaseModel):
+    items: List[HistoryItem]
+    next_cursor: Optional[str] = None
+
+
+class DailyStats(BaseModel):
+    date: str
+    total: int
+    verified: int
+    verification_rate: float
+    average_confidence: float
+
+
+class HistoryStats(BaseModel):
+    total: int
+    verified: int
+    verification_rate: float
+    average_confidence: float
+    days: List[DailyStats]
+
+
+class CollaborationAuthor(BaseModel):
+    author_id: str
+    name: str
+
+
+class CollaborationDistance(BaseModel):
+    source: str
+    target: str
+    connected: bool
+    distance: Optional[int] = None
+    path: List[CollaborationAuthor]
+
+
 app = FastAPI(title="Trust & Transparency with AI", version="0.1.0")
 
 app.add_middleware(
@@ -38,6 +104,7 @@ app.add_middleware(
 @app.on_event("startup")
 def on_startup() -> None:
     init_db()
+    start_graph_builder()
 
 
 @app.post("/verify-professor", response_model=ProfessorResponse)
@@ -53,6 +120,7 @@ def post_verify_professor(payload: ProfessorRequest):
         verified=result.get("verified", False),
         score=int(result.get("confidence_score", 0)),
     )
+    save_verdict(name=payload.name, university=payload.university, result=result)
 
     return ProfessorResponse(
         verified=bool(result.get("verified", False)),
@@ -62,6 +130,109 @@ def post_verify_professor(payload: ProfessorRequest):
     )
 
 
+@app.get("/professors/verification", response_model=ProfessorVerdict)
+def get_professor_verification(
+    request: Request,
+    name: str = Query(..., min_length=2),
+    university: str = Query(..., min_length=2),
+):
+    verdict = get_latest_verdict(name=name, university=university)
+    if verdict is None:
+        raise HTTPException(status_code=404, detail="No verdict stored for this professor")
+
+    key_digest = hashlib.sha1(verdict["lookup_key"].encode("utf-8")).hexdigest()[:16]
+    etag = f'"{key_digest}-v{verdict["version"]}"'
+    age = (datetime.utcnow() - verdict["updated_at"]).total_seconds()
+    max_age = max(0, int(VERDICT_MAX_AGE_SECONDS - age))
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={max_age}" if max_age else "public, max-age=0, must-revalidate",
+    }
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    body = ProfessorVerdict(
+        verified=verdict["verified"],
+        confidence_score=verdict["score"],
+        evidence_links=verdict["evidence_links"],
+        summary=verdict["summary"],
+        name=verdict["name"],
+        university=verdict["university"],
+        version=verdict["version"],
+        updated_at=verdict["updated_at"].isoformat(),
+    )
+    return JSONResponse(content=body.model_dump(), headers=headers)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # If-None-Match uses weak comparison, so a W/ prefix still matches
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+@app.get("/collaboration-distance", response_model=CollaborationDistance)
+def get_collaboration_distance(
+    source: str = Query(..., min_length=2, description="Author name or Semantic Scholar author id"),
+    target: str = Query(..., min_length=2, description="Author name or Semantic Scholar author id"),
+    max_depth: int = Query(6, ge=1, le=10),
+):
+    source_ids = find_author_ids(source) or [source]
+    target_ids = find_author_ids(target) or [target]
+    graph = get_coauthor_graph()
+    if graph is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Co-authorship graph is still being built, retry shortly",
+            headers={"Retry-After": "5"},
+        )
+    found = graph.distance(source_ids, target_ids, max_depth=max_depth)
+    if found is None:
+        return CollaborationDistance(source=source, target=target, connected=False, path=[])
+
+    distance, path_ids = found
+    names = get_author_names(path_ids)
+    return CollaborationDistance(
+        source=source,
+        target=target,
+        connected=True,
+        distance=distance,
+        path=[CollaborationAuthor(author_id=a, name=names.get(a, "")) for a in path_ids],
+    )
+
+
+@app.get("/history", response_model=HistoryPage)
+def get_history(
+    name: Optional[str] = None,
+    university: Optional[str] = None,
+    verified: Optional[bool] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+):
+    try:
+        page = list_history(
+            name=name,
+            university=university,
+            verified=verified,
+            date_from=date_from,
+            date_to=date_to,
+            cursor=cursor,
+            limit=limit,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return HistoryPage(**page)
+
+
+@app.get("/history/stats", response_model=HistoryStats)
+def get_history_statistics(date_from: Optional[date] = None, date_to: Optional[date] = None):
+    return HistoryStats(**get_history_stats(date_from=date_from, date_to=date_to))
+
+
 @app.get("/health")
 def health() -> dict:
     return {"status": "ok"}
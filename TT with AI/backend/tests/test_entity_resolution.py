@@ -0,0 +1,41 @@
+from backend.entity_resolution import MATCH_THRESHOLD, Record, resolve, score_pair
+
+
+def record(name, university="Stanford University", email="", path=None):
+    return Record(path or f"professors/{name}", 0, name, university, email)
+
+
+def test_different_first_names_with_same_initial_do_not_match():
+    jane, john = record("Jane Smith"), record("John Smith")
+    assert score_pair(jane, john) == 0.0
+    roots = resolve([jane, john])
+    assert roots[0] != roots[1]
+
+
+def test_initial_matches_full_first_name():
+    assert score_pair(record("J. Smith"), record("Jane Smith")) >= MATCH_THRESHOLD
+    assert score_pair(record("Dr. Chris. Lee"), record("Christopher Lee")) >= MATCH_THRESHOLD
+
+
+def test_initial_does_not_chain_different_first_names():
+    records = [record("Jane Smith"), record("J. Smith"), record("John Smith")]
+    roots = resolve(records)
+    assert roots[0] != roots[2]
+
+
+def test_identical_names_without_university_do_not_match():
+    assert score_pair(record("John Smith", ""), record("John Smith")) < MATCH_THRESHOLD
+
+
+def test_same_person_across_collections_is_merged():
+    records = [record("Prof. Jane Smith", path="professors/a"), record("Jane Smith", "Stanford", path="users/b")]
+    roots = resolve(records)
+    assert roots[0] == roots[1]
+
+
+def test_shared_email_merges_regardless_of_names():
+    a = record("Bob Jones", email="rj@stanford.edu")
+    b = record("Robert Jones", email="RJ@stanford.edu ")
+    assert score_pair(a, b) == 1.0
+    roots = resolve([a, b])
+    assert roots[0] == roots[1]
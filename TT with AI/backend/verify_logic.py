@@ -6,6 +6,7 @@ import requests
 from bs4 import BeautifulSoup
 
 from .database import get_professor_from_firestore
+from .coauthor_graph import record_papers
 
 
 def _safe_get_json(url: str, headers: Dict[str, str] | None = None, params: Dict[str, str] | None = None) -> dict:
@@ -81,9 +82,11 @@ def fetch_semantic_scholar(name: str, research_area: str = None, university: str
             # Fetch their papers for better evidence
             try:
                 papers_url = f"https://api.semanticscholar.org/graph/v1/author/{author_id}/papers"
-                papers_params = {"fields": "title,year,venue,paperId", "limit": "5"}
+                papers_params = {"fields": "title,year,venue,paperId,authors", "limit": "5"}
                 papers_data = _safe_get_json(papers_url, params=papers_params)
                 papers = papers_data.get("data", [])
+                # Author lists feed the co-authorship graph
+                record_papers(papers)
                 
                 if papers:
                     for paper in papers[:3]: